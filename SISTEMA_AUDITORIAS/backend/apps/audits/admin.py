@@ -2,7 +2,7 @@
 Admin configuration for audits app.
 """
 from django.contrib import admin
-from .models import AuditTemplate, QuestionSection, Question, Audit, AuditAnswer, Recommendation
+from .models import AuditTemplate, QuestionSection, Question, AuditCodeSequence, Audit, AuditAnswer, Recommendation
 
 
 class QuestionInline(admin.TabularInline):
@@ -61,5 +61,11 @@ class AuditAnswerAdmin(admin.ModelAdmin):
 @admin.register(Recommendation)
 class RecommendationAdmin(admin.ModelAdmin):
     list_display = ['title', 'audit', 'priority', 'category', 'status', 'created_at']
-    list_filter = ['priority', 'category', 'status']
+    list_filter = ['priority', 'category', 'status', 'rule']
     search_fields = ['title', 'description']
+
+
+@admin.register(AuditCodeSequence)
+class AuditCodeSequenceAdmin(admin.ModelAdmin):
+    list_display = ['organization', 'year', 'last_value']
+    list_filter = ['year']
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class AuditsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.audits'
+    
+    def ready(self):
+        from . import signals, tasks  # noqa: F401
@@ -0,0 +1,163 @@
+"""
+Score distributions of completed audits per organizational unit.
+
+The scores of a template and period are read once as flat (company,
+branch, department, score) rows; each level is then described in one
+vectorized pass with NumPy when it is installed (bincount for counts,
+means, deviations and histograms, one lexsort for the percentiles), or
+with plain Python otherwise. Both give the same figures: histograms over
+0-100, linear-interpolation percentiles and population standard deviation.
+"""
+import math
+from collections import defaultdict
+
+from apps.core.hierarchy import LEVEL_MODELS
+
+from .models import Audit
+from .services import period_bounds
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, distributions fall back to pure Python
+    np = None
+
+
+DISTRIBUTION_LEVELS = ['company', 'branch', 'department']
+
+HISTOGRAM_BINS = 10  # Equal bins over 0-100
+PERCENTILES = (10, 50, 90)
+
+
+def histogram_edges():
+    width = 100 / HISTOGRAM_BINS
+    return [round(width * i, 2) for i in range(HISTOGRAM_BINS + 1)]
+
+
+def _bin(score):
+    return min(int(score * HISTOGRAM_BINS // 100), HISTOGRAM_BINS - 1)
+
+
+def _percentile(ordered, percent):
+    """Linear-interpolation percentile of sorted values (NumPy's default method)"""
+    position = (len(ordered) - 1) * percent / 100
+    low = math.floor(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def _summary(count, mean, stddev, minimum, maximum, percentiles, histogram):
+    return {
+        'audits': int(count),
+        'mean': round(float(mean), 2),
+        'stddev': round(float(stddev), 2),
+        'min': round(float(minimum), 2),
+        'max': round(float(maximum), 2),
+        **{f'p{percent}': round(float(value), 2) for percent, value in zip(PERCENTILES, percentiles)},
+        'histogram': [int(value) for value in histogram],
+    }
+
+
+def _describe_python(units, scores):
+    """{unit: summary} of the scores grouped by unit"""
+    groups = defaultdict(list)
+    for unit, score in zip(units, scores):
+        groups[unit].append(score)
+    
+    described = {}
+    for unit, values in groups.items():
+        values.sort()
+        count = len(values)
+        mean = sum(values) / count
+        histogram = [0] * HISTOGRAM_BINS
+        for score in values:
+            histogram[_bin(score)] += 1
+        described[unit] = _summary(
+            count,
+            mean,
+            math.sqrt(sum((score - mean) ** 2 for score in values) / count),
+            values[0],
+            values[-1],
+            [_percentile(values, percent) for percent in PERCENTILES],
+            histogram,
+        )
+    return described
+
+
+def _describe_numpy(units, scores):
+    units = np.asarray(units, dtype=np.int64)
+    scores = np.asarray(scores, dtype=np.float64)
+    keys, groups = np.unique(units, return_inverse=True)
+    
+    counts = np.bincount(groups)
+    means = np.bincount(groups, weights=scores) / counts
+    stddevs = np.sqrt(np.bincount(groups, weights=(scores - means[groups]) ** 2) / counts)
+    
+    bins = np.minimum((scores * HISTOGRAM_BINS // 100).astype(np.int64), HISTOGRAM_BINS - 1)
+    histograms = np.bincount(groups * HISTOGRAM_BINS + bins, minlength=len(keys) * HISTOGRAM_BINS)
+    histograms = histograms.reshape(len(keys), HISTOGRAM_BINS)
+    
+    # Scores sorted within each unit, units laid out one after the other
+    ordered = scores[np.lexsort((scores, groups))]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    ends = starts + counts - 1
+    percentiles = []
+    for percent in PERCENTILES:
+        position = (counts - 1) * percent / 100
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, counts - 1)
+        percentiles.append(ordered[starts + low] + (ordered[starts + high] - ordered[starts + low]) * (position - low))
+    
+    return {
+        int(key): _summary(
+            counts[i], means[i], stddevs[i], ordered[starts[i]], ordered[ends[i]],
+            [values[i] for values in percentiles], histograms[i],
+        )
+        for i, key in enumerate(keys)
+    }
+
+
+def describe_scores(units, scores):
+    """
+    {unit: {audits, mean, stddev, min, max, p10, p50, p90, histogram}} of
+    scores grouped by the unit at the same position.
+    """
+    if not scores:
+        return {}
+    if np is None:
+        return _describe_python(units, scores)
+    return _describe_numpy(units, scores)
+
+
+def get_score_distribution(audits, template, date_from, date_to):
+    """
+    Score distribution of the completed audits of a template over a period
+    (both dates included), overall and per company, branch and department.
+    Units are listed from the lowest mean up, so the outliers come first.
+    """
+    start, end = period_bounds(date_from, date_to)
+    rows = audits.filter(
+        template=template,
+        status='completed',
+        completed_at__gte=start,
+        completed_at__lt=end,
+    ).values_list(*(Audit.scope_lookup(level) for level in DISTRIBUTION_LEVELS), 'score')
+    
+    columns = list(zip(*rows)) or [()] * (len(DISTRIBUTION_LEVELS) + 1)
+    scores = [float(score) for score in columns[-1]]
+    
+    distribution = {
+        'bins': histogram_edges(),
+        'overall': describe_scores([0] * len(scores), scores).get(0),
+        'levels': {},
+    }
+    for position, level in enumerate(DISTRIBUTION_LEVELS):
+        # Audits above this level (e.g. company audits for branches) are left out
+        scoped = [(unit, score) for unit, score in zip(columns[position], scores) if unit]
+        described = describe_scores([unit for unit, _ in scoped], [score for _, score in scoped])
+        names = dict(LEVEL_MODELS[level].objects.filter(id__in=described).values_list('id', 'name')) if described else {}
+        distribution['levels'][level] = sorted(
+            ({'unit_id': unit, 'name': names.get(unit), **summary} for unit, summary in described.items()),
+            key=lambda unit: (unit['mean'], unit['unit_id']),
+        )
+    
+    return distribution
@@ -0,0 +1,197 @@
+"""
+Streaming exports of audit answers, section scores and recommendations.
+
+Rows are read from values() querysets with `.iterator(chunk_size=...)` and
+written out as they come: CSV through a StreamingHttpResponse, XLSX
+through an openpyxl write-only workbook spooled to a temporary file.
+Memory stays flat whatever the number of rows.
+"""
+import csv
+import tempfile
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Question, AuditAnswer, AuditSectionScore, Recommendation
+from .scoring import get_scoring_plan
+
+try:
+    from openpyxl import Workbook
+except ImportError:
+    Workbook = None
+
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+QUESTION_TYPE_LABELS = dict(Question.QUESTION_TYPE_CHOICES)
+PRIORITY_LABELS = dict(Recommendation.PRIORITY_CHOICES)
+CATEGORY_LABELS = dict(Recommendation.CATEGORY_CHOICES)
+STATUS_LABELS = dict(Recommendation.STATUS_CHOICES)
+
+
+def _cell(value):
+    """Plain cell value: local naive datetimes (openpyxl rejects aware ones)"""
+    if isinstance(value, datetime):
+        return timezone.localtime(value).replace(tzinfo=None) if timezone.is_aware(value) else value
+    return value
+
+
+def _answer_value(question_type, answer_boolean, answer_scale, answer_choice, answer_text):
+    """Readable value of an answer, full text included"""
+    if question_type == 'yes_no':
+        return '' if answer_boolean is None else ('Sí' if answer_boolean else 'No')
+    if question_type == 'scale':
+        return answer_scale if answer_scale is not None else ''
+    if question_type == 'multiple_choice':
+        return answer_choice or ''
+    return answer_text or ''
+
+
+# ============ Datasets ============
+
+def answer_rows(audits):
+    """One row per answer of the audits"""
+    answers = (
+        AuditAnswer.objects.filter(audit__in=audits.values('id'))
+        .order_by('audit_id', 'question__section__order', 'question__order')
+        .values_list(
+            'audit__code', 'audit__name', 'question__section__code', 'question__section__name',
+            'question__code', 'question__text', 'question__question_type',
+            'answer_boolean', 'answer_scale', 'answer_choice', 'answer_text',
+            'score', 'max_score', 'comments', 'answered_by__email', 'answered_at',
+        )
+    )
+    for row in answers.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+        yield [
+            *row[:6],
+            QUESTION_TYPE_LABELS.get(row[6], row[6]),
+            _answer_value(*row[6:11]),
+            row[11], row[12], row[13] or '', row[14] or '', _cell(row[15]),
+        ]
+
+
+def section_rows(audits):
+    """
+    One row per section of each audit, from the stored section totals.
+    
+    Audits and their section totals are read side by side, both ordered by
+    audit, so only the sections of one audit are held at a time.
+    """
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    audit_rows = audits.order_by('id').values_list('id', 'code', 'name', 'template_id')
+    section_scores = groupby(
+        AuditSectionScore.objects.filter(audit__in=audits.values('id'))
+        .order_by('audit_id')
+        .values_list('audit_id', 'section_id', 'earned_points', 'answered_questions')
+        .iterator(chunk_size=chunk_size),
+        key=itemgetter(0),
+    )
+    pending = next(section_scores, None)
+    plans = {}  # Template id -> plan, looked up once per export
+    
+    for audit_id, code, name, template_id in audit_rows.iterator(chunk_size=chunk_size):
+        # Sections of audits deleted since the section query started
+        while pending is not None and pending[0] < audit_id:
+            pending = next(section_scores, None)
+        
+        stored = {}
+        if pending is not None and pending[0] == audit_id:
+            stored = {section_id: (earned, answered) for _, section_id, earned, answered in pending[1]}
+            pending = next(section_scores, None)
+        
+        plan = plans.get(template_id)
+        if plan is None:
+            plan = plans[template_id] = get_scoring_plan(template_id)
+        for position, section_id in enumerate(plan.section_ids):
+            earned, answered = stored.get(section_id, (0, 0))
+            earned = float(earned)
+            total_possible = plan.section_max_points[position]
+            percentage = round((earned / total_possible) * 100, 2) if total_possible > 0 else 0
+            yield [
+                code, name, plan.section_codes[position], plan.section_names[position],
+                plan.section_question_counts[position], answered,
+                earned, total_possible, percentage,
+            ]
+
+
+def recommendation_rows(audits):
+    """One row per recommendation of the audits"""
+    recommendations = (
+        Recommendation.objects.filter(audit__in=audits.values('id'))
+        .order_by('audit_id', 'priority', 'id')
+        .values_list(
+            'audit__code', 'audit__name', 'section__name', 'question__code',
+            'title', 'description', 'action_required', 'priority', 'category', 'status', 'created_at',
+        )
+    )
+    for row in recommendations.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+        yield [
+            row[0], row[1], row[2] or '', row[3] or '', row[4], row[5], row[6],
+            PRIORITY_LABELS.get(row[7], row[7]),
+            CATEGORY_LABELS.get(row[8], row[8]),
+            STATUS_LABELS.get(row[9], row[9]),
+            _cell(row[10]),
+        ]
+
+
+# name -> (sheet title, headers, row generator)
+DATASETS = {
+    'answers': ('Respuestas', [
+        'Auditoría', 'Nombre', 'Código sección', 'Sección', 'Código pregunta', 'Pregunta', 'Tipo',
+        'Respuesta', 'Puntaje', 'Puntaje máximo', 'Comentarios', 'Respondido por', 'Fecha respuesta',
+    ], answer_rows),
+    'sections': ('Secciones', [
+        'Auditoría', 'Nombre', 'Código sección', 'Sección', 'Preguntas', 'Respondidas',
+        'Puntaje', 'Puntaje máximo', 'Porcentaje',
+    ], section_rows),
+    'recommendations': ('Recomendaciones', [
+        'Auditoría', 'Nombre', 'Sección', 'Pregunta', 'Título', 'Descripción', 'Acción requerida',
+        'Prioridad', 'Categoría', 'Estado', 'Fecha',
+    ], recommendation_rows),
+}
+
+
+# ============ Responses ============
+
+class _Echo:
+    """File-like object handing back what the csv writer writes"""
+    
+    def write(self, value):
+        return value
+
+
+def _stream_csv(headers, rows):
+    writer = csv.writer(_Echo())
+    # BOM so spreadsheet tools read the file as UTF-8
+    yield '\ufeff' + writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def csv_response(dataset, audits, filename):
+    """Streaming CSV download of one dataset of the audits"""
+    _, headers, rows = DATASETS[dataset]
+    response = StreamingHttpResponse(_stream_csv(headers, rows(audits)), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def xlsx_response(datasets, audits, filename):
+    """XLSX download with one sheet per dataset of the audits"""
+    workbook = Workbook(write_only=True)
+    for dataset in datasets:
+        title, headers, rows = DATASETS[dataset]
+        sheet = workbook.create_sheet(title=title)
+        sheet.append(headers)
+        for row in rows(audits):
+            sheet.append(row)
+    
+    # Deleted once FileResponse closes it after sending
+    handle = tempfile.TemporaryFile(suffix='.xlsx')
+    workbook.save(handle)
+    handle.seek(0)
+    return FileResponse(handle, as_attachment=True, filename=f'{filename}.xlsx', content_type=XLSX_CONTENT_TYPE)
@@ -0,0 +1,287 @@
+"""
+Bulk import of audit templates.
+
+Template definitions come as JSON, YAML (with PyYAML installed) or CSV
+(one row per question, the template fields given apart). They are fully
+validated first, then the template, its sections and its questions are
+inserted with bulk_create in one transaction: a handful of queries,
+whatever the number of questions.
+"""
+import csv
+import io
+import json
+from pathlib import Path
+
+from django.db import transaction
+
+from .models import AuditTemplate, QuestionSection, Question
+from .scoring import touch_template
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+FILE_TYPES = ['json', 'yaml', 'csv']
+
+QUESTION_TYPES = [value for value, _ in Question.QUESTION_TYPE_CHOICES]
+
+# Template fields that can be given apart from the file (CSV files carry none)
+TEMPLATE_TEXT_FIELDS = ['name', 'code', 'description', 'standard', 'version']
+
+# Columns of CSV definitions; choices are separated by '|'
+CSV_COLUMNS = [
+    'section_code', 'section_name', 'section_description',
+    'code', 'text', 'description', 'question_type', 'choices', 'is_required', 'weight', 'max_score',
+]
+
+CODE_MAX_LENGTH = 50
+NAME_MAX_LENGTH = 255
+MAX_ERRORS = 50
+BATCH_SIZE = 1000
+
+
+class TemplateImportError(Exception):
+    """Invalid template definition, with the list of problems found"""
+    
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(errors))
+
+
+# ============ Parsing ============
+
+def file_type_of(filename):
+    """File type of a definition from its extension, or None"""
+    suffix = Path(filename).suffix.lower().lstrip('.')
+    if suffix == 'yml':
+        return 'yaml'
+    return suffix if suffix in FILE_TYPES else None
+
+
+def parse_definition(content, file_type, **template_fields):
+    """
+    Template definition (a dict) from the text of a JSON, YAML or CSV file.
+    `template_fields` fill the template fields missing from the file, which
+    is all of them for CSV.
+    """
+    if file_type == 'json':
+        try:
+            definition = json.loads(content)
+        except ValueError as exc:
+            raise TemplateImportError([f'JSON inválido: {exc}'])
+    elif file_type == 'yaml':
+        if yaml is None:
+            raise TemplateImportError(['Importar YAML requiere PyYAML'])
+        try:
+            definition = yaml.safe_load(content)
+        except yaml.YAMLError as exc:
+            raise TemplateImportError([f'YAML inválido: {exc}'])
+    elif file_type == 'csv':
+        definition = _parse_csv(content)
+    else:
+        raise TemplateImportError([f'Tipo de archivo no soportado, opciones: {", ".join(FILE_TYPES)}'])
+    
+    if not isinstance(definition, dict):
+        raise TemplateImportError(['La definición debe ser un objeto con los datos de la plantilla'])
+    
+    for field, value in template_fields.items():
+        if value is not None and definition.get(field) in (None, ''):
+            definition[field] = value
+    return definition
+
+
+def _parse_csv(content):
+    """Sections in first-appearance order, questions in row order"""
+    reader = csv.DictReader(io.StringIO(content.lstrip('\ufeff')))
+    missing = {'section_code', 'section_name', 'code', 'text'} - set(reader.fieldnames or [])
+    if missing:
+        raise TemplateImportError([f'Faltan columnas en el CSV: {", ".join(sorted(missing))}'])
+    
+    sections = {}
+    for row in reader:
+        section = sections.setdefault(row['section_code'], {
+            'code': row['section_code'],
+            'name': row['section_name'],
+            'description': row.get('section_description') or '',
+            'questions': [],
+        })
+        question = {field: row[field] for field in CSV_COLUMNS[3:] if row.get(field) not in (None, '')}
+        if 'choices' in question:
+            question['choices'] = [choice.strip() for choice in question['choices'].split('|') if choice.strip()]
+        if 'is_required' in question:
+            question['is_required'] = question['is_required'].strip().lower() not in ('0', 'false', 'no')
+        section['questions'].append(question)
+    
+    return {'sections': list(sections.values())}
+
+
+def load_definition(path, file_type=None, **template_fields):
+    """Template definition from a file, typed by its extension unless given"""
+    file_type = file_type or file_type_of(path)
+    with open(path, encoding='utf-8') as handle:
+        return parse_definition(handle.read(), file_type, **template_fields)
+
+
+# ============ Validation ============
+
+def _text(errors, where, data, field, required=True, max_length=None):
+    value = data.get(field)
+    if value in (None, ''):
+        if required:
+            errors.append(f'{where}.{field}: requerido')
+        return ''
+    value = str(value).strip()
+    if max_length and len(value) > max_length:
+        errors.append(f'{where}.{field}: máximo {max_length} caracteres')
+    return value
+
+
+def _integer(errors, where, data, field, default, minimum=0):
+    value = data.get(field, default)
+    try:
+        number = int(value)
+        if number != float(value):
+            raise ValueError
+    except (TypeError, ValueError):
+        errors.append(f'{where}.{field}: debe ser un número entero')
+        return default
+    if number < minimum:
+        errors.append(f'{where}.{field}: debe ser al menos {minimum}')
+    return number
+
+
+def _boolean(errors, where, data, field, default):
+    value = data.get(field, default)
+    if not isinstance(value, bool):
+        errors.append(f'{where}.{field}: debe ser verdadero o falso')
+        return default
+    return value
+
+
+def validate_definition(definition):
+    """
+    Normalized {template, sections: [{..., questions: [...]}]} of a
+    definition, or TemplateImportError listing every problem found.
+    """
+    if not isinstance(definition, dict):
+        raise TemplateImportError(['La definición debe ser un objeto con los datos de la plantilla'])
+    
+    errors = []
+    template = {
+        'name': _text(errors, 'plantilla', definition, 'name', max_length=NAME_MAX_LENGTH),
+        'code': _text(errors, 'plantilla', definition, 'code', max_length=CODE_MAX_LENGTH),
+        'description': _text(errors, 'plantilla', definition, 'description', required=False),
+        'standard': _text(errors, 'plantilla', definition, 'standard', required=False, max_length=100) or 'N/A',
+        'version': _text(errors, 'plantilla', definition, 'version', required=False, max_length=50) or '1.0',
+        'is_active': _boolean(errors, 'plantilla', definition, 'is_active', True),
+        'is_public': _boolean(errors, 'plantilla', definition, 'is_public', True),
+    }
+    if template['code'] and AuditTemplate.objects.filter(code=template['code']).exists():
+        errors.append(f'plantilla.code: ya existe una plantilla {template["code"]}')
+    
+    sections_data = definition.get('sections')
+    if not isinstance(sections_data, list) or not sections_data:
+        errors.append('plantilla.sections: debe ser una lista no vacía')
+        sections_data = []
+    
+    sections = []
+    section_codes = set()
+    question_codes = set()
+    for i, section_data in enumerate(sections_data):
+        where = f'sections[{i}]'
+        if not isinstance(section_data, dict):
+            errors.append(f'{where}: debe ser un objeto')
+            continue
+        
+        section = {
+            'code': _text(errors, where, section_data, 'code', max_length=CODE_MAX_LENGTH),
+            'name': _text(errors, where, section_data, 'name', max_length=NAME_MAX_LENGTH),
+            'description': _text(errors, where, section_data, 'description', required=False) or None,
+            'order': _integer(errors, where, section_data, 'order', i + 1),
+            'questions': [],
+        }
+        if section['code'] in section_codes:
+            errors.append(f'{where}.code: {section["code"]} repetido')
+        section_codes.add(section['code'])
+        
+        questions_data = section_data.get('questions')
+        if not isinstance(questions_data, list) or not questions_data:
+            errors.append(f'{where}.questions: debe ser una lista no vacía')
+            questions_data = []
+        
+        for j, question_data in enumerate(questions_data):
+            question_where = f'{where}.questions[{j}]'
+            if not isinstance(question_data, dict):
+                errors.append(f'{question_where}: debe ser un objeto')
+                continue
+            
+            question = {
+                'code': _text(errors, question_where, question_data, 'code', max_length=CODE_MAX_LENGTH),
+                'text': _text(errors, question_where, question_data, 'text'),
+                'description': _text(errors, question_where, question_data, 'description', required=False) or None,
+                'question_type': question_data.get('question_type') or 'yes_no',
+                'choices': question_data.get('choices') or None,
+                'is_required': _boolean(errors, question_where, question_data, 'is_required', True),
+                'order': _integer(errors, question_where, question_data, 'order', j + 1),
+                'weight': _integer(errors, question_where, question_data, 'weight', 1, minimum=1),
+                'max_score': _integer(errors, question_where, question_data, 'max_score', 5, minimum=1),
+            }
+            if question['code'] in question_codes:
+                errors.append(f'{question_where}.code: {question["code"]} repetido')
+            question_codes.add(question['code'])
+            
+            if question['question_type'] not in QUESTION_TYPES:
+                errors.append(f'{question_where}.question_type: opciones {", ".join(QUESTION_TYPES)}')
+            elif question['question_type'] == 'multiple_choice':
+                choices = question['choices']
+                if not isinstance(choices, list) or not choices or not all(isinstance(c, str) and c for c in choices):
+                    errors.append(f'{question_where}.choices: lista de opciones requerida')
+            else:
+                question['choices'] = None
+            
+            section['questions'].append(question)
+        
+        sections.append(section)
+        if len(errors) >= MAX_ERRORS:
+            break
+    
+    if errors:
+        raise TemplateImportError(errors[:MAX_ERRORS])
+    return {'template': template, 'sections': sections}
+
+
+# ============ Import ============
+
+def import_template(definition, created_by=None):
+    """
+    Validate a definition and create its template, sections and questions
+    in one transaction. Returns {'template', 'sections', 'questions'}.
+    """
+    data = validate_definition(definition)
+    
+    with transaction.atomic():
+        template = AuditTemplate.objects.create(created_by=created_by, **data['template'])
+        
+        sections = QuestionSection.objects.bulk_create([
+            QuestionSection(
+                template=template,
+                code=section['code'],
+                name=section['name'],
+                description=section['description'],
+                order=section['order'],
+            )
+            for section in data['sections']
+        ], batch_size=BATCH_SIZE)
+        
+        questions = Question.objects.bulk_create([
+            Question(section=section, **question)
+            for section, section_data in zip(sections, data['sections'])
+            for question in section_data['questions']
+        ], batch_size=BATCH_SIZE)
+        
+        # bulk_create sends no post_save: recompile the scoring plan explicitly
+        touch_template(template.pk)
+    
+    return {'template': template, 'sections': len(sections), 'questions': len(questions)}
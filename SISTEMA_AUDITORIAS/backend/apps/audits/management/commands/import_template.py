@@ -0,0 +1,46 @@
+"""
+Management command to import an audit template definition.
+Usage: python manage.py import_template FILE [--type json|yaml|csv] [--name ... --code ...]
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.audits.importer import FILE_TYPES, TEMPLATE_TEXT_FIELDS, TemplateImportError, file_type_of, import_template, load_definition
+
+
+class Command(BaseCommand):
+    help = 'Import an audit template (sections and questions) from a JSON, YAML or CSV file'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Definition file')
+        parser.add_argument('--type', choices=FILE_TYPES, help='File type (default: from the extension)')
+        parser.add_argument('--name', help='Template name, when not in the file (CSV)')
+        parser.add_argument('--code', help='Template code, when not in the file (CSV)')
+        parser.add_argument('--standard', help='Standard, when not in the file')
+        parser.add_argument('--version-label', dest='version', help='Version of the standard, when not in the file')
+        parser.add_argument('--description', help='Description, when not in the file')
+        parser.add_argument('--private', action='store_true', help='Do not make the template public')
+    
+    def handle(self, *args, **options):
+        file_type = options['type'] or file_type_of(options['path'])
+        if file_type is None:
+            raise CommandError(f'No se reconoce el tipo de archivo, usa --type ({", ".join(FILE_TYPES)})')
+        
+        template_fields = {field: options[field] for field in TEMPLATE_TEXT_FIELDS}
+        
+        started = time.monotonic()
+        try:
+            definition = load_definition(options['path'], file_type, **template_fields)
+            if options['private']:
+                definition['is_public'] = False
+            result = import_template(definition)
+        except OSError as exc:
+            raise CommandError(f'No se pudo leer el archivo: {exc}')
+        except TemplateImportError as exc:
+            raise CommandError('Definición inválida:\n' + '\n'.join(f'  - {error}' for error in exc.errors))
+        
+        template = result['template']
+        self.stdout.write(self.style.SUCCESS(
+            f'Plantilla {template.code} importada: {result["sections"]} secciones, '
+            f'{result["questions"]} preguntas en {time.monotonic() - started:.2f}s.'
+        ))
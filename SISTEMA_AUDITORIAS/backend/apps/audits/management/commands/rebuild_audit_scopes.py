@@ -0,0 +1,24 @@
+"""
+Management command to backfill the scope_* ancestor columns of audits.
+Usage: python manage.py rebuild_audit_scopes [--organization ID]
+"""
+from django.core.management.base import BaseCommand
+from apps.audits.models import Audit
+from apps.audits.services import update_audit_scopes
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized ancestors (company, branch, department, team) of audits'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--organization', type=int, help='Only audits of this organization')
+    
+    def handle(self, *args, **options):
+        audits = Audit.objects.all()
+        if options['organization']:
+            audits = audits.filter(organization_id=options['organization'])
+        
+        # Scopes are read from the hierarchy closure table (see rebuild_org_closure)
+        total = update_audit_scopes(audits)
+        
+        self.stdout.write(self.style.SUCCESS(f'Ámbitos recalculados para {total} auditorías.'))
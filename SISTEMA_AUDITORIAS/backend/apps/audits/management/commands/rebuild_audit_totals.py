@@ -0,0 +1,27 @@
+"""
+Management command to rescore audits in bulk from their raw answers.
+Usage: python manage.py rebuild_audit_totals [--organization ID] [--template ID] [--chunk-size N]
+"""
+from django.core.management.base import BaseCommand
+from apps.audits.models import Audit
+from apps.audits.services import recompute_audit_scores
+
+
+class Command(BaseCommand):
+    help = 'Rescore audits and recompute their earned/possible points, answered count and section totals'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--organization', type=int, help='Only audits of this organization')
+        parser.add_argument('--template', type=int, help='Only audits of this template')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Audits scored per batch')
+    
+    def handle(self, *args, **options):
+        audits = Audit.objects.all()
+        if options['organization']:
+            audits = audits.filter(organization_id=options['organization'])
+        if options['template']:
+            audits = audits.filter(template_id=options['template'])
+        
+        total = recompute_audit_scores(audits, chunk_size=options['chunk_size'])
+        
+        self.stdout.write(self.style.SUCCESS(f'Totales recalculados para {total} auditorías.'))
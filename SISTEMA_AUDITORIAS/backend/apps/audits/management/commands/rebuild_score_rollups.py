@@ -0,0 +1,19 @@
+"""
+Management command to recompute the daily score rollup of completed audits.
+Usage: python manage.py rebuild_score_rollups [--organization ID ...] [--chunk-size N]
+"""
+from django.core.management.base import BaseCommand
+from apps.audits.rollups import rebuild_score_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily score rollup (trends) from the completed audits'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--organization', type=int, action='append', help='Only this organization (repeatable)')
+        parser.add_argument('--chunk-size', type=int, default=100, help='Organizations recomputed per transaction')
+    
+    def handle(self, *args, **options):
+        total = rebuild_score_rollups(options['organization'], chunk_size=options['chunk_size'])
+        
+        self.stdout.write(self.style.SUCCESS(f'Resumen diario recalculado: {total} filas.'))
@@ -0,0 +1,18 @@
+"""
+Management command to recompute the per-unit scorecards of completed audits.
+Usage: python manage.py rebuild_scorecards [--organization ID ...]
+"""
+from django.core.management.base import BaseCommand
+from apps.audits.scorecards import rebuild_scorecards
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-unit scorecards (dashboard, hierarchy tree) from the completed audits'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--organization', type=int, action='append', help='Only this organization (repeatable)')
+    
+    def handle(self, *args, **options):
+        total = rebuild_scorecards(options['organization'])
+        
+        self.stdout.write(self.style.SUCCESS(f'Indicadores por unidad recalculados: {total} filas.'))
@@ -0,0 +1,26 @@
+"""
+Management command to enqueue again the completion jobs that failed for good.
+Usage: python manage.py retry_completions [--organization ID ...]
+"""
+from django.core.management.base import BaseCommand
+from apps.audits.models import Audit
+from apps.audits.tasks import enqueue_completion, with_failed_completion
+
+
+class Command(BaseCommand):
+    help = 'Enqueue again the completion job of completed audits whose last one failed'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--organization', type=int, action='append', help='Only this organization (repeatable)')
+    
+    def handle(self, *args, **options):
+        audits = Audit.objects.all()
+        if options['organization']:
+            audits = audits.filter(organization_id__in=options['organization'])
+        
+        total = 0
+        for audit_id in with_failed_completion(audits).values_list('id', flat=True):
+            enqueue_completion(audit_id)
+            total += 1
+        
+        self.stdout.write(self.style.SUCCESS(f'Procesos de cierre reencolados: {total}.'))
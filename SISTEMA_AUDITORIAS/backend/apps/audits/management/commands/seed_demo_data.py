@@ -7,6 +7,9 @@ from django.contrib.auth import get_user_model
 from apps.authentication.models import Organization
 from apps.core.models import Company, Branch, Department, Team, SubTeam, UserAssignment
 from apps.audits.models import AuditTemplate, Audit, AuditAnswer, Question
+from apps.audits.services import refresh_section_scores
+from apps.audits.rollups import rebuild_score_rollups
+from apps.audits.scorecards import rebuild_scorecards
 from django.utils import timezone
 from datetime import timedelta
 import random
@@ -115,5 +118,10 @@ class Command(BaseCommand):
                             )
                     audit.answered_questions = audit.answers.count()
                     audit.save()
+            
+            # The audits are created completed, without the completion job
+            refresh_section_scores(Audit.objects.filter(organization=org).values_list('id', flat=True))
+            rebuild_score_rollups([org.id])
+            rebuild_scorecards([org.id])
         
         self.stdout.write(self.style.SUCCESS('\n🎉 ¡Datos demo creados!'))
@@ -0,0 +1,129 @@
+# Generated by Django 5.0.1 on 2026-10-18 07:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Audit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Nombre')),
+                ('code', models.CharField(max_length=50, unique=True, verbose_name='Código')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Descripción')),
+                ('status', models.CharField(choices=[('draft', 'Borrador'), ('in_progress', 'En Progreso'), ('completed', 'Completada'), ('reviewed', 'Revisada')], default='draft', max_length=20)),
+                ('total_questions', models.IntegerField(default=0)),
+                ('answered_questions', models.IntegerField(default=0)),
+                ('score', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Auditoría',
+                'verbose_name_plural': 'Auditorías',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AuditAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answer_boolean', models.BooleanField(blank=True, null=True)),
+                ('answer_scale', models.IntegerField(blank=True, null=True)),
+                ('answer_choice', models.CharField(blank=True, max_length=255, null=True)),
+                ('answer_text', models.TextField(blank=True, null=True)),
+                ('score', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('max_score', models.DecimalField(decimal_places=2, default=5, max_digits=5)),
+                ('comments', models.TextField(blank=True, null=True)),
+                ('answered_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Respuesta de Auditoría',
+                'verbose_name_plural': 'Respuestas de Auditoría',
+            },
+        ),
+        migrations.CreateModel(
+            name='AuditTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Nombre')),
+                ('code', models.CharField(max_length=50, unique=True, verbose_name='Código')),
+                ('description', models.TextField(verbose_name='Descripción')),
+                ('standard', models.CharField(max_length=100, verbose_name='Estándar')),
+                ('version', models.CharField(max_length=50, verbose_name='Versión')),
+                ('is_active', models.BooleanField(default=True)),
+                ('is_public', models.BooleanField(default=True, verbose_name='Público')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Plantilla de Auditoría',
+                'verbose_name_plural': 'Plantillas de Auditoría',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Question',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(verbose_name='Texto de la pregunta')),
+                ('code', models.CharField(max_length=50, verbose_name='Código')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Descripción/Ayuda')),
+                ('question_type', models.CharField(choices=[('yes_no', 'Sí/No'), ('scale', 'Escala (1-5)'), ('multiple_choice', 'Opción Múltiple'), ('text', 'Texto Libre')], default='yes_no', max_length=20)),
+                ('choices', models.JSONField(blank=True, null=True, verbose_name='Opciones')),
+                ('is_required', models.BooleanField(default=True)),
+                ('order', models.IntegerField(default=0)),
+                ('weight', models.IntegerField(default=1, verbose_name='Peso')),
+                ('max_score', models.IntegerField(default=5, verbose_name='Puntos máximos')),
+            ],
+            options={
+                'verbose_name': 'Pregunta',
+                'verbose_name_plural': 'Preguntas',
+                'ordering': ['order'],
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionSection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Nombre')),
+                ('code', models.CharField(max_length=50, verbose_name='Código')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Descripción')),
+                ('order', models.IntegerField(default=0, verbose_name='Orden')),
+            ],
+            options={
+                'verbose_name': 'Sección de Preguntas',
+                'verbose_name_plural': 'Secciones de Preguntas',
+                'ordering': ['order'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Recommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255, verbose_name='Título')),
+                ('description', models.TextField(verbose_name='Descripción')),
+                ('action_required', models.TextField(verbose_name='Acción requerida')),
+                ('priority', models.CharField(choices=[('critical', 'Crítico'), ('high', 'Alto'), ('medium', 'Medio'), ('low', 'Bajo')], default='medium', max_length=20)),
+                ('category', models.CharField(choices=[('technical', 'Técnico'), ('organizational', 'Organizacional'), ('legal', 'Jurídico'), ('documentation', 'Documentación')], default='organizational', max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('in_progress', 'En Progreso'), ('completed', 'Completado')], default='pending', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Recomendación',
+                'verbose_name_plural': 'Recomendaciones',
+                'ordering': ['priority', '-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 5.0.1 on 2026-10-18 07:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('audits', '0001_initial'),
+        ('authentication', '0001_initial'),
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audit',
+            name='assigned_to',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='audits_assigned', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='audit',
+            name='branch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='audits', to='core.branch'),
+        ),
+        migrations.AddField(
+            model_name='audit',
+            name='company',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='audits', to='core.company'),
+        ),
+        migrations.AddField(
+            model_name='audit',
+            name='created_by',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='audits_created', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='audit',
+            name='department',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='audits', to='core.department'),
+        ),
+        migrations.AddField(
+            model_name='audit',
+            name='organization',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audits', to='authentication.organization'),
+        ),
+        migrations.AddField(
+            model_name='audit',
+            name='subteam',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='audits', to='core.subteam'),
+        ),
+        migrations.AddField(
+            model_name='audit',
+            name='team',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='audits', to='core.team'),
+        ),
+        migrations.AddField(
+            model_name='auditanswer',
+            name='answered_by',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='answers_given', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='auditanswer',
+            name='audit',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='audits.audit'),
+        ),
+        migrations.AddField(
+            model_name='audittemplate',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='templates_created', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='audit',
+            name='template',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='audits', to='audits.audittemplate'),
+        ),
+        migrations.AddField(
+            model_name='auditanswer',
+            name='question',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audit_answers', to='audits.question'),
+        ),
+        migrations.AddField(
+            model_name='questionsection',
+            name='template',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sections', to='audits.audittemplate'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='section',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='questions', to='audits.questionsection'),
+        ),
+        migrations.AddField(
+            model_name='recommendation',
+            name='audit',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='audits.audit'),
+        ),
+        migrations.AddField(
+            model_name='recommendation',
+            name='question',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recommendations', to='audits.question'),
+        ),
+        migrations.AddField(
+            model_name='recommendation',
+            name='section',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recommendations', to='audits.questionsection'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='auditanswer',
+            unique_together={('audit', 'question')},
+        ),
+    ]
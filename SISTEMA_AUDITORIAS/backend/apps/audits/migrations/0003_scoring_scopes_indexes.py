@@ -0,0 +1,233 @@
+# Generated by Django 5.0.1 on 2026-10-18 07:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audits', '0002_initial'),
+        ('authentication', '0001_initial'),
+        ('core', '0002_jobs_closure_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditCodeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('last_value', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Secuencia de Códigos de Auditoría',
+                'verbose_name_plural': 'Secuencias de Códigos de Auditoría',
+            },
+        ),
+        migrations.CreateModel(
+            name='AuditScoreRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unit_type', models.CharField(choices=[('organization', 'Organización'), ('company', 'Empresa'), ('branch', 'Sucursal'), ('department', 'Departamento'), ('team', 'Equipo'), ('subteam', 'Sub-equipo')], max_length=20)),
+                ('unit_id', models.BigIntegerField()),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('score_min', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('score_max', models.DecimalField(decimal_places=2, max_digits=5)),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Puntajes',
+                'verbose_name_plural': 'Resúmenes Diarios de Puntajes',
+            },
+        ),
+        migrations.CreateModel(
+            name='AuditSectionScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('earned_points', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('possible_points', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('answered_questions', models.IntegerField(default=0)),
+                ('total_questions', models.IntegerField(default=0)),
+                ('max_points', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('percentage', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+            ],
+            options={
+                'verbose_name': 'Puntaje de Sección',
+                'verbose_name_plural': 'Puntajes de Secciones',
+            },
+        ),
+        migrations.CreateModel(
+            name='UnitScorecard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unit_type', models.CharField(choices=[('organization', 'Organización'), ('company', 'Empresa'), ('branch', 'Sucursal'), ('department', 'Departamento'), ('team', 'Equipo'), ('subteam', 'Sub-equipo')], max_length=20)),
+                ('unit_id', models.BigIntegerField()),
+                ('parent_type', models.CharField(blank=True, default='', max_length=20)),
+                ('parent_id', models.BigIntegerField(blank=True, null=True)),
+                ('audits_count', models.PositiveIntegerField(default=0)),
+                ('average_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('latest_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('latest_completed_at', models.DateTimeField(blank=True, null=True)),
+                ('subtree_audits_count', models.PositiveIntegerField(default=0)),
+                ('subtree_score', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('subtree_latest_score', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('subtree_latest_completed_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Tablero de Unidad',
+                'verbose_name_plural': 'Tableros de Unidades',
+            },
+        ),
+        migrations.AddField(
+            model_name='audit',
+            name='earned_points',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='audit',
+            name='possible_points',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='audit',
+            name='scope_branch',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='subtree_audits', to='core.branch'),
+        ),
+        migrations.AddField(
+            model_name='audit',
+            name='scope_company',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='subtree_audits', to='core.company'),
+        ),
+        migrations.AddField(
+            model_name='audit',
+            name='scope_department',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='subtree_audits', to='core.department'),
+        ),
+        migrations.AddField(
+            model_name='audit',
+            name='scope_team',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='subtree_audits', to='core.team'),
+        ),
+        migrations.AddField(
+            model_name='recommendation',
+            name='rule',
+            field=models.CharField(blank=True, choices=[('section_score', 'Puntaje de sección'), ('question_no', 'Control no implementado'), ('question_scale', 'Control deficiente'), ('manual', 'Manual')], default='', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='audit',
+            name='code',
+            field=models.CharField(max_length=50, verbose_name='Código'),
+        ),
+        migrations.AddIndex(
+            model_name='audit',
+            index=models.Index(fields=['organization', '-created_at', '-id'], name='audits_audi_organiz_1cfcd0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='audit',
+            index=models.Index(fields=['organization', 'status', 'completed_at'], name='audits_audi_organiz_b3a466_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='audit',
+            index=models.Index(fields=['organization', 'template', 'status', 'completed_at'], name='audits_audi_organiz_1e1355_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='audit',
+            index=models.Index(fields=['scope_company', 'status', 'completed_at'], name='audits_audi_scope_c_c7df8d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='audit',
+            index=models.Index(fields=['scope_branch', 'status', 'completed_at'], name='audits_audi_scope_b_312340_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='audit',
+            index=models.Index(fields=['scope_department', 'status', 'completed_at'], name='audits_audi_scope_d_05f4be_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='audit',
+            index=models.Index(fields=['scope_team', 'status', 'completed_at'], name='audits_audi_scope_t_bf6a69_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditanswer',
+            index=models.Index(fields=['question', 'audit'], name='audits_audi_questio_3d3c3a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recommendation',
+            index=models.Index(fields=['audit', 'priority', '-created_at', '-id'], name='audits_reco_audit_i_38a382_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='audit',
+            constraint=models.UniqueConstraint(fields=('organization', 'code'), name='unique_audit_code'),
+        ),
+        migrations.AddField(
+            model_name='auditcodesequence',
+            name='organization',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audit_code_sequences', to='authentication.organization'),
+        ),
+        migrations.AddField(
+            model_name='auditscorerollup',
+            name='organization',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audit_score_rollups', to='authentication.organization'),
+        ),
+        migrations.AddField(
+            model_name='auditscorerollup',
+            name='template',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_rollups', to='audits.audittemplate'),
+        ),
+        migrations.AddField(
+            model_name='auditsectionscore',
+            name='audit',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='section_scores', to='audits.audit'),
+        ),
+        migrations.AddField(
+            model_name='auditsectionscore',
+            name='section',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audit_scores', to='audits.questionsection'),
+        ),
+        migrations.AddField(
+            model_name='unitscorecard',
+            name='organization',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unit_scorecards', to='authentication.organization'),
+        ),
+        migrations.AddField(
+            model_name='unitscorecard',
+            name='template',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unit_scorecards', to='audits.audittemplate'),
+        ),
+        migrations.AddConstraint(
+            model_name='auditcodesequence',
+            constraint=models.UniqueConstraint(fields=('organization', 'year'), name='unique_audit_code_sequence'),
+        ),
+        migrations.AddIndex(
+            model_name='auditscorerollup',
+            index=models.Index(fields=['unit_type', 'unit_id', 'day'], name='audits_audi_unit_ty_d277e3_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='auditscorerollup',
+            constraint=models.UniqueConstraint(fields=('unit_type', 'unit_id', 'template', 'day'), name='unique_audit_score_rollup'),
+        ),
+        migrations.AddIndex(
+            model_name='auditsectionscore',
+            index=models.Index(fields=['section', 'audit'], name='audits_audi_section_f38d90_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='auditsectionscore',
+            constraint=models.UniqueConstraint(fields=('audit', 'section'), name='unique_audit_section_score'),
+        ),
+        migrations.AddIndex(
+            model_name='unitscorecard',
+            index=models.Index(fields=['organization', 'unit_type'], name='audits_unit_organiz_68dcab_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unitscorecard',
+            index=models.Index(fields=['parent_type', 'parent_id', 'template'], name='audits_unit_parent__01651c_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='unitscorecard',
+            constraint=models.UniqueConstraint(fields=('unit_type', 'unit_id', 'template'), name='unique_unit_scorecard'),
+        ),
+    ]
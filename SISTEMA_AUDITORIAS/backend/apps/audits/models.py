@@ -2,11 +2,15 @@
 Models for audits app.
 AuditTemplate, QuestionSection, Question, Audit, AuditAnswer, Recommendation
 """
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
 from django.conf import settings
+from django.utils import timezone
 from apps.authentication.models import Organization
 from apps.core.models import Company, Branch, Department, Team, SubTeam
+from apps.core.hierarchy import LEVELS, ancestor_ids, bulk_ancestor_ids
 import uuid
+from collections import defaultdict
 
 
 class AuditTemplate(models.Model):
@@ -92,9 +96,64 @@ class Question(models.Model):
         return f"{self.code} - {self.text[:50]}..."
 
 
+class AuditCodeSequence(models.Model):
+    """
+    Last audit number handed out per organization and year.
+    
+    Numbers are taken with a single UPDATE ... SET last_value = last_value + n,
+    which locks the row until the reserving transaction ends, so concurrent
+    creations never get the same code and no audit count is needed.
+    """
+    
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='audit_code_sequences')
+    year = models.PositiveIntegerField()
+    last_value = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'Secuencia de Códigos de Auditoría'
+        verbose_name_plural = 'Secuencias de Códigos de Auditoría'
+        constraints = [
+            models.UniqueConstraint(fields=['organization', 'year'], name='unique_audit_code_sequence'),
+        ]
+    
+    def __str__(self):
+        return f"{self.organization_id}/{self.year}: {self.last_value}"
+    
+    @classmethod
+    def reserve(cls, organization_id, year, count=1):
+        """First of `count` consecutive numbers reserved for an organization and year"""
+        with transaction.atomic():
+            sequence = cls.objects.filter(organization_id=organization_id, year=year)
+            if not sequence.update(last_value=F('last_value') + count):
+                start = cls._last_used(organization_id, year)
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(organization_id=organization_id, year=year, last_value=start + count)
+                    return start + 1
+                except IntegrityError:
+                    # Created meanwhile by a concurrent reservation
+                    sequence.update(last_value=F('last_value') + count)
+            
+            # The row stays locked by the UPDATE until the transaction ends
+            return sequence.values_list('last_value', flat=True).get() - count + 1
+    
+    @staticmethod
+    def _last_used(organization_id, year):
+        """Highest number among the existing codes of a year, for a new sequence"""
+        prefix = f'{Audit.CODE_PREFIX}-{year}-'
+        numbers = [0]
+        for code in Audit.objects.filter(organization_id=organization_id, code__startswith=prefix).values_list('code', flat=True):
+            suffix = code[len(prefix):]
+            if suffix.isdigit():
+                numbers.append(int(suffix))
+        return max(numbers)
+
+
 class Audit(models.Model):
     """Executed audit at a specific organizational level"""
     
+    CODE_PREFIX = 'AUD'
+    
     STATUS_CHOICES = [
         ('draft', 'Borrador'),
         ('in_progress', 'En Progreso'),
@@ -103,7 +162,7 @@ class Audit(models.Model):
     ]
     
     name = models.CharField(max_length=255, verbose_name='Nombre')
-    code = models.CharField(max_length=50, unique=True, verbose_name='Código')
+    code = models.CharField(max_length=50, verbose_name='Código')  # Unique per organization
     description = models.TextField(blank=True, null=True, verbose_name='Descripción')
     
     template = models.ForeignKey(AuditTemplate, on_delete=models.PROTECT, related_name='audits')
@@ -116,12 +175,25 @@ class Audit(models.Model):
     team = models.ForeignKey(Team, on_delete=models.CASCADE, null=True, blank=True, related_name='audits')
     subteam = models.ForeignKey(SubTeam, on_delete=models.CASCADE, null=True, blank=True, related_name='audits')
     
+    # Materialized ancestors of the audited unit (the unit itself included), filled on save
+    scope_company = models.ForeignKey(Company, on_delete=models.CASCADE, null=True, blank=True, editable=False, db_index=False, related_name='subtree_audits')
+    scope_branch = models.ForeignKey(Branch, on_delete=models.CASCADE, null=True, blank=True, editable=False, db_index=False, related_name='subtree_audits')
+    scope_department = models.ForeignKey(Department, on_delete=models.CASCADE, null=True, blank=True, editable=False, db_index=False, related_name='subtree_audits')
+    scope_team = models.ForeignKey(Team, on_delete=models.CASCADE, null=True, blank=True, editable=False, db_index=False, related_name='subtree_audits')
+    
+    # Levels with a scope_<level> column; subteams are leaves, so their own FK is enough
+    SCOPE_LEVELS = ['company', 'branch', 'department', 'team']
+    
     # Status and scores
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     total_questions = models.IntegerField(default=0)
     answered_questions = models.IntegerField(default=0)
     score = models.DecimalField(max_digits=5, decimal_places=2, default=0)
     
+    # Running totals of answered questions (kept in sync on every answer)
+    earned_points = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    possible_points = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    
     # Dates
     start_date = models.DateField(null=True, blank=True)
     end_date = models.DateField(null=True, blank=True)
@@ -138,17 +210,95 @@ class Audit(models.Model):
         verbose_name = 'Auditoría'
         verbose_name_plural = 'Auditorías'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['organization', '-created_at', '-id']),
+            models.Index(fields=['organization', 'status', 'completed_at']),
+            models.Index(fields=['organization', 'template', 'status', 'completed_at']),
+            models.Index(fields=['scope_company', 'status', 'completed_at']),
+            models.Index(fields=['scope_branch', 'status', 'completed_at']),
+            models.Index(fields=['scope_department', 'status', 'completed_at']),
+            models.Index(fields=['scope_team', 'status', 'completed_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['organization', 'code'], name='unique_audit_code'),
+        ]
     
     def __str__(self):
         return f"{self.code} - {self.name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the audited unit, so the scope is only refreshed when it changes
+        instance._loaded_unit = instance.get_unit_key(loaded_only=True)
+        return instance
+    
     def save(self, *args, **kwargs):
         if not self.code:
-            # Auto-generate code
-            year = self.created_at.year if self.created_at else 2025
-            count = Audit.objects.filter(organization=self.organization).count() + 1
-            self.code = f"AUD-{year}-{count:04d}"
+            year = self.code_year()
+            self.code = self.format_code(year, AuditCodeSequence.reserve(self.organization_id, year))
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(update_fields) & set(LEVELS):
+            if self.get_unit_key() != getattr(self, '_loaded_unit', None):
+                self.set_scope()
+                if update_fields is not None:
+                    kwargs['update_fields'] = [*update_fields, *(f'scope_{level}' for level in self.SCOPE_LEVELS)]
+        
         super().save(*args, **kwargs)
+        self._loaded_unit = self.get_unit_key()
+    
+    def code_year(self):
+        """Year numbering the code: the creation year, the current one for new audits"""
+        return timezone.localtime(self.created_at).year if self.created_at else timezone.localdate().year
+    
+    @classmethod
+    def format_code(cls, year, number):
+        return f"{cls.CODE_PREFIX}-{year}-{number:04d}"
+    
+    @classmethod
+    def prepare_bulk_create(cls, audits):
+        """
+        Fill in unsaved audits what save() would before a bulk_create: the
+        codes, reserving one range per organization and year, and the
+        scope_* columns, from one closure-table query for all the units.
+        """
+        pending = defaultdict(list)
+        for audit in audits:
+            if not audit.code:
+                pending[(audit.organization_id, audit.code_year())].append(audit)
+        
+        for (organization_id, year), group in pending.items():
+            first = AuditCodeSequence.reserve(organization_id, year, len(group))
+            for offset, audit in enumerate(group):
+                audit.code = cls.format_code(year, first + offset)
+        
+        ancestors = bulk_ancestor_ids({audit.get_unit_key() for audit in audits} - {None})
+        for audit in audits:
+            unit = audit.get_unit_key()
+            for level in cls.SCOPE_LEVELS:
+                setattr(audit, f'scope_{level}_id', ancestors[unit].get(level) if unit else None)
+            audit._loaded_unit = unit
+    
+    def get_unit_key(self, loaded_only=False):
+        """(level, id) of the audited unit, or None for organization-level audits"""
+        for level in reversed(LEVELS):
+            unit_id = self.__dict__.get(f'{level}_id') if loaded_only else getattr(self, f'{level}_id')
+            if unit_id:
+                return level, unit_id
+        return None
+    
+    @classmethod
+    def scope_lookup(cls, level):
+        """Field to filter by equality the audits in the subtree of a unit of `level`"""
+        return f'scope_{level}_id' if level in cls.SCOPE_LEVELS else f'{level}_id'
+    
+    def set_scope(self):
+        """Fill the scope_* columns from the hierarchy closure table"""
+        unit = self.get_unit_key()
+        ancestors = ancestor_ids(*unit) if unit else {}
+        for level in self.SCOPE_LEVELS:
+            setattr(self, f'scope_{level}_id', ancestors.get(level))
     
     def get_level_name(self):
         """Get the name of the level where audit is executed"""
@@ -210,6 +360,10 @@ class AuditAnswer(models.Model):
         verbose_name = 'Respuesta de Auditoría'
         verbose_name_plural = 'Respuestas de Auditoría'
         unique_together = ['audit', 'question']
+        indexes = [
+            # Per-question analytics over many audits
+            models.Index(fields=['question', 'audit']),
+        ]
     
     def __str__(self):
         return f"Respuesta a {self.question.code} en {self.audit.code}"
@@ -229,6 +383,39 @@ class AuditAnswer(models.Model):
         return "Sin respuesta"
 
 
+class AuditSectionScore(models.Model):
+    """
+    Running totals of an audit for one section of its template, kept in
+    sync with the answers like the audit totals (see services.py).
+    """
+    
+    audit = models.ForeignKey(Audit, on_delete=models.CASCADE, related_name='section_scores')
+    section = models.ForeignKey(QuestionSection, on_delete=models.CASCADE, related_name='audit_scores')
+    
+    # Points of the answered questions
+    earned_points = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    possible_points = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    answered_questions = models.IntegerField(default=0)
+    
+    # Whole section, from the scoring plan of the template
+    total_questions = models.IntegerField(default=0)
+    max_points = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0)  # earned_points over max_points
+    
+    class Meta:
+        verbose_name = 'Puntaje de Sección'
+        verbose_name_plural = 'Puntajes de Secciones'
+        constraints = [
+            models.UniqueConstraint(fields=['audit', 'section'], name='unique_audit_section_score'),
+        ]
+        indexes = [
+            models.Index(fields=['section', 'audit']),
+        ]
+    
+    def __str__(self):
+        return f"{self.audit_id}:{self.section_id} ({self.percentage}%)"
+
+
 class Recommendation(models.Model):
     """Automatic recommendation based on audit results"""
     
@@ -252,6 +439,14 @@ class Recommendation(models.Model):
         ('completed', 'Completado'),
     ]
     
+    # Rule that generated the recommendation ('' for rows generated before rules were stored)
+    RULE_CHOICES = [
+        ('section_score', 'Puntaje de sección'),
+        ('question_no', 'Control no implementado'),
+        ('question_scale', 'Control deficiente'),
+        ('manual', 'Manual'),
+    ]
+    
     audit = models.ForeignKey(Audit, on_delete=models.CASCADE, related_name='recommendations')
     section = models.ForeignKey(QuestionSection, on_delete=models.SET_NULL, null=True, blank=True, related_name='recommendations')
     question = models.ForeignKey(Question, on_delete=models.SET_NULL, null=True, blank=True, related_name='recommendations')
@@ -263,6 +458,7 @@ class Recommendation(models.Model):
     priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default='medium')
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='organizational')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    rule = models.CharField(max_length=50, choices=RULE_CHOICES, blank=True, default='')
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -271,6 +467,93 @@ class Recommendation(models.Model):
         verbose_name = 'Recomendación'
         verbose_name_plural = 'Recomendaciones'
         ordering = ['priority', '-created_at']
+        indexes = [
+            models.Index(fields=['audit', 'priority', '-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.priority}: {self.title}"
+
+
+class AuditScoreRollup(models.Model):
+    """
+    Scores of the audits completed on a day, per organizational unit and
+    template. Each completed audit counts for its own unit and every
+    ancestor, the organization included, so a unit trend reads its own rows.
+    """
+    
+    UNIT_TYPE_CHOICES = [
+        ('organization', 'Organización'),
+        ('company', 'Empresa'),
+        ('branch', 'Sucursal'),
+        ('department', 'Departamento'),
+        ('team', 'Equipo'),
+        ('subteam', 'Sub-equipo'),
+    ]
+    
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='audit_score_rollups')
+    unit_type = models.CharField(max_length=20, choices=UNIT_TYPE_CHOICES)
+    unit_id = models.BigIntegerField()
+    template = models.ForeignKey(AuditTemplate, on_delete=models.CASCADE, related_name='score_rollups')
+    day = models.DateField()
+    
+    count = models.PositiveIntegerField(default=0)
+    score_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    score_min = models.DecimalField(max_digits=5, decimal_places=2)
+    score_max = models.DecimalField(max_digits=5, decimal_places=2)
+    
+    class Meta:
+        verbose_name = 'Resumen Diario de Puntajes'
+        verbose_name_plural = 'Resúmenes Diarios de Puntajes'
+        constraints = [
+            models.UniqueConstraint(fields=['unit_type', 'unit_id', 'template', 'day'], name='unique_audit_score_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['unit_type', 'unit_id', 'day']),
+        ]
+    
+    def __str__(self):
+        return f"{self.unit_type}:{self.unit_id} {self.day} ({self.count})"
+
+
+class UnitScorecard(models.Model):
+    """
+    Completed-audit scores of an organizational unit for a template: its own
+    audits (run at the unit itself) and its whole subtree, rolled up from
+    the scorecards of its children (see apps/audits/scorecards.py).
+    """
+    
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='unit_scorecards')
+    unit_type = models.CharField(max_length=20, choices=AuditScoreRollup.UNIT_TYPE_CHOICES)
+    unit_id = models.BigIntegerField()
+    parent_type = models.CharField(max_length=20, blank=True, default='')  # '' for organizations
+    parent_id = models.BigIntegerField(null=True, blank=True)
+    template = models.ForeignKey(AuditTemplate, on_delete=models.CASCADE, related_name='unit_scorecards')
+    
+    # Audits run at the unit itself
+    audits_count = models.PositiveIntegerField(default=0)
+    average_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    latest_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    latest_completed_at = models.DateTimeField(null=True, blank=True)
+    
+    # The unit and everything below it, weighted by SCORECARD_WEIGHTING
+    subtree_audits_count = models.PositiveIntegerField(default=0)
+    subtree_score = models.DecimalField(max_digits=5, decimal_places=2)
+    subtree_latest_score = models.DecimalField(max_digits=5, decimal_places=2)
+    subtree_latest_completed_at = models.DateTimeField()
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Tablero de Unidad'
+        verbose_name_plural = 'Tableros de Unidades'
+        constraints = [
+            models.UniqueConstraint(fields=['unit_type', 'unit_id', 'template'], name='unique_unit_scorecard'),
+        ]
+        indexes = [
+            models.Index(fields=['organization', 'unit_type']),
+            models.Index(fields=['parent_type', 'parent_id', 'template']),
+        ]
+    
+    def __str__(self):
+        return f"{self.unit_type}:{self.unit_id} {self.template_id} ({self.subtree_score})"
@@ -0,0 +1,200 @@
+"""
+Daily score rollups of completed audits.
+
+AuditScoreRollup keeps the count, sum, min and max of the scores of the
+audits completed each day, per organizational unit and template. Completing
+or deleting an audit refreshes only the rows it counts for, and score
+trends are read from the rollup alone, never from Audit.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Q, F, Count, Sum, Min, Max
+from django.db.models.functions import TruncDate, TruncDay, TruncWeek, TruncMonth
+from django.utils import timezone
+
+from apps.authentication.models import Organization
+from apps.core.hierarchy import LEVELS
+
+from .models import Audit, AuditScoreRollup
+
+
+# Audits counted in the rollup (same as the statistics)
+ROLLUP_STATUS = 'completed'
+
+UNIT_TYPES = ['organization', *LEVELS]
+
+GRANULARITIES = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+ROLLUP_UPDATE_FIELDS = ['count', 'score_sum', 'score_min', 'score_max']
+
+# Window of trends requested without dates
+TREND_DEFAULT_DAYS = 365
+
+
+def unit_lookup(unit_type):
+    """Audit field with the unit of `unit_type` above (or at) the audited unit"""
+    if unit_type == 'organization':
+        return 'organization_id'
+    return Audit.scope_lookup(unit_type)
+
+
+def audit_units(audit):
+    """[(unit_type, unit_id)] an audit counts for: its unit and every ancestor"""
+    units = []
+    for unit_type in UNIT_TYPES:
+        unit_id = getattr(audit, unit_lookup(unit_type))
+        if unit_id:
+            units.append((unit_type, unit_id))
+    return units
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def refresh_audit_rollups(audit):
+    """
+    Recompute the rollup rows an audit counts for, from the audits of the
+    same organization, template and day: one conditional aggregate, then
+    an upsert. Idempotent, so a retried completion job counts nothing twice.
+    """
+    if not audit.completed_at:
+        return
+    
+    day = timezone.localdate(audit.completed_at)
+    start, end = _day_bounds(day)
+    units = audit_units(audit)
+    
+    aggregates = {}
+    for unit_type, unit_id in units:
+        match = Q(**{unit_lookup(unit_type): unit_id})
+        aggregates[f'{unit_type}_count'] = Count('id', filter=match)
+        aggregates[f'{unit_type}_sum'] = Sum('score', filter=match)
+        aggregates[f'{unit_type}_min'] = Min('score', filter=match)
+        aggregates[f'{unit_type}_max'] = Max('score', filter=match)
+    
+    totals = Audit.objects.filter(
+        organization_id=audit.organization_id,
+        template_id=audit.template_id,
+        status=ROLLUP_STATUS,
+        completed_at__gte=start,
+        completed_at__lt=end,
+    ).aggregate(**aggregates)
+    
+    rows = [
+        AuditScoreRollup(
+            organization_id=audit.organization_id,
+            unit_type=unit_type,
+            unit_id=unit_id,
+            template_id=audit.template_id,
+            day=day,
+            count=totals[f'{unit_type}_count'],
+            score_sum=totals[f'{unit_type}_sum'],
+            score_min=totals[f'{unit_type}_min'],
+            score_max=totals[f'{unit_type}_max'],
+        )
+        for unit_type, unit_id in units
+        if totals[f'{unit_type}_count']
+    ]
+    empty = [(unit_type, unit_id) for unit_type, unit_id in units if not totals[f'{unit_type}_count']]
+    
+    with transaction.atomic():
+        if rows:
+            AuditScoreRollup.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['unit_type', 'unit_id', 'template', 'day'],
+                update_fields=ROLLUP_UPDATE_FIELDS,
+            )
+        if empty:
+            units_q = Q(pk__in=[])
+            for unit_type, unit_id in empty:
+                units_q |= Q(unit_type=unit_type, unit_id=unit_id)
+            AuditScoreRollup.objects.filter(units_q, template_id=audit.template_id, day=day).delete()
+
+
+def rebuild_score_rollups(organization_ids=None, chunk_size=100, batch_size=1000):
+    """
+    Recompute the rollup of the given organizations (all by default), a
+    chunk of organizations at a time: one grouped query per unit level,
+    then the rows of the chunk are replaced. Returns the number of rows.
+    """
+    if organization_ids is None:
+        organization_ids = list(Organization.objects.order_by('pk').values_list('pk', flat=True))
+    
+    total = 0
+    for position in range(0, len(organization_ids), chunk_size):
+        chunk = organization_ids[position:position + chunk_size]
+        audits = Audit.objects.filter(
+            organization_id__in=chunk,
+            status=ROLLUP_STATUS,
+            completed_at__isnull=False,
+        ).annotate(day=TruncDate('completed_at'))
+        
+        rows = []
+        for unit_type in UNIT_TYPES:
+            lookup = unit_lookup(unit_type)
+            grouped = audits.filter(**{f'{lookup}__isnull': False}).values(
+                'organization_id', 'template_id', 'day', unit=F(lookup),
+            ).annotate(
+                total=Count('id'),
+                score_sum=Sum('score'),
+                score_min=Min('score'),
+                score_max=Max('score'),
+            ).order_by()
+            rows.extend(
+                AuditScoreRollup(
+                    organization_id=row['organization_id'],
+                    unit_type=unit_type,
+                    unit_id=row['unit'],
+                    template_id=row['template_id'],
+                    day=row['day'],
+                    count=row['total'],
+                    score_sum=row['score_sum'],
+                    score_min=row['score_min'],
+                    score_max=row['score_max'],
+                )
+                for row in grouped
+            )
+        
+        with transaction.atomic():
+            AuditScoreRollup.objects.filter(organization_id__in=chunk).delete()
+            AuditScoreRollup.objects.bulk_create(rows, batch_size=batch_size)
+        total += len(rows)
+    
+    return total
+
+
+def get_score_trend(unit_type, unit_id, granularity='month', template_id=None, date_from=None, date_to=None):
+    """Completed audits and their scores per day, week or month for a unit"""
+    rollups = AuditScoreRollup.objects.filter(unit_type=unit_type, unit_id=unit_id)
+    if template_id:
+        rollups = rollups.filter(template_id=template_id)
+    if date_from:
+        rollups = rollups.filter(day__gte=date_from)
+    if date_to:
+        rollups = rollups.filter(day__lte=date_to)
+    
+    rows = rollups.annotate(period=GRANULARITIES[granularity]('day')).values('period').annotate(
+        audits=Sum('count'),
+        total=Sum('score_sum'),
+        min_score=Min('score_min'),
+        max_score=Max('score_max'),
+    ).order_by('period')
+    
+    return [
+        {
+            'period': row['period'].isoformat(),
+            'audits': row['audits'],
+            'average_score': round(float(row['total']) / row['audits'], 2),
+            'min_score': float(row['min_score']),
+            'max_score': float(row['max_score']),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,284 @@
+"""
+Per-unit scorecards of completed audits.
+
+UnitScorecard holds, per organizational unit and template, the average
+and latest score of the audits run at the unit and of its whole subtree.
+Subtree values are rolled up from the scorecards of the children with the
+SCORECARD_WEIGHTING setting: 'audits' weights each part by its number of
+audits (a plain average over the subtree), 'equal' counts every child unit,
+and the unit's own audits, the same. Completing an audit only refreshes
+the chain of scorecards from its unit up to the organization.
+"""
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Count, Sum
+
+from apps.authentication.models import Organization
+from apps.core.cache import bump_cache_version
+from apps.core.hierarchy import TREE_CACHE, LEVELS, LEVEL_MODELS, PARENT_FIELDS, ancestor_ids, subtree_ids
+
+from .models import Audit, UnitScorecard
+from .services import to_points
+
+
+# Audits, score, latest score and latest completion of a unit's own audits or of a
+# subtree; scores are Decimals so that sums do not depend on the order of the parts
+Part = namedtuple('Part', ['count', 'score', 'latest_score', 'latest_at'])
+
+UNIT_TYPES = ['organization', *LEVELS]
+
+SCORECARD_UPDATE_FIELDS = [
+    'organization', 'parent_type', 'parent_id',
+    'audits_count', 'average_score', 'latest_score', 'latest_completed_at',
+    'subtree_audits_count', 'subtree_score', 'subtree_latest_score', 'subtree_latest_completed_at',
+    'updated_at',
+]
+
+
+def combine(parts, weighting=None):
+    """Subtree Part from the parts of a unit (its own audits, its children subtrees)"""
+    weighting = weighting or settings.SCORECARD_WEIGHTING
+    parts = [part for part in parts if part and part.count]
+    if not parts:
+        return None
+    
+    weights = [part.count if weighting == 'audits' else 1 for part in parts]
+    score = sum(weight * part.score for weight, part in zip(weights, parts)) / sum(weights)
+    latest = max(parts, key=lambda part: part.latest_at)
+    return Part(sum(part.count for part in parts), score, latest.latest_score, latest.latest_at)
+
+
+def _as_stored(part):
+    """Part rounded like the scorecard columns: parents combine the same values whether read from memory or from the table"""
+    return Part(part.count, to_points(part.score), to_points(part.latest_score), part.latest_at)
+
+
+def _average(total, count):
+    # Sums of 2-decimal scores are exact once rounded (SQLite sums them as floats)
+    return to_points(total) / count
+
+
+def _at_unit(unit_type, unit_id):
+    """Q for the audits run at a unit itself (the deepest level set wins, like Audit.get_unit_key)"""
+    start = UNIT_TYPES.index(unit_type)
+    condition = Q(**{f'{unit_type}_id': unit_id}) if unit_type != 'organization' else Q()
+    for deeper in UNIT_TYPES[start + 1:]:
+        condition &= Q(**{f'{deeper}_id__isnull': True})
+    return condition
+
+
+def _own_part(organization_id, unit_type, unit_id, template_id):
+    audits = Audit.objects.filter(
+        _at_unit(unit_type, unit_id),
+        organization_id=organization_id,
+        template_id=template_id,
+        status='completed',
+        completed_at__isnull=False,
+    )
+    totals = audits.aggregate(count=Count('id'), score=Sum('score'))
+    if not totals['count']:
+        return None
+    
+    latest_score, latest_at = audits.order_by('-completed_at', '-id').values_list('score', 'completed_at').first()
+    return _as_stored(Part(totals['count'], _average(totals['score'], totals['count']), latest_score, latest_at))
+
+
+def _stored_own(card):
+    if card is None or not card.audits_count:
+        return None
+    return Part(card.audits_count, card.average_score, card.latest_score, card.latest_completed_at)
+
+
+def _stored_subtree(card):
+    return Part(card.subtree_audits_count, card.subtree_score, card.subtree_latest_score, card.subtree_latest_completed_at)
+
+
+def _scorecard(organization_id, unit, parent, template_id, own, subtree):
+    return UnitScorecard(
+        organization_id=organization_id,
+        unit_type=unit[0],
+        unit_id=unit[1],
+        parent_type=parent[0],
+        parent_id=parent[1],
+        template_id=template_id,
+        audits_count=own.count if own else 0,
+        average_score=to_points(own.score) if own else None,
+        latest_score=to_points(own.latest_score) if own else None,
+        latest_completed_at=own.latest_at if own else None,
+        subtree_audits_count=subtree.count,
+        subtree_score=to_points(subtree.score),
+        subtree_latest_score=to_points(subtree.latest_score),
+        subtree_latest_completed_at=subtree.latest_at,
+    )
+
+
+def _lock_organization(organization_id):
+    """Serialize the scorecard writes of an organization: sibling units roll up into the same ancestors"""
+    Organization.objects.select_for_update().filter(pk=organization_id).values_list('pk', flat=True).first()
+
+
+def _units_q(units, prefix='unit'):
+    condition = Q(pk__in=[])
+    for unit_type, unit_id in units:
+        condition |= Q(**{f'{prefix}_type': unit_type, f'{prefix}_id': unit_id})
+    return condition
+
+
+# ============ Maintenance ============
+
+def refresh_audit_scorecards(audit):
+    """
+    Recompute the scorecards an audit counts for, for its template: the
+    own scores of its unit from the audits, then the subtree scores of the
+    unit and each ancestor from the stored scorecards of their children.
+    The same handful of queries whatever the depth of the unit. Refreshes
+    of one organization are serialized on its row, so concurrent
+    completions of sibling units never roll up each other's stale cards.
+    """
+    organization_id = audit.organization_id
+    template_id = audit.template_id
+    unit = audit.get_unit_key() or ('organization', organization_id)
+    
+    # The unit and its ancestors, bottom-up
+    ancestors = ancestor_ids(*unit) if unit[0] != 'organization' else {}
+    ancestors['organization'] = organization_id
+    chain = [(unit_type, ancestors[unit_type]) for unit_type in reversed(UNIT_TYPES[:UNIT_TYPES.index(unit[0]) + 1])]
+    
+    with transaction.atomic():
+        _lock_organization(organization_id)
+        
+        own = _own_part(organization_id, *unit, template_id)
+        stored = list(UnitScorecard.objects.filter(_units_q(chain) | _units_q(chain, 'parent'), template_id=template_id))
+        cards = {(card.unit_type, card.unit_id): card for card in stored}
+        
+        rows = []
+        empty = []
+        below = None  # (unit, subtree Part) of the previous link of the chain
+        for position, key in enumerate(chain):
+            children = [
+                _stored_subtree(card) for card in stored
+                if (card.parent_type, card.parent_id) == key and (below is None or (card.unit_type, card.unit_id) != below[0])
+            ]
+            if below is not None:
+                children.append(below[1])
+            
+            own_part = own if position == 0 else _stored_own(cards.get(key))
+            subtree = combine([own_part, *children])
+            parent = chain[position + 1] if position + 1 < len(chain) else ('', None)
+            if subtree:
+                rows.append(_scorecard(organization_id, key, parent, template_id, own_part, subtree))
+            else:
+                empty.append(key)
+            below = (key, _as_stored(subtree) if subtree else None)
+        
+        if rows:
+            UnitScorecard.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['unit_type', 'unit_id', 'template'],
+                update_fields=SCORECARD_UPDATE_FIELDS,
+            )
+        if empty:
+            UnitScorecard.objects.filter(_units_q(empty), template_id=template_id).delete()
+    
+    # The hierarchy tree shows the scorecards
+    bump_cache_version(TREE_CACHE, organization_id)
+
+
+def rebuild_scorecards(organization_ids=None, batch_size=1000):
+    """
+    Recompute the scorecards of the given organizations (all by default)
+    from their completed audits, one organization per transaction.
+    Returns the number of scorecards.
+    """
+    if organization_ids is None:
+        organization_ids = list(Organization.objects.order_by('pk').values_list('pk', flat=True))
+    
+    total = 0
+    for organization_id in organization_ids:
+        with transaction.atomic():
+            _lock_organization(organization_id)
+            rows = _organization_scorecards(organization_id)
+            UnitScorecard.objects.filter(organization_id=organization_id).delete()
+            UnitScorecard.objects.bulk_create(rows, batch_size=batch_size)
+        bump_cache_version(TREE_CACHE, organization_id)
+        total += len(rows)
+    
+    return total
+
+
+def _organization_scorecards(organization_id):
+    # Own parts per (unit, template), from one pass over the completed audits
+    own = {}
+    audits = Audit.objects.filter(organization_id=organization_id, status='completed', completed_at__isnull=False)
+    for *unit_ids, template_id, audit_id, score, completed_at in audits.values_list(
+        *[f'{level}_id' for level in LEVELS], 'template_id', 'id', 'score', 'completed_at',
+    ).iterator():
+        unit = ('organization', organization_id)
+        for level, unit_id in zip(LEVELS, unit_ids):
+            if unit_id:
+                unit = (level, unit_id)
+        
+        count, total, latest_score, latest_key = own.get((unit, template_id), (0, 0, None, None))
+        if latest_key is None or (completed_at, audit_id) > latest_key:
+            latest_score, latest_key = score, (completed_at, audit_id)
+        own[(unit, template_id)] = (count + 1, total + score, latest_score, latest_key)
+    
+    parents = {}
+    for level in LEVELS:
+        parent_type, parent_field = PARENT_FIELDS[level]
+        units = LEVEL_MODELS[level].objects.filter(id__in=subtree_ids('organization', organization_id, level))
+        for unit_id, parent_id in units.values_list('id', parent_field):
+            parents[(level, unit_id)] = (parent_type, parent_id)
+    parents[('organization', organization_id)] = ('', None)
+    
+    own_parts = {
+        key: _as_stored(Part(count, _average(total, count), latest_score, latest_key[0]))
+        for key, (count, total, latest_score, latest_key) in own.items()
+    }
+    
+    # Bottom-up: each level hands its subtree parts to the level above
+    children = defaultdict(list)
+    rows = []
+    for unit_type in reversed(UNIT_TYPES):
+        keys = {key for key in [*own_parts, *children] if key[0][0] == unit_type}
+        for unit, template_id in keys:
+            if unit not in parents:
+                continue
+            own_part = own_parts.get((unit, template_id))
+            subtree = combine([own_part, *children[(unit, template_id)]])
+            if subtree:
+                rows.append(_scorecard(organization_id, unit, parents[unit], template_id, own_part, subtree))
+                children[(parents[unit], template_id)].append(_as_stored(subtree))
+    
+    return rows
+
+
+# ============ Reading ============
+
+def unit_scores(organization_id, unit_type=None):
+    """
+    {(unit_type, unit_id): {audits_count, average_score, latest_score}} of
+    the subtrees of the units of an organization, over all templates.
+    """
+    scorecards = UnitScorecard.objects.filter(organization_id=organization_id)
+    if unit_type:
+        scorecards = scorecards.filter(unit_type=unit_type)
+    
+    parts = defaultdict(list)
+    for row in scorecards.values_list(
+        'unit_type', 'unit_id', 'subtree_audits_count', 'subtree_score', 'subtree_latest_score', 'subtree_latest_completed_at',
+    ):
+        parts[(row[0], row[1])].append(Part(*row[2:]))
+    
+    scores = {}
+    for key, unit_parts in parts.items():
+        subtree = combine(unit_parts)
+        scores[key] = {
+            'audits_count': subtree.count,
+            'average_score': float(to_points(subtree.score)),
+            'latest_score': float(subtree.latest_score),
+        }
+    return scores
@@ -0,0 +1,288 @@
+"""
+Compiled scoring plans for audit templates.
+
+A plan holds everything needed to score answers of a template (question
+ids, section of each question, max points, question type and choice
+scores) in compact immutable arrays, so scoring never has to load
+Question rows. Plans are cached per process, keyed by template id and
+the template `updated_at` stamp, which is bumped whenever a section or a
+question of the template changes (see signals.py).
+
+Many audits can be scored at once with score_answer_rows, vectorized with
+NumPy when it is installed.
+"""
+from functools import lru_cache
+from django.utils import timezone
+from .models import AuditTemplate, QuestionSection, Question
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, bulk scoring falls back to pure Python
+    np = None
+
+
+PLAN_CACHE_SIZE = 64
+
+# Question type codes used in plans
+YES_NO = 0
+SCALE = 1
+MULTIPLE_CHOICE = 2
+TEXT = 3
+
+TYPE_CODES = {
+    'yes_no': YES_NO,
+    'scale': SCALE,
+    'multiple_choice': MULTIPLE_CHOICE,
+    'text': TEXT,
+}
+
+SCALE_MAX = 5
+
+
+def _choice_scores(choices):
+    """
+    Map each choice to its score factor: first option full, second half.
+    Answers are strings, so other JSON values (possibly unhashable, the
+    admin does not validate them) are skipped.
+    """
+    if not isinstance(choices, list):
+        return None
+    
+    scores = {}
+    for choice, factor in zip(choices, (1.0, 0.5)):
+        if isinstance(choice, str):
+            scores.setdefault(choice, factor)
+    return scores or None
+
+
+class ScoringPlan:
+    """Immutable scoring data of one template, ordered by section and question order"""
+    
+    __slots__ = (
+        'template_id', 'stamp',
+        'section_ids', 'section_names', 'section_codes',
+        'question_ids', 'question_section', 'max_points', 'type_codes', 'choice_scores',
+        'section_max_points', 'section_question_counts', 'index',
+    )
+    
+    def __init__(self, template_id, stamp, sections, questions):
+        section_position = {section['id']: i for i, section in enumerate(sections)}
+        
+        self.template_id = template_id
+        self.stamp = stamp
+        self.section_ids = tuple(section['id'] for section in sections)
+        self.section_names = tuple(section['name'] for section in sections)
+        self.section_codes = tuple(section['code'] for section in sections)
+        
+        self.question_ids = tuple(q['id'] for q in questions)
+        self.question_section = tuple(section_position[q['section_id']] for q in questions)
+        self.max_points = tuple(q['max_score'] * q['weight'] for q in questions)
+        self.type_codes = tuple(TYPE_CODES.get(q['question_type'], -1) for q in questions)
+        self.choice_scores = tuple(
+            _choice_scores(q['choices']) if q['question_type'] == 'multiple_choice' else None
+            for q in questions
+        )
+        self.index = {question_id: i for i, question_id in enumerate(self.question_ids)}
+        
+        section_max_points = [0] * len(sections)
+        section_question_counts = [0] * len(sections)
+        for position, max_points in zip(self.question_section, self.max_points):
+            section_max_points[position] += max_points
+            section_question_counts[position] += 1
+        self.section_max_points = tuple(section_max_points)
+        self.section_question_counts = tuple(section_question_counts)
+    
+    def __contains__(self, question_id):
+        return question_id in self.index
+    
+    def __len__(self):
+        return len(self.question_ids)
+    
+    def max_points_for(self, question_id):
+        return self.max_points[self.index[question_id]]
+    
+    def section_of(self, question_id):
+        """Position (in section_ids) of the section of a question"""
+        return self.question_section[self.index[question_id]]
+    
+    def score(self, question_id, answer_boolean, answer_scale, answer_choice, answer_text):
+        """Points earned by an answer of a question"""
+        i = self.index[question_id]
+        max_points = self.max_points[i]
+        type_code = self.type_codes[i]
+        
+        if type_code == YES_NO:
+            return max_points if answer_boolean is True else 0
+        
+        elif type_code == SCALE:
+            return (answer_scale / SCALE_MAX) * max_points if answer_scale else 0
+        
+        elif type_code == MULTIPLE_CHOICE:
+            # For multiple choice, first option is typically the best
+            choice_scores = self.choice_scores[i]
+            if answer_choice and choice_scores:
+                return max_points * choice_scores.get(answer_choice, 0)
+            return 0
+        
+        elif type_code == TEXT:
+            # Text questions get full score if answered
+            return max_points if answer_text else 0
+        
+        return 0
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def _compile_plan(template_id, stamp):
+    sections = list(
+        QuestionSection.objects.filter(template_id=template_id)
+        .order_by('order', 'id')
+        .values('id', 'name', 'code')
+    )
+    questions = list(
+        Question.objects.filter(section__template_id=template_id)
+        .order_by('section__order', 'section_id', 'order', 'id')
+        .values('id', 'section_id', 'question_type', 'choices', 'weight', 'max_score')
+    )
+    return ScoringPlan(template_id, stamp, sections, questions)
+
+
+def get_scoring_plan(template):
+    """Get the compiled scoring plan of a template (instance or id)"""
+    if not isinstance(template, AuditTemplate):
+        template = AuditTemplate.objects.only('id', 'updated_at').get(pk=template)
+    return _compile_plan(template.pk, template.updated_at)
+
+
+def touch_template(template_id):
+    """Bump the template stamp so cached scoring plans are recompiled"""
+    AuditTemplate.objects.filter(pk=template_id).update(updated_at=timezone.now())
+
+
+# ============ Bulk scoring ============
+
+# Column layout of the answer rows scored in bulk (extra trailing columns are ignored)
+ANSWER_ROW_FIELDS = ['audit_id', 'question_id', 'answer_boolean', 'answer_scale', 'answer_choice', 'answer_text']
+
+
+class BulkScores:
+    """
+    Earned points, possible points and answered counts of many audits of
+    one template, as audit x section matrices (NumPy arrays when NumPy is
+    installed, lists of lists otherwise). `row_scores` holds the points of
+    each scored answer row, in input order.
+    """
+    
+    def __init__(self, plan, audit_ids, earned, possible, answered, row_scores):
+        self.plan = plan
+        self.audit_ids = list(audit_ids)
+        self.position = {audit_id: i for i, audit_id in enumerate(self.audit_ids)}
+        self.earned = earned
+        self.possible = possible
+        self.answered = answered
+        self.row_scores = row_scores
+    
+    def totals(self, audit_id):
+        """(earned, possible, answered) of an audit"""
+        i = self.position[audit_id]
+        return float(sum(self.earned[i])), float(sum(self.possible[i])), int(sum(self.answered[i]))
+    
+    def audit_score(self, audit_id):
+        earned, possible, _ = self.totals(audit_id)
+        return round((earned / possible) * 100, 2) if possible > 0 else 0
+
+
+def _score_rows_python(plan, rows, audit_ids):
+    n_sections = len(plan.section_ids)
+    position = {audit_id: i for i, audit_id in enumerate(audit_ids)}
+    earned = [[0] * n_sections for _ in audit_ids]
+    possible = [[0] * n_sections for _ in audit_ids]
+    answered = [[0] * n_sections for _ in audit_ids]
+    row_scores = []
+    
+    for audit_id, question_id, *values in rows:
+        i = position.get(audit_id)
+        if i is None or question_id not in plan:
+            row_scores.append(0)
+            continue
+        points = plan.score(question_id, *values[:4])
+        section = plan.section_of(question_id)
+        earned[i][section] += points
+        possible[i][section] += plan.max_points_for(question_id)
+        answered[i][section] += 1
+        row_scores.append(points)
+    
+    return BulkScores(plan, audit_ids, earned, possible, answered, row_scores)
+
+
+def _score_rows_numpy(plan, rows, audit_ids):
+    n_sections = len(plan.section_ids)
+    shape = (len(audit_ids), n_sections)
+    
+    if not rows or not len(plan) or not audit_ids:
+        zeros = np.zeros(shape)
+        return BulkScores(plan, audit_ids, zeros, zeros.copy(), zeros.astype(np.int64), np.zeros(len(rows)))
+    
+    n_rows = len(rows)
+    audit_col, question_col, boolean_col, scale_col, choice_col, text_col = list(zip(*rows))[:6]
+    
+    # Map question ids to plan positions and audit ids to matrix rows
+    plan_ids = np.asarray(plan.question_ids, dtype=np.int64)
+    plan_order = np.argsort(plan_ids)
+    question_ids = np.fromiter(question_col, dtype=np.int64, count=n_rows)
+    found = np.minimum(np.searchsorted(plan_ids[plan_order], question_ids), len(plan_ids) - 1)
+    question_pos = plan_order[found]
+    known = plan_ids[question_pos] == question_ids
+    
+    axis_ids = np.asarray(audit_ids, dtype=np.int64)
+    axis_order = np.argsort(axis_ids)
+    row_audits = np.fromiter(audit_col, dtype=np.int64, count=n_rows)
+    found = np.minimum(np.searchsorted(axis_ids[axis_order], row_audits), len(axis_ids) - 1)
+    audit_pos = axis_order[found]
+    known &= axis_ids[audit_pos] == row_audits
+    
+    type_codes = np.asarray(plan.type_codes, dtype=np.int8)[question_pos]
+    max_points = np.asarray(plan.max_points, dtype=np.float64)[question_pos]
+    sections = np.asarray(plan.question_section, dtype=np.int64)[question_pos]
+    
+    # Answer value columns
+    is_yes = np.fromiter((value is True for value in boolean_col), dtype=bool, count=n_rows)
+    scale = np.fromiter((value or 0 for value in scale_col), dtype=np.float64, count=n_rows)
+    has_text = np.fromiter((bool(value) for value in text_col), dtype=bool, count=n_rows)
+    choice_factor = np.zeros(n_rows)
+    for i in np.flatnonzero(known & (type_codes == MULTIPLE_CHOICE)):
+        choice_scores = plan.choice_scores[question_pos[i]]
+        if choice_scores and choice_col[i]:
+            choice_factor[i] = choice_scores.get(choice_col[i], 0)
+    
+    earned = np.select(
+        [type_codes == YES_NO, type_codes == SCALE, type_codes == MULTIPLE_CHOICE, type_codes == TEXT],
+        [is_yes * max_points, scale / SCALE_MAX * max_points, choice_factor * max_points, has_text * max_points],
+        0,
+    )
+    earned[~known] = 0
+    
+    # Accumulate rows into the audit x section matrices
+    cells = shape[0] * shape[1]
+    flat = (audit_pos * n_sections + sections)[known]
+    
+    return BulkScores(
+        plan,
+        audit_ids,
+        np.bincount(flat, weights=earned[known], minlength=cells).reshape(shape),
+        np.bincount(flat, weights=max_points[known], minlength=cells).reshape(shape),
+        np.bincount(flat, minlength=cells).reshape(shape),
+        earned,
+    )
+
+
+def score_answer_rows(plan, rows, audit_ids):
+    """
+    Score answer rows (ANSWER_ROW_FIELDS layout) of the given audits in bulk.
+    
+    Uses vectorized NumPy operations when available and falls back to the
+    pure Python scorer otherwise; both return the same BulkScores.
+    """
+    rows = rows if isinstance(rows, list) else list(rows)
+    if np is None:
+        return _score_rows_python(plan, rows, audit_ids)
+    return _score_rows_numpy(plan, rows, audit_ids)
@@ -4,6 +4,10 @@ Serializers for audits app.
 from rest_framework import serializers
 from django.db.models import Avg, Sum
 from .models import AuditTemplate, QuestionSection, Question, Audit, AuditAnswer, Recommendation
+from apps.core.serializers import ExpandableFieldsMixin
+
+
+MAX_BATCH_ANSWERS = 1000
 
 
 # ============ Template Serializers ============
@@ -80,6 +84,21 @@ class SubmitAnswerSerializer(serializers.Serializer):
     comments = serializers.CharField(required=False, allow_null=True, allow_blank=True)
 
 
+class SubmitAnswersBatchSerializer(serializers.Serializer):
+    """Serializer for submitting many answers at once"""
+    answers = SubmitAnswerSerializer(many=True, allow_empty=False)
+    
+    def validate_answers(self, value):
+        if len(value) > MAX_BATCH_ANSWERS:
+            raise serializers.ValidationError(f'Máximo {MAX_BATCH_ANSWERS} respuestas por lote')
+        
+        question_ids = [item['question_id'] for item in value]
+        if len(question_ids) != len(set(question_ids)):
+            raise serializers.ValidationError('Hay preguntas repetidas en el lote')
+        
+        return value
+
+
 class RecommendationSerializer(serializers.ModelSerializer):
     """Serializer for Recommendation"""
     section_name = serializers.CharField(source='section.name', read_only=True)
@@ -88,13 +107,18 @@ class RecommendationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recommendation
         fields = ['id', 'audit', 'section', 'section_name', 'question', 'question_code',
-                  'title', 'description', 'action_required', 'priority', 'category', 'status',
+                  'title', 'description', 'action_required', 'priority', 'category', 'status', 'rule',
                   'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'rule', 'created_at']
 
 
-class AuditSerializer(serializers.ModelSerializer):
-    """Full serializer for Audit"""
+class AuditSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
+    """
+    Full serializer for Audit.
+    
+    Answers and recommendations are only embedded on `?expand=answers,recommendations`.
+    """
+    expandable_fields = ('answers', 'recommendations')
     template_name = serializers.CharField(source='template.name', read_only=True)
     level_name = serializers.SerializerMethodField()
     level_type = serializers.SerializerMethodField()
@@ -1,109 +1,355 @@
 """
 Business logic services for audits app.
 """
-from django.db.models import Q, Avg, Sum, Count
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Q, F, Avg, Sum, Count, Min, Max, Case, When, Value, FloatField, DecimalField, OuterRef, Subquery
+from django.db.models.functions import Cast, Round
+from django.db.models.lookups import GreaterThan
 from django.utils import timezone
-from .models import Audit, AuditAnswer, Question, QuestionSection, Recommendation
+from .models import Audit, AuditAnswer, AuditSectionScore, Question, Recommendation
+from .scoring import get_scoring_plan, score_answer_rows, ANSWER_ROW_FIELDS, SCALE
+from apps.core.cache import bump_cache_version
+from apps.core.context import get_tenant_context
+from apps.core.hierarchy import LEVELS, subtree_filter
+from apps.core.models import OrgUnitClosure
 
 
-def calculate_answer_score(answer):
+# Cache namespace of audit statistics, bumped whenever audits or user assignments change
+STATISTICS_CACHE = 'audit_statistics'
+
+AUDIT_TOTAL_FIELDS = ['earned_points', 'possible_points', 'answered_questions', 'score']
+
+ANSWER_VALUE_FIELDS = ['question_id', 'answer_boolean', 'answer_scale', 'answer_choice', 'answer_text']
+
+# Answers that trigger a question recommendation (see _question_recommendation)
+FAILED_ANSWER = Q(answer_boolean=False) | Q(answer_scale__lte=2)
+
+BATCH_ANSWER_UPDATE_FIELDS = [
+    'answer_boolean', 'answer_scale', 'answer_choice', 'answer_text',
+    'score', 'max_score', 'comments', 'answered_by', 'answered_at',
+]
+
+SECTION_SCORE_UPDATE_FIELDS = [
+    'earned_points', 'possible_points', 'answered_questions', 'total_questions', 'max_points', 'percentage',
+]
+
+
+def to_points(value):
+    """Normalize a score to the 2-decimal precision stored in the database"""
+    return Decimal(str(value)).quantize(Decimal('0.01'))
+
+
+def calculate_answer_score(answer, plan=None):
     """Calculate score for a single answer"""
-    question = answer.question
-    max_score = question.max_score * question.weight
-    
-    if question.question_type == 'yes_no':
-        if answer.answer_boolean is True:
-            return max_score
-        return 0
-    
-    elif question.question_type == 'scale':
-        if answer.answer_scale:
-            return (answer.answer_scale / 5) * max_score
-        return 0
-    
-    elif question.question_type == 'multiple_choice':
-        # For multiple choice, first option is typically the best
-        if answer.answer_choice and question.choices:
-            try:
-                choices = question.choices if isinstance(question.choices, list) else []
-                if choices and answer.answer_choice == choices[0]:
-                    return max_score
-                elif len(choices) > 1 and answer.answer_choice == choices[1]:
-                    return max_score * 0.5
-            except:
-                pass
-        return 0
-    
-    elif question.question_type == 'text':
-        # Text questions get full score if answered
-        if answer.answer_text:
-            return max_score
-        return 0
-    
-    return 0
+    if plan is None:
+        plan = get_scoring_plan(answer.audit.template_id)
+    
+    return plan.score(
+        answer.question_id,
+        answer.answer_boolean,
+        answer.answer_scale,
+        answer.answer_choice,
+        answer.answer_text,
+    )
+
+
+def _score_answers(plan, answers):
+    """Earned and possible points per section position for (question_id, *answer values) rows"""
+    earned = [0] * len(plan.section_ids)
+    possible = [0] * len(plan.section_ids)
+    answered = [0] * len(plan.section_ids)
+    
+    for question_id, *values in answers:
+        if question_id not in plan:
+            continue
+        position = plan.section_of(question_id)
+        earned[position] += plan.score(question_id, *values)
+        possible[position] += plan.max_points_for(question_id)
+        answered[position] += 1
+    
+    return earned, possible, answered
 
 
 def calculate_audit_score(audit):
     """Calculate overall audit score"""
-    answers = audit.answers.all()
+    plan = get_scoring_plan(audit.template_id)
+    earned, possible, _ = _score_answers(plan, audit.answers.values_list(*ANSWER_VALUE_FIELDS))
     
-    if not answers:
+    total_possible = sum(possible)
+    if total_possible == 0:
         return 0
     
-    total_possible = 0
-    total_earned = 0
+    return round((sum(earned) / total_possible) * 100, 2)
+
+
+def _score_expression(earned, possible):
+    """SQL expression for the percentage score out of earned/possible points"""
+    return Case(
+        When(GreaterThan(possible, 0), then=Round(Cast(earned, FloatField()) * 100 / possible, 2)),
+        default=Value(0),
+        output_field=DecimalField(max_digits=5, decimal_places=2),
+    )
+
+
+def apply_answer_delta(audit, previous, answer, created):
+    """
+    Apply the change of a single answer to the audit running totals.
+    
+    `previous` is the (score, max_score) pair stored before the answer was
+    written, or None for a new answer. Only the delta is applied, with atomic
+    F() updates, so the cost does not grow with the number of answers. The
+    totals of the answer's section are updated the same way.
+    """
+    if previous is None and not created:
+        # The answer was inserted concurrently, we don't know what it replaced
+        return refresh_audit_totals(audit)
+    
+    old_score, old_max = previous or (Decimal('0'), Decimal('0'))
+    earned = F('earned_points') + (to_points(answer.score) - old_score)
+    possible = F('possible_points') + (to_points(answer.max_score) - old_max)
+    
+    Audit.objects.filter(pk=audit.pk).update(
+        earned_points=earned,
+        possible_points=possible,
+        answered_questions=F('answered_questions') + (1 if created else 0),
+        score=_score_expression(earned, possible),
+        updated_at=timezone.now(),
+    )
+    audit.refresh_from_db(fields=AUDIT_TOTAL_FIELDS)
+    
+    plan = get_scoring_plan(audit.template_id)
+    section_earned = F('earned_points') + (to_points(answer.score) - old_score)
+    updated = AuditSectionScore.objects.filter(
+        audit=audit, section_id=plan.section_ids[plan.section_of(answer.question_id)],
+    ).update(
+        earned_points=section_earned,
+        possible_points=F('possible_points') + (to_points(answer.max_score) - old_max),
+        answered_questions=F('answered_questions') + (1 if created else 0),
+        percentage=_score_expression(section_earned, F('max_points')),
+    )
+    if not updated:
+        # First answer of the audit: no section rows yet
+        refresh_section_scores([audit.pk])
+
+
+def refresh_audit_totals(audit):
+    """Recompute the audit running totals, and its section totals, from its stored answers"""
+    totals = audit.answers.aggregate(
+        earned=Sum('score'),
+        possible=Sum('max_score'),
+        answered=Count('id'),
+    )
+    earned = totals['earned'] or Decimal('0')
+    possible = totals['possible'] or Decimal('0')
+    
+    audit.earned_points = earned
+    audit.possible_points = possible
+    audit.answered_questions = totals['answered']
+    audit.score = to_points(earned / possible * 100) if possible > 0 else Decimal('0')
+    Audit.objects.filter(pk=audit.pk).update(
+        **{field: getattr(audit, field) for field in AUDIT_TOTAL_FIELDS},
+        updated_at=timezone.now(),
+    )
+    refresh_section_scores([audit.pk])
+
+
+def refresh_section_scores(audit_ids):
+    """
+    Recompute the section totals of audits from their stored answers: one
+    grouped aggregate, then an upsert of a row per section of the template
+    of each audit (unanswered sections included).
+    """
+    audit_ids = list(audit_ids)
+    totals = {
+        (row['audit_id'], row['question__section_id']): row
+        for row in AuditAnswer.objects.filter(audit_id__in=audit_ids).values(
+            'audit_id', 'question__section_id',
+        ).annotate(
+            earned=Sum('score'),
+            possible=Sum('max_score'),
+            answered=Count('id'),
+        ).order_by()
+    }
     
-    for answer in answers:
-        question = answer.question
-        max_score = question.max_score * question.weight
-        total_possible += max_score
-        total_earned += calculate_answer_score(answer)
+    rows = []
+    plans = {}  # Template id -> plan, looked up once per template
+    for audit_id, template_id in Audit.objects.filter(id__in=audit_ids).values_list('id', 'template_id'):
+        plan = plans.get(template_id)
+        if plan is None:
+            plan = plans[template_id] = get_scoring_plan(template_id)
+        for position, section_id in enumerate(plan.section_ids):
+            section_totals = totals.get((audit_id, section_id), {})
+            earned = to_points(section_totals.get('earned') or 0)
+            max_points = to_points(plan.section_max_points[position])
+            rows.append(AuditSectionScore(
+                audit_id=audit_id,
+                section_id=section_id,
+                earned_points=earned,
+                possible_points=to_points(section_totals.get('possible') or 0),
+                answered_questions=section_totals.get('answered', 0),
+                total_questions=plan.section_question_counts[position],
+                max_points=max_points,
+                percentage=to_points(earned / max_points * 100) if max_points > 0 else Decimal('0'),
+            ))
     
-    if total_possible == 0:
-        return 0
+    AuditSectionScore.objects.bulk_create(
+        rows,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['audit', 'section'],
+        update_fields=SECTION_SCORE_UPDATE_FIELDS,
+    )
+
+
+def save_answers_batch(audit, answers_data, user):
+    """
+    Upsert many answers of an audit in a single transaction.
+    
+    `answers_data` are validated SubmitAnswerSerializer items. Returns the
+    list of question ids not belonging to the audit template (nothing is
+    saved in that case), or an empty list on success.
+    """
+    plan = get_scoring_plan(audit.template_id)
+    
+    invalid_ids = [item['question_id'] for item in answers_data if item['question_id'] not in plan]
+    if invalid_ids:
+        return invalid_ids
+    
+    answers = []
+    for item in answers_data:
+        answer = AuditAnswer(
+            audit=audit,
+            question_id=item['question_id'],
+            answer_boolean=item.get('answer_boolean'),
+            answer_scale=item.get('answer_scale'),
+            answer_choice=item.get('answer_choice'),
+            answer_text=item.get('answer_text'),
+            comments=item.get('comments'),
+            answered_by=user,
+            max_score=plan.max_points_for(item['question_id']),
+        )
+        answer.score = to_points(calculate_answer_score(answer, plan))
+        answers.append(answer)
+    
+    with transaction.atomic():
+        AuditAnswer.objects.bulk_create(
+            answers,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['audit', 'question'],
+            update_fields=BATCH_ANSWER_UPDATE_FIELDS,
+        )
+        
+        if audit.status == 'draft':
+            audit.status = 'in_progress'
+            audit.save(update_fields=['status', 'updated_at'])
+        
+        refresh_audit_totals(audit)
     
-    return round((total_earned / total_possible) * 100, 2)
+    return []
+
+
+def recompute_audit_scores(audits, chunk_size=500):
+    """
+    Rescore audits in bulk from their raw answers.
+    
+    Audits are processed per template in chunks of `chunk_size`; stored
+    answer scores that changed (e.g. after a question weight was edited)
+    are rewritten along with the audit and section running totals. Returns
+    the number of audits processed.
+    """
+    by_template = {}
+    for audit_id, template_id in audits.order_by().values_list('id', 'template_id'):
+        by_template.setdefault(template_id, []).append(audit_id)
+    
+    processed = 0
+    for template_id, audit_ids in by_template.items():
+        plan = get_scoring_plan(template_id)
+        
+        for start in range(0, len(audit_ids), chunk_size):
+            chunk = audit_ids[start:start + chunk_size]
+            rows = list(
+                AuditAnswer.objects.filter(audit_id__in=chunk)
+                .values_list(*ANSWER_ROW_FIELDS, 'id', 'score', 'max_score')
+            )
+            scores = score_answer_rows(plan, rows, chunk)
+            
+            changed_answers = []
+            for row, points in zip(rows, scores.row_scores):
+                question_id, answer_id, stored_score, stored_max = row[1], row[6], row[7], row[8]
+                if question_id not in plan:
+                    continue
+                score = to_points(points)
+                max_score = to_points(plan.max_points_for(question_id))
+                if score != stored_score or max_score != stored_max:
+                    changed_answers.append(AuditAnswer(id=answer_id, score=score, max_score=max_score))
+            
+            updated_audits = []
+            for audit_id in chunk:
+                earned, possible, answered = scores.totals(audit_id)
+                updated_audits.append(Audit(
+                    id=audit_id,
+                    earned_points=to_points(earned),
+                    possible_points=to_points(possible),
+                    answered_questions=answered,
+                    score=to_points(scores.audit_score(audit_id)),
+                ))
+            
+            with transaction.atomic():
+                AuditAnswer.objects.bulk_update(changed_answers, ['score', 'max_score'], batch_size=500)
+                Audit.objects.bulk_update(updated_audits, AUDIT_TOTAL_FIELDS, batch_size=500)
+                refresh_section_scores(chunk)
+            
+            processed += len(chunk)
+    
+    return processed
 
 
 def calculate_section_score(audit, section):
     """Calculate score for a specific section"""
-    answers = audit.answers.filter(question__section=section)
-    
-    total_possible = 0
-    total_earned = 0
+    plan = get_scoring_plan(audit.template_id)
+    if section.id not in plan.section_ids:
+        return 0
     
-    for answer in answers:
-        question = answer.question
-        max_score = question.max_score * question.weight
-        total_possible += max_score
-        total_earned += calculate_answer_score(answer)
+    position = plan.section_ids.index(section.id)
+    earned, possible, _ = _score_answers(plan, audit.answers.values_list(*ANSWER_VALUE_FIELDS))
     
-    if total_possible == 0:
+    if possible[position] == 0:
         return 0
     
-    return round((total_earned / total_possible) * 100, 2)
+    return round((earned[position] / possible[position]) * 100, 2)
 
 
 def get_section_scores(audit):
-    """Get scores for all sections in an audit"""
-    sections = audit.template.sections.all()
+    """
+    Get scores for all sections in an audit.
+    
+    One query for the stored section totals of the audit; names and
+    maximums come from the compiled scoring plan of the template.
+    """
+    plan = get_scoring_plan(audit.template_id)
+    stored = {
+        section_id: (earned, answered)
+        for section_id, earned, answered in audit.section_scores.values_list('section_id', 'earned_points', 'answered_questions')
+    }
+    
     section_scores = []
     
-    for section in sections:
-        questions = section.questions.all()
-        answers = audit.answers.filter(question__section=section)
-        
-        total_possible = sum(q.max_score * q.weight for q in questions)
-        total_earned = sum(calculate_answer_score(a) for a in answers)
+    for position, section_id in enumerate(plan.section_ids):
+        total_possible = plan.section_max_points[position]
+        total_earned, answered = stored.get(section_id, (0, 0))
+        total_earned = float(total_earned)
         
         percentage = round((total_earned / total_possible) * 100, 2) if total_possible > 0 else 0
         
         section_scores.append({
-            'section_id': section.id,
-            'section_name': section.name,
-            'section_code': section.code,
-            'total_questions': questions.count(),
-            'answered_questions': answers.count(),
+            'section_id': section_id,
+            'section_name': plan.section_names[position],
+            'section_code': plan.section_codes[position],
+            'total_questions': plan.section_question_counts[position],
+            'answered_questions': answered,
             'score': total_earned,
             'max_score': total_possible,
             'percentage': percentage,
@@ -112,84 +358,165 @@ def get_section_scores(audit):
     return section_scores
 
 
-def generate_recommendations(audit):
-    """Generate automatic recommendations based on audit results"""
-    # Clear existing recommendations
-    audit.recommendations.all().delete()
+RECOMMENDATION_FIELDS = ['title', 'description', 'action_required', 'priority', 'category']
+
+
+def _section_recommendation(audit, section_data):
+    """Recommendation for a section with a low score, or None"""
+    section_name = section_data['section_name']
+    percentage = section_data['percentage']
+    
+    if percentage < 50:
+        return Recommendation(
+            audit=audit,
+            section_id=section_data['section_id'],
+            rule='section_score',
+            title=f'Sección crítica: {section_name}',
+            description=f'La sección "{section_name}" tiene un score de {percentage:.0f}%, muy por debajo del mínimo aceptable (50%).',
+            action_required=f'Revisar urgentemente todos los controles de {section_name}. Implementar medidas correctivas inmediatas.',
+            priority='critical',
+            category='organizational',
+        )
+    elif percentage < 70:
+        return Recommendation(
+            audit=audit,
+            section_id=section_data['section_id'],
+            rule='section_score',
+            title=f'Sección a mejorar: {section_name}',
+            description=f'La sección "{section_name}" tiene un score de {percentage:.0f}%, por debajo del nivel óptimo (70%).',
+            action_required=f'Identificar las brechas específicas en {section_name} y planificar mejoras.',
+            priority='high',
+            category='organizational',
+        )
+    elif percentage < 85:
+        return Recommendation(
+            audit=audit,
+            section_id=section_data['section_id'],
+            rule='section_score',
+            title=f'Oportunidad de mejora: {section_name}',
+            description=f'La sección "{section_name}" tiene un score de {percentage:.0f}%. Hay oportunidades de mejora.',
+            action_required=f'Revisar los controles de {section_name} para optimizar el cumplimiento.',
+            priority='medium',
+            category='organizational',
+        )
+    return None
+
+
+def _question_recommendation(audit, answer):
+    """Recommendation for a question with a bad answer, or None"""
+    question = answer.question
     
-    recommendations = []
-    section_scores = get_section_scores(audit)
+    # Yes/No questions answered "No"
+    if question.question_type == 'yes_no' and answer.answer_boolean is False:
+        return Recommendation(
+            audit=audit,
+            section_id=question.section_id,
+            question=question,
+            rule='question_no',
+            title=f'Control no implementado: {question.code}',
+            description=question.text,
+            action_required='Implementar este control según los requisitos del estándar.',
+            priority='high',
+            category='technical',
+        )
+    
+    # Scale questions with low values (1-2)
+    elif question.question_type == 'scale' and answer.answer_scale and answer.answer_scale <= 2:
+        return Recommendation(
+            audit=audit,
+            section_id=question.section_id,
+            question=question,
+            rule='question_scale',
+            title=f'Control deficiente: {question.code}',
+            description=f'{question.text} - Puntuación: {answer.answer_scale}/5',
+            action_required='Mejorar significativamente la implementación de este control.',
+            priority='high' if answer.answer_scale == 1 else 'medium',
+            category='technical',
+        )
+    return None
+
+
+def _recommendation_key(recommendation, plan):
+    """(section, question, rule) identity of an automatic recommendation"""
+    rule = recommendation.rule
+    if not rule:
+        # Generated before rules were stored: the rule follows from the question type
+        if recommendation.question_id is None:
+            rule = 'section_score'
+        elif recommendation.question_id in plan:
+            rule = 'question_scale' if plan.type_codes[plan.index[recommendation.question_id]] == SCALE else 'question_no'
+    return recommendation.section_id, recommendation.question_id, rule
+
+
+def generate_recommendations(audit, section_scores=None, mode='diff'):
+    """
+    Generate automatic recommendations based on audit results.
+    
+    The desired set is computed from the section scores (pass them if
+    already computed) and one answers+questions query. In 'diff' mode it
+    is compared to the existing automatic recommendations by (section,
+    question, rule) and only the needed inserts, updates and deletes are
+    applied, in bulk, so user-set statuses survive a regeneration. Manual
+    recommendations are never touched. 'replace' mode deletes and
+    recreates every recommendation of the audit.
+    
+    Returns the automatic recommendations of the audit after regeneration.
+    """
+    if section_scores is None:
+        section_scores = get_section_scores(audit)
+    
+    desired = []
     
     # 1. Recommendations for sections with low scores
     for section_data in section_scores:
-        section = QuestionSection.objects.get(id=section_data['section_id'])
-        percentage = section_data['percentage']
-        
-        if percentage < 50:
-            recommendations.append(Recommendation(
-                audit=audit,
-                section=section,
-                title=f'Sección crítica: {section.name}',
-                description=f'La sección "{section.name}" tiene un score de {percentage:.0f}%, muy por debajo del mínimo aceptable (50%).',
-                action_required=f'Revisar urgentemente todos los controles de {section.name}. Implementar medidas correctivas inmediatas.',
-                priority='critical',
-                category='organizational',
-            ))
-        elif percentage < 70:
-            recommendations.append(Recommendation(
-                audit=audit,
-                section=section,
-                title=f'Sección a mejorar: {section.name}',
-                description=f'La sección "{section.name}" tiene un score de {percentage:.0f}%, por debajo del nivel óptimo (70%).',
-                action_required=f'Identificar las brechas específicas en {section.name} y planificar mejoras.',
-                priority='high',
-                category='organizational',
-            ))
-        elif percentage < 85:
-            recommendations.append(Recommendation(
-                audit=audit,
-                section=section,
-                title=f'Oportunidad de mejora: {section.name}',
-                description=f'La sección "{section.name}" tiene un score de {percentage:.0f}%. Hay oportunidades de mejora.',
-                action_required=f'Revisar los controles de {section.name} para optimizar el cumplimiento.',
-                priority='medium',
-                category='organizational',
-            ))
+        recommendation = _section_recommendation(audit, section_data)
+        if recommendation:
+            desired.append(recommendation)
     
     # 2. Recommendations for individual questions with bad answers
-    for answer in audit.answers.all():
-        question = answer.question
+    bad_answers = audit.answers.filter(
+        Q(answer_boolean=False, question__question_type='yes_no') |
+        Q(answer_scale__lte=2, question__question_type='scale')
+    ).select_related('question')
+    for answer in bad_answers:
+        recommendation = _question_recommendation(audit, answer)
+        if recommendation:
+            desired.append(recommendation)
+    
+    with transaction.atomic():
+        if mode == 'replace':
+            audit.recommendations.all().delete()
+            return Recommendation.objects.bulk_create(desired)
         
-        # Yes/No questions answered "No"
-        if question.question_type == 'yes_no' and answer.answer_boolean is False:
-            recommendations.append(Recommendation(
-                audit=audit,
-                section=question.section,
-                question=question,
-                title=f'Control no implementado: {question.code}',
-                description=question.text,
-                action_required='Implementar este control según los requisitos del estándar.',
-                priority='high',
-                category='technical',
-            ))
+        plan = get_scoring_plan(audit.template_id)
+        desired_by_key = {_recommendation_key(r, plan): r for r in desired}
         
-        # Scale questions with low values (1-2)
-        elif question.question_type == 'scale' and answer.answer_scale and answer.answer_scale <= 2:
-            recommendations.append(Recommendation(
-                audit=audit,
-                section=question.section,
-                question=question,
-                title=f'Control deficiente: {question.code}',
-                description=f'{question.text} - Puntuación: {answer.answer_scale}/5',
-                action_required='Mejorar significativamente la implementación de este control.',
-                priority='high' if answer.answer_scale == 1 else 'medium',
-                category='technical',
-            ))
-    
-    # Save all recommendations
-    Recommendation.objects.bulk_create(recommendations)
+        kept = []
+        to_update = []
+        to_delete = []
+        for existing in audit.recommendations.exclude(rule='manual'):
+            key = _recommendation_key(existing, plan)
+            wanted = desired_by_key.pop(key, None)
+            if wanted is None:
+                to_delete.append(existing.id)
+                continue
+            
+            changed = [field for field in RECOMMENDATION_FIELDS if getattr(existing, field) != getattr(wanted, field)]
+            if changed or existing.rule != wanted.rule:
+                for field in RECOMMENDATION_FIELDS:
+                    setattr(existing, field, getattr(wanted, field))
+                existing.rule = wanted.rule
+                existing.updated_at = timezone.now()
+                to_update.append(existing)
+            kept.append(existing)
+        
+        if to_delete:
+            Recommendation.objects.filter(id__in=to_delete).delete()
+        if to_update:
+            Recommendation.objects.bulk_update(to_update, RECOMMENDATION_FIELDS + ['rule', 'updated_at'], batch_size=500)
+        created = Recommendation.objects.bulk_create(list(desired_by_key.values()), batch_size=500)
     
-    return recommendations
+    return kept + created
 
 
 def get_audit_results(audit):
@@ -220,102 +547,189 @@ def get_audit_results(audit):
     }
 
 
-def get_visible_audits(user):
-    """Get audits visible to a user based on their role and assignment"""
-    from apps.core.models import UserAssignment
+def invalidate_statistics(organization_id):
+    """
+    Drop the cached statistics of an organization, and those of the users
+    without one: they see the audits they created or are assigned to
+    in any organization, cached under the None namespace.
+    """
+    bump_cache_version(STATISTICS_CACHE, organization_id)
+    bump_cache_version(STATISTICS_CACHE, None)
+
+
+def get_visible_audits(user, tenant=None):
+    """
+    Get audits visible to a user based on their role and assignment.
+    Views pass `request.tenant`; other callers let it be resolved here.
+    """
+    tenant = tenant or get_tenant_context(user)
     
     # Owners see everything in their organization
-    if user.user_type == 'owner' and hasattr(user, 'organization'):
-        return Audit.objects.filter(organization=user.organization)
+    if tenant.owns_organization:
+        return Audit.objects.filter(organization_id=tenant.organization_id)
     
     # Get user's assignment
-    assignment = user.assignments.filter(is_active=True).first()
+    assignment = tenant.assignment
     
     if not assignment:
         # User without assignment can only see audits they created or are assigned to
         return Audit.objects.filter(Q(created_by=user) | Q(assigned_to=user))
     
-    base_filter = Q(organization=assignment.organization)
-    
-    if assignment.company:
-        # Manager of company sees company and everything below
-        return Audit.objects.filter(
-            base_filter & (
-                Q(company=assignment.company) |
-                Q(branch__company=assignment.company) |
-                Q(department__branch__company=assignment.company) |
-                Q(team__department__branch__company=assignment.company) |
-                Q(subteam__team__department__branch__company=assignment.company)
-            )
-        )
+    base_filter = Q(organization_id=assignment.organization_id)
     
-    elif assignment.branch:
-        # Manager of branch sees branch and everything below
-        return Audit.objects.filter(
-            base_filter & (
-                Q(branch=assignment.branch) |
-                Q(department__branch=assignment.branch) |
-                Q(team__department__branch=assignment.branch) |
-                Q(subteam__team__department__branch=assignment.branch)
-            )
-        )
+    # Managers see their level and everything below it, by equality on the audit scope columns
+    for level in LEVELS:
+        unit_id = getattr(assignment, f'{level}_id')
+        if unit_id:
+            return Audit.objects.filter(base_filter, **{Audit.scope_lookup(level): unit_id})
     
-    elif assignment.department:
-        # Manager of department sees department and everything below
-        return Audit.objects.filter(
-            base_filter & (
-                Q(department=assignment.department) |
-                Q(team__department=assignment.department) |
-                Q(subteam__team__department=assignment.department)
-            )
-        )
+    # Employee: only audits created by or assigned to them
+    return Audit.objects.filter(
+        base_filter & (Q(created_by=user) | Q(assigned_to=user))
+    )
+
+
+def update_audit_scopes(audits):
+    """
+    Recompute the scope_* ancestor columns of many audits from the
+    hierarchy closure table: one UPDATE per audited level. Returns the
+    number of audits updated.
+    """
+    updated = 0
+    
+    for position, level in enumerate(LEVELS):
+        # Audits run at this level (the deepest level FK set wins, like Audit.get_unit_key)
+        at_level = audits.filter(**{f'{level}_id__isnull': False})
+        for deeper in LEVELS[position + 1:]:
+            at_level = at_level.filter(**{f'{deeper}_id__isnull': True})
+        
+        values = {}
+        for scope in Audit.SCOPE_LEVELS:
+            if scope == level:
+                values[f'scope_{scope}'] = F(f'{level}_id')
+            elif LEVELS.index(scope) < position:
+                values[f'scope_{scope}'] = Subquery(
+                    OrgUnitClosure.objects.filter(
+                        descendant_type=level,
+                        descendant_id=OuterRef(f'{level}_id'),
+                        ancestor_type=scope,
+                    ).values('ancestor_id')[:1]
+                )
+            else:
+                values[f'scope_{scope}'] = None
+        
+        updated += at_level.update(**values)
     
-    elif assignment.team:
-        # Manager of team sees team and subteams
-        return Audit.objects.filter(
-            base_filter & (
-                Q(team=assignment.team) |
-                Q(subteam__team=assignment.team)
-            )
-        )
+    # Organization-level audits have no scope
+    no_unit = {f'{level}_id__isnull': True for level in LEVELS}
+    updated += audits.filter(**no_unit).update(**{f'scope_{scope}': None for scope in Audit.SCOPE_LEVELS})
     
-    elif assignment.subteam:
-        # Manager of subteam sees only subteam
-        return Audit.objects.filter(
-            base_filter & Q(subteam=assignment.subteam)
-        )
+    return updated
+
+
+def refresh_subtree_audit_scopes(level, unit_id):
+    """Recompute the scopes of the audits under a unit (after it was moved)"""
+    return update_audit_scopes(Audit.objects.filter(subtree_filter(level, unit_id)))
+
+
+def get_section_score_matrix(audit_ids):
+    """
+    Section x audit matrix of (earned, possible) points over answered
+    questions, from the stored section totals: {(audit_id, section_id): (earned, possible)}
+    """
+    rows = AuditSectionScore.objects.filter(audit_id__in=audit_ids).values_list(
+        'audit_id', 'section_id', 'earned_points', 'possible_points',
+    )
     
-    else:
-        # Employee: only audits created by or assigned to them
-        return Audit.objects.filter(
-            base_filter & (Q(created_by=user) | Q(assigned_to=user))
-        )
+    return {
+        (audit_id, section_id): (float(earned), float(possible))
+        for audit_id, section_id, earned, possible in rows
+    }
+
+
+def get_section_statistics(audits, template, group_by=None):
+    """
+    Percentage of each section of a template over the completed audits,
+    from one grouped query on the stored section totals. With `group_by`
+    (a scope level) each section also lists its units.
+    """
+    plan = get_scoring_plan(template)
+    fields = ['section_id'] + (['unit'] if group_by else [])
+    scores = AuditSectionScore.objects.filter(
+        audit__in=audits.filter(template=template, status='completed').values('id'),
+    )
+    if group_by:
+        scores = scores.annotate(unit=F(f'audit__{Audit.scope_lookup(group_by)}'))
+    
+    rows = scores.values(*fields).annotate(
+        audits=Count('audit_id'),
+        average=Avg('percentage'),
+        minimum=Min('percentage'),
+        maximum=Max('percentage'),
+    ).order_by()
+    
+    groups = {}
+    for row in rows:
+        groups.setdefault(row['section_id'], []).append(row)
+    
+    sections = []
+    for position, section_id in enumerate(plan.section_ids):
+        section_rows = groups.get(section_id, [])
+        count = sum(row['audits'] for row in section_rows)
+        section = {
+            'section_id': section_id,
+            'section_code': plan.section_codes[position],
+            'section_name': plan.section_names[position],
+            'audits': count,
+            'average_percentage': round(sum(float(row['average']) * row['audits'] for row in section_rows) / count, 2) if count else None,
+            'min_percentage': min((float(row['minimum']) for row in section_rows), default=None),
+            'max_percentage': max((float(row['maximum']) for row in section_rows), default=None),
+        }
+        if group_by:
+            section['units'] = [
+                {
+                    'unit_id': row['unit'],
+                    'audits': row['audits'],
+                    'average_percentage': round(float(row['average']), 2),
+                }
+                for row in sorted(section_rows, key=lambda row: row['average'])
+                if row['unit'] is not None
+            ]
+        sections.append(section)
+    
+    return sections
 
 
-def get_comparison_data(audits):
-    """Get comparison data for multiple audits"""
+def get_comparison_data(audits, offset=0, limit=None):
+    """
+    Get comparison data for multiple audits.
+    
+    Summary statistics cover every audit; the section matrix can be
+    restricted to a page of the audit axis with offset/limit.
+    """
     if len(audits) < 2:
         return None
     
     # Get sections from template (assuming same template)
-    template = audits[0].template
-    sections = template.sections.all()
+    plan = get_scoring_plan(audits[0].template_id)
+    page = audits[offset:offset + limit] if limit else audits[offset:]
+    matrix = get_section_score_matrix([audit.id for audit in page])
     
     # Build comparison data
     sections_comparison = []
-    for section in sections:
+    for position, section_id in enumerate(plan.section_ids):
         section_data = {
-            'section_id': section.id,
-            'section_name': section.name,
-            'section_code': section.code,
+            'section_id': section_id,
+            'section_name': plan.section_names[position],
+            'section_code': plan.section_codes[position],
             'audits': {}
         }
         
-        for audit in audits:
-            score = calculate_section_score(audit, section)
+        for audit in page:
+            earned, possible = matrix.get((audit.id, section_id), (0, 0))
             section_data['audits'][audit.id] = {
                 'audit_name': audit.name,
-                'score': score,
+                'score': round((earned / possible) * 100, 2) if possible > 0 else 0,
             }
         
         sections_comparison.append(section_data)
@@ -328,7 +742,7 @@ def get_comparison_data(audits):
     worst_audit = min(audits, key=lambda a: float(a.score))
     
     return {
-        'audits': audits,
+        'audits': page,
         'sections_comparison': sections_comparison,
         'average_score': round(avg_score, 2),
         'best_audit': {
@@ -344,39 +758,124 @@ def get_comparison_data(audits):
     }
 
 
-def get_audit_statistics(user):
-    """Get audit statistics for a user"""
-    audits = get_visible_audits(user)
+def period_bounds(date_from, date_to):
+    """[start, end) datetimes of the days from date_from to date_to included"""
+    start = timezone.make_aware(datetime.combine(date_from, time.min))
+    return start, timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+
+
+def _rate(part, total):
+    return round(part / total * 100, 2) if total else None
+
+
+def get_question_statistics(audits, template, date_from, date_to):
+    """
+    How often each question of a template fails over the completed audits
+    of a period (both dates included), from one query grouped by question.
+    
+    A failure is a "No" or a scale value of 2 or less, like the question
+    recommendation rules. The trend is the failure rate of the second half
+    of the period minus the first half, in percentage points.
+    """
+    start, end = period_bounds(date_from, date_to)
+    middle = start + (end - start) / 2
+    
+    audits = audits.filter(template=template, status='completed', completed_at__gte=start, completed_at__lt=end)
+    audits_count = audits.count()
+    
+    recent = Q(audit__completed_at__gte=middle)
+    totals = {
+        row['question_id']: row
+        for row in AuditAnswer.objects.filter(audit__in=audits.values('id')).values('question_id').annotate(
+            answered=Count('id'),
+            yes_no=Count('id', filter=Q(answer_boolean__isnull=False)),
+            no=Count('id', filter=Q(answer_boolean=False)),
+            scale_avg=Avg('answer_scale'),
+            failed=Count('id', filter=FAILED_ANSWER),
+            recent_answered=Count('id', filter=recent),
+            recent_failed=Count('id', filter=FAILED_ANSWER & recent),
+        ).order_by()
+    }
     
-    total = audits.count()
-    completed = audits.filter(status='completed').count()
-    in_progress = audits.filter(status='in_progress').count()
-    draft = audits.filter(status='draft').count()
+    questions = []
+    for question in Question.objects.filter(section__template=template).values(
+        'id', 'code', 'text', 'question_type', 'section__code',
+    ).order_by('section__order', 'order'):
+        row = totals.get(question['id'])
+        if row:
+            recent_rate = _rate(row['recent_failed'], row['recent_answered'])
+            previous_rate = _rate(row['failed'] - row['recent_failed'], row['answered'] - row['recent_answered'])
+        
+        questions.append({
+            'question_id': question['id'],
+            'question_code': question['code'],
+            'question_text': question['text'],
+            'question_type': question['question_type'],
+            'section_code': question['section__code'],
+            'answered': row['answered'] if row else 0,
+            'coverage': _rate(row['answered'] if row else 0, audits_count),
+            'failure_rate': _rate(row['failed'], row['answered']) if row else None,
+            'no_rate': _rate(row['no'], row['yes_no']) if row else None,
+            'scale_average': round(row['scale_avg'], 2) if row and row['scale_avg'] is not None else None,
+            'trend': round(recent_rate - previous_rate, 2) if row and None not in (recent_rate, previous_rate) else None,
+        })
     
-    # Average score of completed audits
-    avg_score = audits.filter(status='completed').aggregate(avg=Avg('score'))['avg'] or 0
+    # Most failed first, unanswered questions last
+    questions.sort(key=lambda question: -1 if question['failure_rate'] is None else question['failure_rate'], reverse=True)
     
-    # Audits by status
-    audits_by_status = {
-        'completed': completed,
-        'in_progress': in_progress,
-        'draft': draft,
+    return {
+        'audits': audits_count,
+        'questions': questions,
     }
+
+
+def get_audit_statistics(user, tenant=None):
+    """
+    Get audit statistics for a user.
+    
+    Two queries: one conditional aggregate for every count and the
+    average, and one for the rows of the recent audits and score trend.
+    """
+    audits = get_visible_audits(user, tenant)
+    
+    completed_filter = Q(status='completed')
+    totals = audits.aggregate(
+        total=Count('id'),
+        completed=Count('id', filter=completed_filter),
+        in_progress=Count('id', filter=Q(status='in_progress')),
+        draft=Count('id', filter=Q(status='draft')),
+        # Average score of completed audits
+        avg_score=Avg('score', filter=completed_filter),
+        # Audits by level
+        company=Count('id', filter=Q(company__isnull=False, branch__isnull=True)),
+        branch=Count('id', filter=Q(branch__isnull=False, department__isnull=True)),
+        department=Count('id', filter=Q(department__isnull=False, team__isnull=True)),
+        team=Count('id', filter=Q(team__isnull=False, subteam__isnull=True)),
+        subteam=Count('id', filter=Q(subteam__isnull=False)),
+    )
     
-    # Audits by level
-    audits_by_level = {
-        'company': audits.filter(company__isnull=False, branch__isnull=True).count(),
-        'branch': audits.filter(branch__isnull=False, department__isnull=True).count(),
-        'department': audits.filter(department__isnull=False, team__isnull=True).count(),
-        'team': audits.filter(team__isnull=False, subteam__isnull=True).count(),
-        'subteam': audits.filter(subteam__isnull=False).count(),
+    audits_by_status = {
+        'completed': totals['completed'],
+        'in_progress': totals['in_progress'],
+        'draft': totals['draft'],
     }
     
-    # Recent audits
-    recent = audits.order_by('-created_at')[:5]
-    
-    # Score trend (last 10 completed audits)
-    trend_audits = audits.filter(status='completed').order_by('-completed_at')[:10]
+    audits_by_level = {level: totals[level] for level in ['company', 'branch', 'department', 'team', 'subteam']}
+    
+    # Recent audits (last 5) and score trend (last 10 completed) in one query
+    recent_ids = audits.order_by('-created_at').values('id')[:5]
+    trend_ids = audits.filter(completed_filter).order_by(F('completed_at').desc(nulls_last=True)).values('id')[:10]
+    rows = list(
+        Audit.objects.filter(Q(id__in=recent_ids) | Q(id__in=trend_ids))
+        .select_related('template', 'created_by', 'assigned_to', 'company', 'branch', 'department', 'team', 'subteam')
+    )
+    
+    recent = sorted(rows, key=lambda a: a.created_at, reverse=True)[:5]
+    trend_audits = sorted(
+        (a for a in rows if a.status == 'completed'),
+        key=lambda a: (a.completed_at is not None, a.completed_at or a.created_at),
+        reverse=True,
+    )[:10]
     score_trend = [
         {
             'date': a.completed_at.strftime('%Y-%m-%d') if a.completed_at else a.created_at.strftime('%Y-%m-%d'),
@@ -387,11 +886,11 @@ def get_audit_statistics(user):
     ]
     
     return {
-        'total_audits': total,
-        'completed_audits': completed,
-        'in_progress_audits': in_progress,
-        'draft_audits': draft,
-        'average_score': round(float(avg_score), 2),
+        'total_audits': totals['total'],
+        'completed_audits': totals['completed'],
+        'in_progress_audits': totals['in_progress'],
+        'draft_audits': totals['draft'],
+        'average_score': round(float(totals['avg_score'] or 0), 2),
         'audits_by_status': audits_by_status,
         'audits_by_level': audits_by_level,
         'recent_audits': recent,
@@ -0,0 +1,46 @@
+"""
+Signal handlers for audits app.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.core.hierarchy import organization_of, unit_moved
+from apps.core.models import UserAssignment
+
+from .models import QuestionSection, Question, Audit
+from .scoring import touch_template
+from .services import invalidate_statistics, refresh_subtree_audit_scopes
+from .rollups import rebuild_score_rollups
+from .scorecards import rebuild_scorecards
+
+
+@receiver([post_save, post_delete], sender=QuestionSection)
+def section_changed(sender, instance, **kwargs):
+    touch_template(instance.template_id)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    template_id = QuestionSection.objects.filter(pk=instance.section_id).values_list('template_id', flat=True).first()
+    if template_id:
+        touch_template(template_id)
+
+
+@receiver([post_save, post_delete], sender=Audit)
+def audit_changed(sender, instance, **kwargs):
+    invalidate_statistics(instance.organization_id)
+
+
+# The audits a user sees depend on their assignment
+@receiver([post_save, post_delete], sender=UserAssignment)
+def assignment_changed(sender, instance, **kwargs):
+    invalidate_statistics(instance.organization_id)
+
+
+@receiver(unit_moved)
+def unit_moved_refresh_scopes(sender, level, instance, **kwargs):
+    refresh_subtree_audit_scopes(level, instance.pk)
+    # Completed audits of the subtree now count for other ancestors
+    organization_id = organization_of(instance)
+    rebuild_score_rollups([organization_id])
+    rebuild_scorecards([organization_id])
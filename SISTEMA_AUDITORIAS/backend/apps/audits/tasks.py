@@ -0,0 +1,59 @@
+"""
+Background jobs of audits app (run by `manage.py run_jobs`).
+"""
+from django.db.models import CharField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Concat
+
+from apps.core.jobs import enqueue, job_handler
+from apps.core.models import BackgroundJob
+
+from .models import Audit
+from .services import recompute_audit_scores, generate_recommendations, invalidate_statistics
+from .rollups import refresh_audit_rollups
+from .scorecards import refresh_audit_scorecards
+
+
+COMPLETE_AUDIT = 'audits.complete_audit'
+
+
+def completion_key(audit_id):
+    """Idempotency key of the completion job of an audit"""
+    return f'audit:{audit_id}'
+
+
+def enqueue_completion(audit_id):
+    """Enqueue the completion job of an audit; returns (job, created) like enqueue"""
+    return enqueue(COMPLETE_AUDIT, {'audit_id': audit_id}, key=completion_key(audit_id))
+
+
+def with_failed_completion(audits):
+    """
+    Completed audits of a queryset whose latest completion job failed for
+    good: they have no recommendations, rollups or scorecards until the
+    job is enqueued again.
+    """
+    latest_job = BackgroundJob.objects.filter(
+        kind=COMPLETE_AUDIT,
+        key=Concat(Value(completion_key('')), Cast(OuterRef('pk'), CharField())),
+    ).order_by('-created_at', '-id')
+    return audits.filter(status='completed').annotate(
+        completion_status=Subquery(latest_job.values('status')[:1]),
+    ).filter(completion_status='failed')
+
+
+@job_handler(COMPLETE_AUDIT)
+def complete_audit(audit_id):
+    """Final scoring, recommendations, score rollup, scorecards and statistics refresh of a completed audit"""
+    recompute_audit_scores(Audit.objects.filter(pk=audit_id))
+    audit = Audit.objects.get(pk=audit_id)
+    
+    recommendations = generate_recommendations(audit)
+    refresh_audit_rollups(audit)
+    refresh_audit_scorecards(audit)
+    
+    invalidate_statistics(audit.organization_id)
+    
+    return {
+        'score': float(audit.score),
+        'recommendations': len(recommendations),
+    }
@@ -0,0 +1,45 @@
+"""
+Shared fixtures of the audits tests.
+"""
+from apps.audits.models import AuditTemplate, QuestionSection, Question, Audit
+from apps.core.tests.base import OrganizationTestCase
+
+
+def create_template(code, sections=1, questions_per_section=5):
+    """Public template of yes/no questions"""
+    template = AuditTemplate.objects.create(
+        name=f'Plantilla {code}', code=code, description='', standard='ISO 27701', version='1.0',
+    )
+    for section_order in range(sections):
+        section = QuestionSection.objects.create(
+            template=template, name=f'Sección {section_order + 1}', code=f'{code}-{section_order + 1}', order=section_order,
+        )
+        Question.objects.bulk_create([
+            Question(section=section, text=f'Pregunta {order + 1}', code=f'{section.code}.{order + 1}', order=order)
+            for order in range(questions_per_section)
+        ])
+    return template
+
+
+class AuditTestCase(OrganizationTestCase):
+    """OrganizationTestCase with helpers to create and answer audits through the API"""
+    
+    def create_audit(self, template, level_type='company', level_id=None):
+        response = self.client.post('/api/audits/', {
+            'name': 'Auditoría de prueba',
+            'template_id': template.id,
+            'level_type': level_type,
+            'level_id': level_id or self.company.id,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return Audit.objects.get(pk=response.data['id'])
+    
+    def answer_all(self, audit, passed):
+        """Answer every question of an audit, `passed` of them with yes"""
+        questions = Question.objects.filter(section__template=audit.template_id).order_by('section__order', 'order')
+        answers = [
+            {'question_id': question.id, 'answer_boolean': position < passed}
+            for position, question in enumerate(questions)
+        ]
+        response = self.client.post(f'/api/audits/{audit.id}/answers/batch/', {'answers': answers}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
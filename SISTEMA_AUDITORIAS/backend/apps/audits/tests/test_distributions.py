@@ -0,0 +1,48 @@
+"""
+Tests of the score distributions and their cache.
+"""
+from unittest import mock, skipIf
+
+from django.test import SimpleTestCase
+
+from apps.audits import distributions
+from apps.audits.distributions import _describe_numpy, _describe_python
+from apps.authentication.models import User
+from apps.core.models import UserAssignment
+
+from .base import AuditTestCase, create_template
+
+
+class DescribeScoresTests(SimpleTestCase):
+
+    @skipIf(distributions.np is None, 'NumPy no está instalado')
+    def test_numpy_and_python_give_the_same_figures(self):
+        # Units of one to many audits, with ties and scores on the 0 and 100 edges
+        units = [7, 3, 3, 7, 9, 3, 7, 7, 3, 12, 12, 3]
+        scores = [100, 0, 45.5, 72.25, 33.33, 45.5, 100, 59.99, 80, 10, 90, 66.67]
+        
+        self.assertEqual(_describe_numpy(units, scores), _describe_python(units, scores))
+        self.assertEqual(_describe_python(units, scores)[7]['histogram'][-1], 2)
+
+
+class ScoreDistributionViewTests(AuditTestCase):
+
+    def test_users_of_the_same_scope_share_the_cached_distribution(self):
+        template = create_template('T-DISTRIBUTION')
+        url = f'/api/statistics/distribution/?template={template.id}'
+        
+        def user(email, **unit):
+            user = User.objects.create_user(email, 'test123', full_name=email)
+            UserAssignment.objects.create(user=user, organization=self.organization, role='manager', **unit)
+            return user
+        
+        first, second = user('first@test.com', branch=self.branch), user('second@test.com', branch=self.branch)
+        other = user('other@test.com', department=self.department)
+        
+        with mock.patch('apps.audits.views.get_score_distribution', wraps=distributions.get_score_distribution) as computed:
+            for current in [first, second, other, self.owner]:
+                self.client.force_authenticate(current)
+                self.assertEqual(self.client.get(url).status_code, 200)
+        
+        # The second manager of the branch reads the first one's entry
+        self.assertEqual(computed.call_count, 3)
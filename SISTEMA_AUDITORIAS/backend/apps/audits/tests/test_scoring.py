@@ -0,0 +1,39 @@
+"""
+Tests of the compiled scoring plans.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.audits.exports import section_rows
+from apps.audits.models import Audit, Question
+from apps.audits.scoring import get_scoring_plan
+
+from .base import AuditTestCase, create_template
+
+
+class ScoringPlanTests(AuditTestCase):
+
+    def test_non_string_choices_are_skipped(self):
+        template = create_template('T-CHOICES', questions_per_section=1)
+        question = Question.objects.get(section__template=template)
+        Question.objects.filter(pk=question.pk).update(
+            question_type='multiple_choice', choices=[{'texto': 'Siempre'}, 'A veces', ['Nunca']],
+        )
+        
+        plan = get_scoring_plan(template.id)
+        
+        self.assertEqual(plan.score(question.id, None, None, 'A veces', None), question.max_score * 0.5)
+        self.assertEqual(plan.score(question.id, None, None, 'Siempre', None), 0)
+    
+    def test_section_export_looks_up_each_plan_once(self):
+        template = create_template('T-EXPORT', sections=3)
+        audits = [self.create_audit(template) for _ in range(4)]
+        get_scoring_plan(template.id)  # Compiled once per process
+        
+        with CaptureQueriesContext(connection) as single:
+            rows = list(section_rows(Audit.objects.filter(pk=audits[0].pk)))
+        self.assertEqual(len(rows), 3)
+        
+        with self.assertNumQueries(len(single)):
+            rows = list(section_rows(Audit.objects.filter(pk__in=[audit.pk for audit in audits])))
+        self.assertEqual(len(rows), 12)
@@ -0,0 +1,49 @@
+"""
+Tests of the completion job of audits.
+"""
+from django.test import override_settings
+
+from apps.audits.models import AuditSectionScore, UnitScorecard
+from apps.audits.tasks import COMPLETE_AUDIT, completion_key
+from apps.core.models import BackgroundJob
+
+from .base import AuditTestCase, create_template
+
+
+class CompleteAuditTests(AuditTestCase):
+
+    @override_settings(JOBS_EAGER=True)
+    def test_complete_runs_the_completion_job(self):
+        template = create_template('T-COMPLETE', sections=2, questions_per_section=5)
+        audit = self.create_audit(template)
+        self.answer_all(audit, passed=6)
+        
+        response = self.client.post(f'/api/audits/{audit.id}/complete/')
+        
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['completion_job']['status'], 'succeeded')
+        self.assertEqual(response.data['status'], 'completed')
+        
+        audit.refresh_from_db()
+        self.assertEqual(audit.score, 60)
+        job = BackgroundJob.objects.get(kind=COMPLETE_AUDIT, key=completion_key(audit.id))
+        self.assertEqual(job.result['score'], 60)
+        
+        # Recommendations for the 4 failed questions and the second section (20%)
+        self.assertEqual(job.result['recommendations'], audit.recommendations.count())
+        self.assertEqual(audit.recommendations.filter(question__isnull=False).count(), 4)
+        self.assertEqual(list(audit.recommendations.filter(question__isnull=True).values_list('section__order', flat=True)), [1])
+        self.assertEqual(AuditSectionScore.objects.filter(audit=audit).count(), 2)
+        self.assertTrue(UnitScorecard.objects.filter(unit_type='company', unit_id=self.company.id).exists())
+    
+    @override_settings(JOBS_EAGER=False)
+    def test_complete_enqueues_a_single_job(self):
+        audit = self.create_audit(create_template('T-QUEUE'))
+        self.answer_all(audit, passed=5)
+        
+        response = self.client.post(f'/api/audits/{audit.id}/complete/')
+        
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['completion_job']['status'], 'pending')
+        self.assertEqual(self.client.post(f'/api/audits/{audit.id}/complete/').status_code, 400)
+        self.assertEqual(BackgroundJob.objects.filter(key=completion_key(audit.id)).count(), 1)
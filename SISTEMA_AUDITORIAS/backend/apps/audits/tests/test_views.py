@@ -0,0 +1,51 @@
+"""
+Tests of the audit API views.
+"""
+from apps.audits.models import Audit
+
+from .base import AuditTestCase, create_template
+
+
+class AuditQuestionsTests(AuditTestCase):
+
+    # Query budget of the questions endpoint, see AuditViewSet.questions
+    QUESTIONS_QUERIES = 4
+    
+    def test_questions_query_budget_does_not_grow_with_the_template(self):
+        for sections, questions_per_section in [(1, 3), (10, 30)]:
+            template = create_template(f'T-{sections}', sections, questions_per_section)
+            audit = self.create_audit(template)
+            self.answer_all(audit, passed=questions_per_section)
+            
+            # The tenant context is cached by the previous requests
+            with self.assertNumQueries(self.QUESTIONS_QUERIES):
+                response = self.client.get(f'/api/audits/{audit.id}/questions/')
+            
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data), sections)
+            questions = [question for section in response.data for question in section['questions']]
+            self.assertEqual(len(questions), sections * questions_per_section)
+            self.assertTrue(all(question['answered'] for question in questions))
+            self.assertEqual(sum(question['answer']['answer_boolean'] for question in questions), questions_per_section)
+
+
+class AuditListTests(AuditTestCase):
+
+    def test_list_pages_filter_by_status_and_search(self):
+        template = create_template('T-LIST')
+        audits = [self.create_audit(template) for _ in range(3)]
+        Audit.objects.filter(pk=audits[0].pk).update(name='Auditoría Quito', status='completed')
+        Audit.objects.filter(pk=audits[1].pk).update(name='Auditoría Guayaquil', status='completed')
+        
+        response = self.client.get('/api/audits/', {'status': 'completed', 'search': 'quito', 'page_size': 1})
+        self.assertEqual([audit['id'] for audit in response.data['results']], [audits[0].id])
+        self.assertIsNone(response.data['next'])
+        
+        response = self.client.get('/api/audits/', {'status': 'completed', 'page_size': 1, 'count': 'false'})
+        self.assertEqual([audit['id'] for audit in response.data['results']], [audits[1].id])
+        self.assertNotIn('count', response.data)
+        
+        # The next link keeps the filters
+        response = self.client.get(response.data['next'])
+        self.assertEqual([audit['id'] for audit in response.data['results']], [audits[0].id])
+        self.assertIsNone(response.data['next'])
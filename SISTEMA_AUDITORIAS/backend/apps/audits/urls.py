@@ -10,6 +10,10 @@ from .views import (
     RecommendationViewSet,
     AuditComparisonView,
     AuditStatisticsView,
+    ScoreTrendView,
+    SectionStatisticsView,
+    QuestionStatisticsView,
+    ScoreDistributionView,
     DashboardView,
 )
 
@@ -22,5 +26,9 @@ urlpatterns = [
     path('', include(router.urls)),
     path('comparisons/', AuditComparisonView.as_view(), name='audit-comparison'),
     path('statistics/', AuditStatisticsView.as_view(), name='audit-statistics'),
+    path('statistics/trend/', ScoreTrendView.as_view(), name='audit-score-trend'),
+    path('statistics/sections/', SectionStatisticsView.as_view(), name='audit-section-statistics'),
+    path('statistics/questions/', QuestionStatisticsView.as_view(), name='audit-question-statistics'),
+    path('statistics/distribution/', ScoreDistributionView.as_view(), name='audit-score-distribution'),
     path('dashboard/', DashboardView.as_view(), name='dashboard'),
 ]
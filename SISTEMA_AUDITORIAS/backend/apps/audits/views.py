@@ -5,44 +5,51 @@ from rest_framework import viewsets, status, generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
-from django.db.models import Q
+from django.utils.dateparse import parse_date
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Prefetch
 
 from .models import AuditTemplate, QuestionSection, Question, Audit, AuditAnswer, Recommendation
 from .serializers import (
     AuditTemplateSerializer, AuditTemplateListSerializer,
     QuestionSectionSerializer, QuestionSerializer,
     AuditSerializer, AuditListSerializer, CreateAuditSerializer,
-    AuditAnswerSerializer, SubmitAnswerSerializer,
+    AuditAnswerSerializer, SubmitAnswerSerializer, SubmitAnswersBatchSerializer,
     RecommendationSerializer,
     AuditResultsSerializer, ComparisonSerializer, AuditStatisticsSerializer,
 )
 from .services import (
-    calculate_answer_score, calculate_audit_score, get_section_scores,
-    generate_recommendations, get_audit_results, get_visible_audits,
-    get_comparison_data, get_audit_statistics,
+    calculate_answer_score, get_section_scores,
+    apply_answer_delta, save_answers_batch, to_points,
+    get_audit_results, get_visible_audits,
+    get_comparison_data, get_audit_statistics, get_section_statistics, get_question_statistics,
+    STATISTICS_CACHE,
 )
+from .tasks import COMPLETE_AUDIT, completion_key, enqueue_completion
+from .exports import DATASETS, Workbook, csv_response, xlsx_response
+from .importer import TEMPLATE_TEXT_FIELDS, TemplateImportError, file_type_of, import_template, parse_definition
+from .scoring import get_scoring_plan
+from .rollups import GRANULARITIES, TREND_DEFAULT_DAYS, UNIT_TYPES, get_score_trend, refresh_audit_rollups
+from .scorecards import refresh_audit_scorecards, unit_scores
+from .distributions import get_score_distribution
 from apps.core.models import Company, Branch, Department, Team, SubTeam
-
-
-def get_user_organization(user):
-    """Get organization for a user"""
-    if user.user_type == 'owner' and hasattr(user, 'organization'):
-        return user.organization
-    
-    assignment = user.assignments.filter(is_active=True).first()
-    if assignment:
-        return assignment.organization
-    
-    return None
+from apps.core.cache import versioned_key
+from apps.core.hierarchy import LEVELS, LEVEL_MODELS, count_descendants
+from apps.core.jobs import get_latest_job
+from apps.core.serializers import BackgroundJobSerializer, query_list
 
 
 # ============ Template Views ============
 
 class AuditTemplateViewSet(viewsets.ReadOnlyModelViewSet):
-    """ViewSet for AuditTemplate (read-only for now)"""
+    """ViewSet for AuditTemplate (read-only, new templates come from imports)"""
     permission_classes = [IsAuthenticated]
+    pagination_ordering = ('name', 'id')
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -51,6 +58,35 @@ class AuditTemplateViewSet(viewsets.ReadOnlyModelViewSet):
     
     def get_queryset(self):
         return AuditTemplate.objects.filter(is_active=True, is_public=True)
+    
+    @action(detail=False, methods=['post'], url_path='import', permission_classes=[IsAdminUser])
+    def import_template(self, request):
+        """
+        Import a template with its sections and questions.
+        
+        Takes a `file` upload (JSON, YAML or CSV, typed by its extension or
+        by `type`) plus the template fields missing from it, or the JSON
+        definition itself as the request body.
+        """
+        upload = request.FILES.get('file')
+        try:
+            if upload:
+                file_type = request.data.get('type') or file_type_of(upload.name)
+                template_fields = {field: request.data.get(field) for field in TEMPLATE_TEXT_FIELDS}
+                definition = parse_definition(upload.read().decode('utf-8-sig'), file_type, **template_fields)
+            else:
+                definition = request.data
+            result = import_template(definition, created_by=request.user)
+        except UnicodeDecodeError:
+            return Response({'error': 'El archivo debe estar codificado en UTF-8'}, status=status.HTTP_400_BAD_REQUEST)
+        except TemplateImportError as exc:
+            return Response({'error': 'Definición inválida', 'errors': exc.errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'template': AuditTemplateListSerializer(result['template']).data,
+            'sections': result['sections'],
+            'questions': result['questions'],
+        }, status=status.HTTP_201_CREATED)
 
 
 # ============ Audit Views ============
@@ -66,9 +102,25 @@ class AuditViewSet(viewsets.ModelViewSet):
             return CreateAuditSerializer
         return AuditSerializer
     
+    def get_nested_prefetches(self):
+        """Bulk prefetches of the nested data requested with `?expand=`"""
+        expand = query_list(self.request, 'expand')
+        prefetches = []
+        if 'answers' in expand:
+            prefetches.append(Prefetch(
+                'answers',
+                queryset=AuditAnswer.objects.select_related('question').order_by('question__section__order', 'question__order'),
+            ))
+        if 'recommendations' in expand:
+            prefetches.append(Prefetch(
+                'recommendations',
+                queryset=Recommendation.objects.select_related('section', 'question'),
+            ))
+        return prefetches
+    
     def get_queryset(self):
         user = self.request.user
-        audits = get_visible_audits(user)
+        audits = get_visible_audits(user, self.request.tenant)
         
         # Filters
         status_filter = self.request.query_params.get('status')
@@ -79,12 +131,22 @@ class AuditViewSet(viewsets.ModelViewSet):
         if template_id:
             audits = audits.filter(template_id=template_id)
         
+        search = self.request.query_params.get('search')
+        if search:
+            audits = audits.filter(name__icontains=search)
+        
         level_type = self.request.query_params.get('level_type')
         level_id = self.request.query_params.get('level_id')
         if level_type and level_id:
             filter_kwargs = {level_type + '_id': level_id}
             audits = audits.filter(**filter_kwargs)
         
+        if self.detail:
+            # Everything AuditSerializer reads, nested data only when expanded
+            audits = audits.select_related('template', 'created_by', 'assigned_to', *LEVELS).prefetch_related(
+                *self.get_nested_prefetches()
+            )
+        
         return audits.order_by('-created_at')
     
     def create(self, request, *args, **kwargs):
@@ -92,7 +154,7 @@ class AuditViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         
         data = serializer.validated_data
-        organization = get_user_organization(request.user)
+        organization = request.tenant.organization
         
         if not organization:
             return Response({'error': 'No tienes una organización'}, status=status.HTTP_400_BAD_REQUEST)
@@ -146,7 +208,14 @@ class AuditViewSet(viewsets.ModelViewSet):
         
         audit = Audit.objects.create(**audit_data)
         
-        return Response(AuditSerializer(audit).data, status=status.HTTP_201_CREATED)
+        return Response(AuditSerializer(audit, context=self.get_serializer_context()).data, status=status.HTTP_201_CREATED)
+    
+    def perform_destroy(self, instance):
+        instance.delete()
+        # Drop the audit from the score trends and scorecards it counted for
+        if instance.status == 'completed':
+            refresh_audit_rollups(instance)
+            refresh_audit_scorecards(instance)
     
     @action(detail=True, methods=['post'])
     def start(self, request, pk=None):
@@ -159,42 +228,86 @@ class AuditViewSet(viewsets.ModelViewSet):
         audit.status = 'in_progress'
         audit.save()
         
-        return Response(AuditSerializer(audit).data)
+        return Response(AuditSerializer(audit, context=self.get_serializer_context()).data)
     
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
-        """Complete an audit"""
+        """
+        Complete an audit.
+        
+        Final scoring, recommendations and statistics refresh run in a
+        background job; poll `completion/` for its status.
+        """
         audit = self.get_object()
         
         if audit.status != 'in_progress':
             return Response({'error': 'Solo se pueden completar auditorías en progreso'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Calculate final score
-        audit.score = calculate_audit_score(audit)
         audit.status = 'completed'
         audit.completed_at = timezone.now()
-        audit.save()
+        audit.save(update_fields=['status', 'completed_at', 'updated_at'])
         
-        # Generate recommendations
-        generate_recommendations(audit)
+        job, _ = enqueue_completion(audit.id)
+        # Reload with the serializer relations, the job may already have run
+        audit = self.get_queryset().get(pk=audit.pk)
         
-        return Response(AuditSerializer(audit).data)
+        data = AuditSerializer(audit, context=self.get_serializer_context()).data
+        data['completion_job'] = BackgroundJobSerializer(job).data
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['get'])
+    def completion(self, request, pk=None):
+        """Status of the completion job of an audit"""
+        audit = self.get_object()
+        job = get_latest_job(COMPLETE_AUDIT, completion_key(audit.id))
+        
+        if not job:
+            return Response({'error': 'La auditoría no tiene un proceso de cierre'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response(BackgroundJobSerializer(job).data)
+    
+    @action(detail=True, methods=['post'], url_path='completion/retry')
+    def retry_completion(self, request, pk=None):
+        """Enqueue again the completion job of a completed audit after it failed for good"""
+        audit = self.get_object()
+        job = get_latest_job(COMPLETE_AUDIT, completion_key(audit.id))
+        
+        if audit.status != 'completed' or not job or job.status != 'failed':
+            return Response({'error': 'Solo se puede reintentar un proceso de cierre fallido'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        job, _ = enqueue_completion(audit.id)
+        return Response(BackgroundJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
     
     @action(detail=True, methods=['get'])
     def questions(self, request, pk=None):
-        """Get all questions for an audit"""
+        """
+        Get all questions for an audit, with the current answer of each one.
+        
+        Query budget, 4 whatever the number of questions (checked by
+        AuditQuestionsTests): the audit lookup, 1 for sections, 1 for their
+        prefetched questions and 1 for the answers of the audit, merged in
+        memory by question id. One more when the tenant context of the
+        user is not cached yet.
+        """
         audit = self.get_object()
-        sections = audit.template.sections.all().order_by('order')
+        sections = QuestionSection.objects.filter(template_id=audit.template_id).prefetch_related(
+            Prefetch('questions', queryset=Question.objects.order_by('order'))
+        ).order_by('order')
+        
+        answers = {answer.question_id: answer for answer in audit.answers.all()}
         
         data = []
         for section in sections:
             section_data = QuestionSectionSerializer(section).data
+            questions = {question.id: question for question in section.questions.all()}
             
             # Add answered status to each question
             for question_data in section_data['questions']:
-                answer = audit.answers.filter(question_id=question_data['id']).first()
+                answer = answers.get(question_data['id'])
                 question_data['answered'] = answer is not None
                 if answer:
+                    # Reuse the prefetched question, avoids a lazy lookup per answer
+                    answer.question = questions[answer.question_id]
                     question_data['answer'] = AuditAnswerSerializer(answer).data
             
             data.append(section_data)
@@ -209,46 +322,80 @@ class AuditViewSet(viewsets.ModelViewSet):
         if audit.status == 'completed':
             return Response({'error': 'No se pueden modificar auditorías completadas'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Auto-start if in draft
-        if audit.status == 'draft':
-            audit.status = 'in_progress'
-        
         serializer = SubmitAnswerSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
         
-        # Get question
-        try:
-            question = Question.objects.get(id=data['question_id'], section__template=audit.template)
-        except Question.DoesNotExist:
+        # Check question belongs to the template
+        plan = get_scoring_plan(audit.template_id)
+        question_id = data['question_id']
+        if question_id not in plan:
             return Response({'error': 'Pregunta no encontrada'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Create or update answer
-        answer, created = AuditAnswer.objects.update_or_create(
-            audit=audit,
-            question=question,
-            defaults={
-                'answer_boolean': data.get('answer_boolean'),
-                'answer_scale': data.get('answer_scale'),
-                'answer_choice': data.get('answer_choice'),
-                'answer_text': data.get('answer_text'),
-                'comments': data.get('comments'),
-                'answered_by': request.user,
-                'max_score': question.max_score * question.weight,
-            }
+        # Auto-start if in draft
+        if audit.status == 'draft':
+            audit.status = 'in_progress'
+            audit.save(update_fields=['status', 'updated_at'])
+        
+        answer_fields = {
+            'answer_boolean': data.get('answer_boolean'),
+            'answer_scale': data.get('answer_scale'),
+            'answer_choice': data.get('answer_choice'),
+            'answer_text': data.get('answer_text'),
+            'comments': data.get('comments'),
+            'answered_by': request.user,
+            'max_score': plan.max_points_for(question_id),
+        }
+        answer_fields['score'] = to_points(
+            calculate_answer_score(AuditAnswer(question_id=question_id, **answer_fields), plan)
         )
         
-        # Calculate score for this answer
-        answer.score = calculate_answer_score(answer)
-        answer.save()
-        
-        # Update audit progress
-        audit.answered_questions = audit.answers.count()
-        audit.score = calculate_audit_score(audit)
-        audit.save()
+        with transaction.atomic():
+            # Previous score of this answer, to apply only the delta to the audit
+            previous = AuditAnswer.objects.select_for_update().filter(
+                audit=audit, question_id=question_id
+            ).values_list('score', 'max_score').first()
+            
+            # Create or update answer
+            answer, created = AuditAnswer.objects.update_or_create(
+                audit=audit,
+                question_id=question_id,
+                defaults=answer_fields,
+            )
+            
+            # Update audit progress
+            apply_answer_delta(audit, previous, answer, created)
         
         return Response(AuditAnswerSerializer(answer).data)
     
+    @action(detail=True, methods=['post'], url_path='answers/batch')
+    def answers_batch(self, request, pk=None):
+        """Submit many answers at once (offline sync of whole sections)"""
+        audit = self.get_object()
+        
+        if audit.status == 'completed':
+            return Response({'error': 'No se pueden modificar auditorías completadas'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = SubmitAnswersBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        answers_data = serializer.validated_data['answers']
+        
+        invalid_ids = save_answers_batch(audit, answers_data, request.user)
+        if invalid_ids:
+            return Response({
+                'error': 'Preguntas no encontradas en la plantilla',
+                'invalid_question_ids': invalid_ids,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'saved_answers': len(answers_data),
+            'status': audit.status,
+            'answered_questions': audit.answered_questions,
+            'total_questions': audit.total_questions,
+            'progress_percentage': audit.progress_percentage,
+            'score': audit.score,
+        })
+    
     @action(detail=True, methods=['get'])
     def results(self, request, pk=None):
         """Get audit results"""
@@ -271,6 +418,48 @@ class AuditViewSet(viewsets.ModelViewSet):
         audit = self.get_object()
         answers = audit.answers.all().order_by('question__section__order', 'question__order')
         return Response(AuditAnswerSerializer(answers, many=True).data)
+    
+    @action(detail=True, methods=['get'], url_path=r'export/(?P<file_type>csv|xlsx)')
+    def export(self, request, file_type, pk=None):
+        """
+        Export the answers, section scores and recommendations of an audit.
+        
+        CSV carries one `?dataset=` (answers by default), XLSX one sheet per
+        dataset (all by default).
+        """
+        audit = self.get_object()
+        return self._export(Audit.objects.filter(pk=audit.pk), file_type, f'auditoria-{audit.code}')
+    
+    @action(detail=False, methods=['get'], url_path=r'export/(?P<file_type>csv|xlsx)')
+    def export_all(self, request, file_type):
+        """Export every visible audit, filtered like the list and by `?year=`"""
+        audits = self.get_queryset()
+        
+        year = request.query_params.get('year')
+        if year:
+            if not year.isdigit():
+                return Response({'error': 'Año inválido'}, status=status.HTTP_400_BAD_REQUEST)
+            audits = audits.filter(created_at__year=int(year))
+        
+        return self._export(audits, file_type, f'auditorias-{year or timezone.localdate().isoformat()}')
+    
+    def _export(self, audits, file_type, filename):
+        datasets = query_list(self.request, 'dataset')
+        if not datasets <= DATASETS.keys():
+            return Response(
+                {'error': f'Conjunto de datos inválido, opciones: {", ".join(DATASETS)}'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        
+        if file_type == 'csv':
+            if len(datasets) > 1:
+                return Response({'error': 'El CSV exporta un solo conjunto de datos'}, status=status.HTTP_400_BAD_REQUEST)
+            dataset = datasets.pop() if datasets else 'answers'
+            return csv_response(dataset, audits, f'{filename}-{dataset}')
+        
+        if Workbook is None:
+            return Response({'error': 'Exportación XLSX no disponible'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return xlsx_response([name for name in DATASETS if not datasets or name in datasets], audits, filename)
 
 
 # ============ Recommendations Views ============
@@ -279,12 +468,17 @@ class RecommendationViewSet(viewsets.ModelViewSet):
     """ViewSet for Recommendations"""
     permission_classes = [IsAuthenticated]
     serializer_class = RecommendationSerializer
+    pagination_ordering = ('priority', '-created_at', '-id')
     
     def get_queryset(self):
         user = self.request.user
-        audits = get_visible_audits(user)
+        audits = get_visible_audits(user, self.request.tenant)
         return Recommendation.objects.filter(audit__in=audits)
     
+    def perform_create(self, serializer):
+        # Created by hand, automatic regeneration leaves it alone
+        serializer.save(rule='manual')
+    
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
         """Update recommendation status"""
@@ -303,7 +497,12 @@ class RecommendationViewSet(viewsets.ModelViewSet):
 # ============ Comparison Views ============
 
 class AuditComparisonView(APIView):
-    """Compare multiple audits"""
+    """
+    Compare multiple audits of the same template.
+    
+    Query params: audit_ids (comma separated, up to COMPARISON_MAX_AUDITS),
+    and optionally page/page_size to paginate the audits axis.
+    """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
@@ -313,12 +512,16 @@ class AuditComparisonView(APIView):
         if len(audit_ids) < 2:
             return Response({'error': 'Se necesitan al menos 2 auditorías para comparar'}, status=status.HTTP_400_BAD_REQUEST)
         
-        if len(audit_ids) > 5:
-            return Response({'error': 'Máximo 5 auditorías para comparar'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(audit_ids) > settings.COMPARISON_MAX_AUDITS:
+            return Response({'error': f'Máximo {settings.COMPARISON_MAX_AUDITS} auditorías para comparar'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Get visible audits
-        visible_audits = get_visible_audits(request.user)
-        audits = list(visible_audits.filter(id__in=audit_ids, status='completed'))
+        visible_audits = get_visible_audits(request.user, request.tenant)
+        audits = list(
+            visible_audits.filter(id__in=audit_ids, status='completed')
+            .select_related('template', 'created_by', 'assigned_to', 'company', 'branch', 'department', 'team', 'subteam')
+            .order_by('-created_at', '-id')  # Newest first like the audit list, id keeps pages stable
+        )
         
         if len(audits) < 2:
             return Response({'error': 'No se encontraron suficientes auditorías completadas'}, status=status.HTTP_404_NOT_FOUND)
@@ -328,15 +531,34 @@ class AuditComparisonView(APIView):
         if len(templates) > 1:
             return Response({'error': 'Solo se pueden comparar auditorías de la misma plantilla'}, status=status.HTTP_400_BAD_REQUEST)
         
-        comparison = get_comparison_data(audits)
-        
-        return Response({
+        # Optional pagination over the audits axis
+        page_size = request.query_params.get('page_size', '')
+        page = request.query_params.get('page', '1')
+        if page_size.isdigit() and int(page_size) > 0:
+            page_size = int(page_size)
+            page = int(page) if page.isdigit() and int(page) > 0 else 1
+            comparison = get_comparison_data(audits, offset=(page - 1) * page_size, limit=page_size)
+        else:
+            page_size = None
+            comparison = get_comparison_data(audits)
+        
+        data = {
             'audits': AuditListSerializer(comparison['audits'], many=True).data,
             'sections_comparison': comparison['sections_comparison'],
             'average_score': comparison['average_score'],
             'best_audit': comparison['best_audit'],
             'worst_audit': comparison['worst_audit'],
-        })
+        }
+        
+        if page_size:
+            data['pagination'] = {
+                'page': page,
+                'page_size': page_size,
+                'total_audits': len(audits),
+                'total_pages': (len(audits) + page_size - 1) // page_size,
+            }
+        
+        return Response(data)
 
 
 # ============ Statistics Views ============
@@ -346,64 +568,264 @@ class AuditStatisticsView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        stats = get_audit_statistics(request.user)
+        organization = request.tenant.organization
+        cache_key = versioned_key(STATISTICS_CACHE, organization.id if organization else None, request.user.id)
+        
+        data = cache.get(cache_key)
+        if data is None:
+            stats = get_audit_statistics(request.user, request.tenant)
+            data = {
+                'total_audits': stats['total_audits'],
+                'completed_audits': stats['completed_audits'],
+                'in_progress_audits': stats['in_progress_audits'],
+                'draft_audits': stats['draft_audits'],
+                'average_score': stats['average_score'],
+                'audits_by_status': stats['audits_by_status'],
+                'audits_by_level': stats['audits_by_level'],
+                'recent_audits': AuditListSerializer(stats['recent_audits'], many=True).data,
+                'score_trend': stats['score_trend'],
+            }
+            cache.set(cache_key, data, settings.STATISTICS_CACHE_TIMEOUT)
+        
+        return Response(data)
+
+
+def parse_period(params):
+    """
+    (date_from, date_to) of the query params, by default the last
+    TREND_DEFAULT_DAYS days; None for the invalid dates.
+    """
+    try:
+        date_to = parse_date(params['date_to']) if params.get('date_to') else timezone.localdate()
+        date_from = parse_date(params['date_from']) if params.get('date_from') else date_to and date_to - timedelta(days=TREND_DEFAULT_DAYS)
+    except ValueError:
+        return None, None
+    return date_from, date_to
+
+
+class ScoreTrendView(APIView):
+    """
+    Score trend of a unit per day, week or month, read from the daily rollup.
+    
+    Query params: level (organization, company, ..., default: the unit of
+    the user), level_id, template, granularity (day/week/month, default
+    month), date_from and date_to (YYYY-MM-DD, default the last
+    TREND_DEFAULT_DAYS days).
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        tenant = request.tenant
+        params = request.query_params
+        
+        granularity = params.get('granularity', 'month')
+        if granularity not in GRANULARITIES:
+            return Response({'error': f'Granularidad inválida, opciones: {", ".join(GRANULARITIES)}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        level = params.get('level')
+        level_id = params.get('level_id')
+        if not level:
+            if tenant.owns_organization:
+                level, level_id = 'organization', tenant.organization_id
+            elif tenant.unit:
+                level, level_id = tenant.unit
+            else:
+                return Response({'error': 'No tienes una unidad asignada'}, status=status.HTTP_403_FORBIDDEN)
+        
+        if level not in UNIT_TYPES or not str(level_id or '').isdigit():
+            return Response({'error': 'Nivel inválido'}, status=status.HTTP_400_BAD_REQUEST)
+        level_id = int(level_id)
+        
+        if level == 'organization':
+            allowed = tenant.owns_organization and level_id == tenant.organization_id
+        else:
+            visible = tenant.visible_unit_ids(level)
+            allowed = visible is not None and LEVEL_MODELS[level].objects.filter(id=level_id, id__in=visible).exists()
+        if not allowed:
+            return Response({'error': 'No tienes acceso a esta unidad'}, status=status.HTTP_403_FORBIDDEN)
+        
+        date_from, date_to = parse_period(params)
+        if date_from is None or date_to is None:
+            return Response({'error': 'Fecha inválida, usa YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        template_id = params.get('template') or None
+        if template_id is not None:
+            if not template_id.isdigit():
+                return Response({'error': 'Plantilla inválida'}, status=status.HTTP_400_BAD_REQUEST)
+            template_id = int(template_id)
         
         return Response({
-            'total_audits': stats['total_audits'],
-            'completed_audits': stats['completed_audits'],
-            'in_progress_audits': stats['in_progress_audits'],
-            'draft_audits': stats['draft_audits'],
-            'average_score': stats['average_score'],
-            'audits_by_status': stats['audits_by_status'],
-            'audits_by_level': stats['audits_by_level'],
-            'recent_audits': AuditListSerializer(stats['recent_audits'], many=True).data,
-            'score_trend': stats['score_trend'],
+            'level': level,
+            'level_id': level_id,
+            'granularity': granularity,
+            'date_from': date_from,
+            'date_to': date_to,
+            'trend': get_score_trend(level, level_id, granularity, template_id, date_from, date_to),
         })
 
 
+class SectionStatisticsView(APIView):
+    """
+    Percentage of each section of a template over the visible completed
+    audits, read from the stored section totals.
+    
+    Query params: template (required), group_by (company, branch,
+    department or team) to list the units of each section, worst first.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        template_id = request.query_params.get('template', '')
+        if not template_id.isdigit() or not AuditTemplate.objects.filter(pk=template_id).exists():
+            return Response({'error': 'Plantilla inválida'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        group_by = request.query_params.get('group_by') or None
+        if group_by and group_by not in Audit.SCOPE_LEVELS:
+            return Response({'error': f'Agrupación inválida, opciones: {", ".join(Audit.SCOPE_LEVELS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        organization = request.tenant.organization
+        cache_key = versioned_key(STATISTICS_CACHE, organization.id if organization else None, request.user.id, 'sections', template_id, group_by)
+        
+        data = cache.get(cache_key)
+        if data is None:
+            data = {
+                'template': int(template_id),
+                'group_by': group_by,
+                'sections': get_section_statistics(get_visible_audits(request.user, request.tenant), int(template_id), group_by),
+            }
+            cache.set(cache_key, data, settings.STATISTICS_CACHE_TIMEOUT)
+        
+        return Response(data)
+
+
+class QuestionStatisticsView(APIView):
+    """
+    Failure rate, "No" rate, mean scale value, coverage and trend of each
+    question of a template over the visible completed audits.
+    
+    Query params: template (required), level and level_id to restrict to
+    an organizational subtree, date_from and date_to (YYYY-MM-DD, default
+    the last TREND_DEFAULT_DAYS days, on the completion date).
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        params = request.query_params
+        template_id = params.get('template', '')
+        if not template_id.isdigit() or not AuditTemplate.objects.filter(pk=template_id).exists():
+            return Response({'error': 'Plantilla inválida'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        audits = get_visible_audits(request.user, request.tenant)
+        level = params.get('level')
+        level_id = params.get('level_id', '')
+        if level:
+            if level not in UNIT_TYPES or not level_id.isdigit():
+                return Response({'error': 'Nivel inválido'}, status=status.HTTP_400_BAD_REQUEST)
+            lookup = 'organization_id' if level == 'organization' else Audit.scope_lookup(level)
+            audits = audits.filter(**{lookup: level_id})
+        
+        date_from, date_to = parse_period(params)
+        if date_from is None or date_to is None:
+            return Response({'error': 'Fecha inválida, usa YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        organization = request.tenant.organization
+        cache_key = versioned_key(
+            STATISTICS_CACHE, organization.id if organization else None, request.user.id,
+            'questions', template_id, level, level_id, date_from, date_to,
+        )
+        
+        data = cache.get(cache_key)
+        if data is None:
+            data = {
+                'template': int(template_id),
+                'level': level,
+                'level_id': int(level_id) if level else None,
+                'date_from': date_from,
+                'date_to': date_to,
+                **get_question_statistics(audits, int(template_id), date_from, date_to),
+            }
+            cache.set(cache_key, data, settings.STATISTICS_CACHE_TIMEOUT)
+        
+        return Response(data)
+
+
+class ScoreDistributionView(APIView):
+    """
+    Score histograms, percentiles (p10/p50/p90) and standard deviation of
+    the visible completed audits of a template, overall and per company,
+    branch and department.
+    
+    Query params: template (required), date_from and date_to (YYYY-MM-DD,
+    default the last TREND_DEFAULT_DAYS days, on the completion date).
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        params = request.query_params
+        template_id = params.get('template', '')
+        if not template_id.isdigit() or not AuditTemplate.objects.filter(pk=template_id).exists():
+            return Response({'error': 'Plantilla inválida'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        date_from, date_to = parse_period(params)
+        if date_from is None or date_to is None:
+            return Response({'error': 'Fecha inválida, usa YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Keyed by what the user sees, so users of the same scope share the entry
+        tenant = request.tenant
+        cache_key = versioned_key(
+            STATISTICS_CACHE, tenant.organization_id, *tenant.visibility_scope,
+            'distribution', template_id, date_from, date_to,
+        )
+        
+        data = cache.get(cache_key)
+        if data is None:
+            data = {
+                'template': int(template_id),
+                'date_from': date_from,
+                'date_to': date_to,
+                **get_score_distribution(get_visible_audits(request.user, request.tenant), int(template_id), date_from, date_to),
+            }
+            cache.set(cache_key, data, settings.STATISTICS_CACHE_TIMEOUT)
+        
+        return Response(data)
+
+
 class DashboardView(APIView):
     """Dashboard data combining stats and hierarchy info"""
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
         user = request.user
-        organization = get_user_organization(user)
+        organization = request.tenant.organization
         
         if not organization:
             return Response({'error': 'No tienes una organización'}, status=status.HTTP_404_NOT_FOUND)
         
         # Get audit stats
-        audit_stats = get_audit_statistics(user)
+        audit_stats = get_audit_statistics(user, request.tenant)
+        audit_stats['recent_audits'] = AuditListSerializer(audit_stats['recent_audits'], many=True).data
         
         # Get hierarchy stats
-        from apps.core.models import Company, Branch, Department, Team, SubTeam
-        
+        units_count = count_descendants('organization', organization.id)
         hierarchy_stats = {
-            'companies_count': Company.objects.filter(organization=organization, is_active=True).count(),
-            'branches_count': Branch.objects.filter(company__organization=organization, is_active=True).count(),
-            'departments_count': Department.objects.filter(branch__company__organization=organization, is_active=True).count(),
-            'teams_count': Team.objects.filter(department__branch__company__organization=organization, is_active=True).count(),
+            'companies_count': units_count['company'],
+            'branches_count': units_count['branch'],
+            'departments_count': units_count['department'],
+            'teams_count': units_count['team'],
         }
         
         # Get company scores for owner
         companies_scores = []
         if user.user_type == 'owner':
             companies = Company.objects.filter(organization=organization, is_active=True)
+            scores = unit_scores(organization.id, 'company')
             for company in companies:
-                company_audits = Audit.objects.filter(
-                    Q(company=company) |
-                    Q(branch__company=company) |
-                    Q(department__branch__company=company) |
-                    Q(team__department__branch__company=company) |
-                    Q(subteam__team__department__branch__company=company),
-                    status='completed'
-                )
-                avg_score = company_audits.aggregate(avg=models.Avg('score'))['avg'] or 0
+                company_scores = scores.get(('company', company.id), {'audits_count': 0, 'average_score': 0})
                 companies_scores.append({
                     'id': company.id,
                     'name': company.name,
-                    'audits_count': company_audits.count(),
-                    'average_score': round(float(avg_score), 2),
+                    'audits_count': company_scores['audits_count'],
+                    'average_score': company_scores['average_score'],
                 })
         
         return Response({
@@ -0,0 +1,31 @@
+"""
+Tests of the authentication API views.
+"""
+from apps.authentication.models import User
+from apps.core.models import UserAssignment
+from apps.core.tests.base import OrganizationTestCase
+
+
+class MeViewTests(OrganizationTestCase):
+
+    def test_owner_gets_organization_and_own_assignment(self):
+        self.assertNotIn('assignment', self.client.get('/api/auth/me/').data)
+        
+        assignment = UserAssignment.objects.create(
+            user=self.owner, organization=self.organization, company=self.company, role='manager',
+        )
+        
+        data = self.client.get('/api/auth/me/').data
+        self.assertEqual(data['organization']['id'], self.organization.id)
+        self.assertEqual(data['assignment']['id'], assignment.id)
+    
+    def test_employee_gets_assignment(self):
+        employee = User.objects.create_user('employee@test.com', 'test123', full_name='Employee')
+        assignment = UserAssignment.objects.create(
+            user=employee, organization=self.organization, branch=self.branch,
+        )
+        self.client.force_authenticate(employee)
+        
+        data = self.client.get('/api/auth/me/').data
+        self.assertNotIn('organization', data)
+        self.assertEqual(data['assignment']['id'], assignment.id)
@@ -78,16 +78,20 @@ class MeView(APIView):
         user = request.user
         data = UserSerializer(user).data
         
+        tenant = request.tenant
+        
         # Add organization data
-        if user.user_type == 'owner' and hasattr(user, 'organization'):
-            data['organization'] = OrganizationSerializer(user.organization).data
+        if tenant.owns_organization:
+            data['organization'] = OrganizationSerializer(tenant.organization).data
         
-        # Add assignment data if employee
-        if hasattr(user, 'assignments'):
+        # Add assignment data; owners see their whole organization, so the tenant
+        # context leaves out their assignment, but they may still have one
+        assignment = tenant.assignment
+        if assignment is None and tenant.owns_organization:
+            assignment = user.assignments.filter(is_active=True).first()
+        if assignment:
             from apps.core.serializers import UserAssignmentSerializer
-            assignments = user.assignments.filter(is_active=True)
-            if assignments.exists():
-                data['assignment'] = UserAssignmentSerializer(assignments.first()).data
+            data['assignment'] = UserAssignmentSerializer(assignment).data
         
         return Response(data)
     
@@ -122,18 +126,9 @@ class OrganizationView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        user = request.user
-        
-        if user.user_type == 'owner' and hasattr(user, 'organization'):
-            organization = user.organization
-        elif hasattr(user, 'assignments'):
-            assignment = user.assignments.filter(is_active=True).first()
-            if assignment:
-                organization = assignment.organization
-            else:
-                return Response({'error': 'No tienes una organización asignada'}, status=status.HTTP_404_NOT_FOUND)
-        else:
-            return Response({'error': 'No tienes una organización'}, status=status.HTTP_404_NOT_FOUND)
+        organization = request.tenant.organization
+        if not organization:
+            return Response({'error': 'No tienes una organización asignada'}, status=status.HTTP_404_NOT_FOUND)
         
         return Response(OrganizationSerializer(organization).data)
     
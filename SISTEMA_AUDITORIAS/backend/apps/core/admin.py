@@ -2,7 +2,7 @@
 Admin configuration for core app.
 """
 from django.contrib import admin
-from .models import Company, Branch, Department, Team, SubTeam, UserAssignment, Invitation
+from .models import Company, Branch, Department, Team, SubTeam, UserAssignment, Invitation, BackgroundJob
 
 
 @admin.register(Company)
@@ -52,3 +52,10 @@ class InvitationAdmin(admin.ModelAdmin):
     list_display = ['to_email', 'organization', 'role', 'status', 'created_at']
     list_filter = ['status', 'role']
     search_fields = ['to_email']
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'key', 'status', 'attempts', 'run_after', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    search_fields = ['key']
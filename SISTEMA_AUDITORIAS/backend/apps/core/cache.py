@@ -0,0 +1,42 @@
+"""
+Versioned cache helpers.
+
+Cached data of a namespace (statistics, hierarchy tree...) is keyed with a
+per-organization version number; bumping the version invalidates every
+entry of that namespace for the organization at once, from any process.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def _version_key(namespace, organization_id):
+    return f'{namespace}:version:{organization_id}'
+
+
+def get_cache_version(namespace, organization_id):
+    """Current version of a namespace for an organization"""
+    key = _version_key(namespace, organization_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from a timestamp so a lost version never reuses old entries
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_cache_version(namespace, organization_id):
+    """Invalidate all cached entries of a namespace for an organization"""
+    key = _version_key(namespace, organization_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = int(time.time() * 1000)
+        cache.set(key, version, None)
+        return version
+
+
+def versioned_key(namespace, organization_id, *parts):
+    """Cache key for an entry of a namespace, bound to its current version"""
+    version = get_cache_version(namespace, organization_id)
+    return ':'.join(str(part) for part in (namespace, organization_id, version, *parts))
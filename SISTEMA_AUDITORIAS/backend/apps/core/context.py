@@ -0,0 +1,118 @@
+"""
+Tenant context of the authenticated user.
+
+Resolves once per request the organization of the user, their active
+assignment and the hierarchy units they can see, instead of every view,
+permission and service looking them up again. Views read it as
+`request.tenant` (see middleware.py) and hand it to the services. The
+context is memoized on the user instance (a fresh one per request) and,
+optionally, cached across requests under a per-user version bumped by
+signals whenever the user, their assignments or their organization change.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import bump_cache_version, versioned_key
+from .hierarchy import LEVELS, subtree_ids
+
+# Cache namespace of tenant contexts, versioned per user
+TENANT_CACHE = 'tenant_context'
+
+
+class TenantContext:
+    """Organization, active assignment and visible units of a user"""
+    
+    def __init__(self, user, organization, assignment, is_manager):
+        self.user_id = user.pk
+        self.user_type = user.user_type
+        self.organization = organization
+        self.assignment = assignment
+        self.is_manager = is_manager
+    
+    @property
+    def organization_id(self):
+        return self.organization.pk if self.organization else None
+    
+    @property
+    def is_owner(self):
+        return self.user_type == 'owner'
+    
+    @property
+    def owns_organization(self):
+        """Owner of the organization, who sees all of it"""
+        return self.is_owner and self.assignment is None and self.organization is not None
+    
+    @property
+    def unit(self):
+        """(level, id) of the assigned unit, or None"""
+        if self.assignment is None:
+            return None
+        for level in LEVELS:
+            unit_id = getattr(self.assignment, f'{level}_id')
+            if unit_id:
+                return level, unit_id
+        return None
+    
+    @property
+    def visibility_scope(self):
+        """
+        (kind, id) naming what the user sees: the organization for owners,
+        the assigned unit's subtree, or only their own audits. Users of the
+        same scope see the same audits, so it can key shared cache entries.
+        """
+        if self.owns_organization:
+            return 'organization', self.organization.pk
+        return self.unit or ('user', self.user_id)
+    
+    def visible_unit_ids(self, level):
+        """
+        Subquery of the ids of the units of `level` the user can see: all of
+        the organization for owners, the subtree of the assigned unit
+        otherwise. None when the user sees no unit at all.
+        """
+        if self.owns_organization:
+            return subtree_ids('organization', self.organization.pk, level)
+        if self.unit:
+            return subtree_ids(*self.unit, level)
+        return None
+
+
+def resolve_tenant_context(user):
+    """Build the tenant context of a user from the database"""
+    # Owners see their whole organization, assignments don't matter
+    if user.user_type == 'owner' and hasattr(user, 'organization'):
+        return TenantContext(user, user.organization, None, True)
+    
+    assignments = list(user.assignments.filter(is_active=True).select_related('organization').order_by('pk'))
+    assignment = assignments[0] if assignments else None
+    return TenantContext(
+        user,
+        assignment.organization if assignment else None,
+        assignment,
+        user.user_type == 'owner' or any(a.role == 'manager' for a in assignments),
+    )
+
+
+def get_tenant_context(user):
+    """Tenant context of a user, resolved at most once per user instance"""
+    context = getattr(user, '_tenant_context', None)
+    if context is not None:
+        return context
+    
+    timeout = settings.TENANT_CONTEXT_CACHE_TIMEOUT
+    if timeout:
+        cache_key = versioned_key(TENANT_CACHE, user.pk)
+        context = cache.get(cache_key)
+        if context is None:
+            context = resolve_tenant_context(user)
+            cache.set(cache_key, context, timeout)
+    else:
+        context = resolve_tenant_context(user)
+    
+    user._tenant_context = context
+    return context
+
+
+def invalidate_tenant_context(user_id):
+    """Drop the cached tenant contexts of a user"""
+    bump_cache_version(TENANT_CACHE, user_id)
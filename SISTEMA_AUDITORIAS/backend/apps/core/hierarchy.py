@@ -0,0 +1,321 @@
+"""
+Organizational hierarchy closure table.
+
+OrgUnitClosure stores every (ancestor, descendant) pair of the hierarchy
+Organization -> Company -> Branch -> Department -> Team -> SubTeam. The
+helpers here keep it in sync when units are created, moved, deactivated
+or deleted, and turn subtree filters into indexed semi-joins instead of
+OR-ed chains of joins. A descendant is flagged active only when it and
+every unit above it are active, so deactivating a unit hides its subtree.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.dispatch import Signal
+from django.db.models import Q, Count, Exists, OuterRef
+
+from .models import Company, Branch, Department, Team, SubTeam, OrgUnitClosure
+
+
+# Cache namespace of the hierarchy tree, bumped whenever a unit changes
+TREE_CACHE = 'hierarchy_tree'
+
+# Unit levels from top to bottom
+LEVELS = ['company', 'branch', 'department', 'team', 'subteam']
+
+LEVEL_MODELS = {
+    'company': Company,
+    'branch': Branch,
+    'department': Department,
+    'team': Team,
+    'subteam': SubTeam,
+}
+
+# Sent with (level, instance) after a unit was moved under another parent,
+# once the closure rows of its subtree were re-linked
+unit_moved = Signal()
+
+# Foreign key to the parent unit of each level
+PARENT_FIELDS = {
+    'company': ('organization', 'organization_id'),
+    'branch': ('company', 'company_id'),
+    'department': ('branch', 'branch_id'),
+    'team': ('department', 'department_id'),
+    'subteam': ('team', 'team_id'),
+}
+
+
+def level_of(instance):
+    """Level name of a unit instance"""
+    for level, model in LEVEL_MODELS.items():
+        if isinstance(instance, model):
+            return level
+    raise ValueError(f'{type(instance).__name__} no es una unidad organizacional')
+
+
+def parent_of(level, instance):
+    """(type, id) of the parent of a unit"""
+    parent_type, field = PARENT_FIELDS[level]
+    return parent_type, getattr(instance, field)
+
+
+# ============ Queries ============
+
+def subtree_ids(ancestor_type, ancestor_id, descendant_type, active_only=False):
+    """
+    Subquery of the ids of `descendant_type` units in the subtree of a unit
+    (the unit itself included). Use it as `<fk>__in=` for a semi-join.
+    `active_only` leaves out inactive units and those under inactive units.
+    """
+    queryset = OrgUnitClosure.objects.filter(
+        ancestor_type=ancestor_type,
+        ancestor_id=ancestor_id,
+        descendant_type=descendant_type,
+    )
+    if active_only:
+        queryset = queryset.filter(descendant_active=True)
+    return queryset.values('descendant_id')
+
+
+def subtree_filter(ancestor_type, ancestor_id, prefix=''):
+    """
+    Condition for rows linked to any unit of the subtree of a unit through
+    the company/branch/department/team/subteam foreign keys (Audit,
+    UserAssignment, Invitation...): one EXISTS probe of the closure table,
+    each of its branches an exact lookup on its unique index.
+    """
+    start = LEVELS.index(ancestor_type) if ancestor_type in LEVELS else 0
+    links = Q(pk__in=[])
+    for level in LEVELS[start:]:
+        links |= Q(descendant_type=level, descendant_id=OuterRef(f'{prefix}{level}_id'))
+    return Exists(OrgUnitClosure.objects.filter(links, ancestor_type=ancestor_type, ancestor_id=ancestor_id))
+
+
+def ancestor_ids(unit_type, unit_id):
+    """{type: id} of the ancestors of a unit, itself and the organization included"""
+    return dict(
+        OrgUnitClosure.objects.filter(descendant_type=unit_type, descendant_id=unit_id)
+        .values_list('ancestor_type', 'ancestor_id')
+    )
+
+
+def bulk_ancestor_ids(units):
+    """{(unit_type, unit_id): {type: id}} of the ancestors of many units, in one query"""
+    condition = Q(pk__in=[])
+    for unit_type, unit_id in units:
+        condition |= Q(descendant_type=unit_type, descendant_id=unit_id)
+    
+    ancestors = defaultdict(dict)
+    for unit_type, unit_id, ancestor_type, ancestor_id in OrgUnitClosure.objects.filter(condition).values_list(
+        'descendant_type', 'descendant_id', 'ancestor_type', 'ancestor_id',
+    ):
+        ancestors[(unit_type, unit_id)][ancestor_type] = ancestor_id
+    return ancestors
+
+
+def organization_of(instance):
+    """Id of the organization of a unit instance"""
+    level = level_of(instance)
+    if level == 'company':
+        return instance.organization_id
+    return ancestor_ids(level, instance.pk).get('organization')
+
+
+def count_descendants(ancestor_type, ancestor_id, active_only=True):
+    """
+    Number of units of each level below a unit, from one grouped query;
+    `active_only` leaves out inactive units and those under inactive units.
+    """
+    queryset = OrgUnitClosure.objects.filter(
+        ancestor_type=ancestor_type,
+        ancestor_id=ancestor_id,
+        depth__gt=0,
+    )
+    if active_only:
+        queryset = queryset.filter(descendant_active=True)
+    
+    counts = dict.fromkeys(LEVELS, 0)
+    for row in queryset.values('descendant_type').annotate(total=Count('id')).order_by():
+        counts[row['descendant_type']] = row['total']
+    return counts
+
+
+# ============ Maintenance ============
+
+def _units_q(prefix, units):
+    """Q matching (type, id) pairs of units on the `prefix` side of closure rows"""
+    ids_by_type = defaultdict(list)
+    for unit_type, unit_id in units:
+        ids_by_type[unit_type].append(unit_id)
+    
+    condition = Q(pk__in=[])
+    for unit_type, ids in ids_by_type.items():
+        condition |= Q(**{f'{prefix}_type': unit_type, f'{prefix}_id__in': ids})
+    return condition
+
+
+def _ancestors(unit_type, unit_id):
+    """[(type, id, depth)] of the ancestors of a unit, itself included at depth 0"""
+    if unit_type == 'organization':
+        return [('organization', unit_id, 0)]
+    return list(
+        OrgUnitClosure.objects.filter(descendant_type=unit_type, descendant_id=unit_id)
+        .values_list('ancestor_type', 'ancestor_id', 'depth')
+    )
+
+
+def _active_flag():
+    """
+    descendant_active of a closure row: no unit among the ancestors of its
+    descendant, the descendant included, is inactive
+    """
+    inactive = Q(pk__in=[])
+    for level, model in LEVEL_MODELS.items():
+        inactive |= Q(Exists(model.objects.filter(pk=OuterRef('ancestor_id'), is_active=False)), ancestor_type=level)
+    return ~Exists(OrgUnitClosure.objects.filter(
+        inactive,
+        descendant_type=OuterRef('descendant_type'),
+        descendant_id=OuterRef('descendant_id'),
+    ))
+
+
+def sync_unit(instance):
+    """
+    Bring the closure rows of a unit up to date after it was saved: insert
+    them for a new unit, re-link its whole subtree when its parent changed
+    and, when its active flag may have changed, refresh the flag of its
+    whole subtree in one UPDATE.
+    """
+    level = level_of(instance)
+    parent = parent_of(level, instance)
+    current = (
+        OrgUnitClosure.objects.filter(descendant_type=level, descendant_id=instance.pk, depth=1)
+        .values_list('ancestor_type', 'ancestor_id', 'descendant_active')
+        .first()
+    )
+    
+    with transaction.atomic():
+        if current is None:
+            _insert_unit(level, instance, parent)
+        elif current[:2] != parent:
+            _move_subtree(level, instance, parent)
+            unit_moved.send(sender=type(instance), level=level, instance=instance)
+        elif current[2] == instance.is_active:
+            return
+        
+        in_subtree = Exists(OrgUnitClosure.objects.filter(
+            ancestor_type=level,
+            ancestor_id=instance.pk,
+            descendant_type=OuterRef('descendant_type'),
+            descendant_id=OuterRef('descendant_id'),
+        ))
+        OrgUnitClosure.objects.filter(in_subtree).update(descendant_active=_active_flag())
+
+
+def _insert_unit(level, instance, parent):
+    # Drop leftovers of a partially synced unit before inserting
+    OrgUnitClosure.objects.filter(descendant_type=level, descendant_id=instance.pk).delete()
+    
+    rows = [
+        OrgUnitClosure(
+            ancestor_type=ancestor_type,
+            ancestor_id=ancestor_id,
+            descendant_type=level,
+            descendant_id=instance.pk,
+            depth=depth + 1,
+            descendant_active=instance.is_active,
+        )
+        for ancestor_type, ancestor_id, depth in _ancestors(*parent)
+    ]
+    rows.append(OrgUnitClosure(
+        ancestor_type=level,
+        ancestor_id=instance.pk,
+        descendant_type=level,
+        descendant_id=instance.pk,
+        depth=0,
+        descendant_active=instance.is_active,
+    ))
+    OrgUnitClosure.objects.bulk_create(rows)
+
+
+def _move_subtree(level, instance, parent):
+    subtree = list(
+        OrgUnitClosure.objects.filter(ancestor_type=level, ancestor_id=instance.pk)
+        .values_list('descendant_type', 'descendant_id', 'depth', 'descendant_active')
+    )
+    subtree_units = [(unit_type, unit_id) for unit_type, unit_id, _, _ in subtree]
+    
+    # Unlink the subtree from its old ancestors
+    OrgUnitClosure.objects.filter(_units_q('descendant', subtree_units)).exclude(
+        _units_q('ancestor', subtree_units)
+    ).delete()
+    
+    # Link every unit of the subtree to every new ancestor
+    OrgUnitClosure.objects.bulk_create([
+        OrgUnitClosure(
+            ancestor_type=ancestor_type,
+            ancestor_id=ancestor_id,
+            descendant_type=unit_type,
+            descendant_id=unit_id,
+            depth=ancestor_depth + 1 + depth,
+            descendant_active=is_active,
+        )
+        for ancestor_type, ancestor_id, ancestor_depth in _ancestors(*parent)
+        for unit_type, unit_id, depth, is_active in subtree
+    ])
+
+
+def remove_unit(instance):
+    """Delete the closure rows of a deleted unit"""
+    level = level_of(instance)
+    OrgUnitClosure.objects.filter(
+        Q(descendant_type=level, descendant_id=instance.pk) |
+        Q(ancestor_type=level, ancestor_id=instance.pk)
+    ).delete()
+
+
+def rebuild_closure(organization_ids=None, batch_size=1000):
+    """
+    Rebuild the closure table from the unit foreign keys (all
+    organizations, or only the given ones). Returns the number of rows.
+    """
+    ancestors = {}  # (type, id) -> [(type, id, depth)], itself included
+    active = {}  # (type, id) -> the unit and its ancestor units are active
+    rows = []
+    
+    for level in LEVELS:
+        parent_type, parent_field = PARENT_FIELDS[level]
+        units = LEVEL_MODELS[level].objects.all()
+        if organization_ids is not None:
+            lookup = '__'.join(LEVELS[:LEVELS.index(level)][::-1] + ['organization_id__in'])
+            units = units.filter(**{lookup: organization_ids})
+        
+        for unit_id, parent_id, is_active in units.values_list('id', parent_field, 'is_active'):
+            parent_ancestors = ancestors.get((parent_type, parent_id), [(parent_type, parent_id, 0)])
+            unit_ancestors = [(t, i, d + 1) for t, i, d in parent_ancestors] + [(level, unit_id, 0)]
+            ancestors[(level, unit_id)] = unit_ancestors
+            is_active = is_active and active.get((parent_type, parent_id), True)
+            active[(level, unit_id)] = is_active
+            rows.extend(
+                OrgUnitClosure(
+                    ancestor_type=ancestor_type,
+                    ancestor_id=ancestor_id,
+                    descendant_type=level,
+                    descendant_id=unit_id,
+                    depth=depth,
+                    descendant_active=is_active,
+                )
+                for ancestor_type, ancestor_id, depth in unit_ancestors
+            )
+    
+    with transaction.atomic():
+        if organization_ids is None:
+            OrgUnitClosure.objects.all().delete()
+        else:
+            OrgUnitClosure.objects.filter(
+                Q(ancestor_type='organization', ancestor_id__in=organization_ids) |
+                _units_q('descendant', list(ancestors))
+            ).delete()
+        OrgUnitClosure.objects.bulk_create(rows, batch_size=batch_size)
+    
+    return len(rows)
@@ -0,0 +1,168 @@
+"""
+Local database-backed job queue.
+
+Jobs are rows of BackgroundJob. Any process can enqueue them and any
+worker process (`python manage.py run_jobs`) can run them: a worker claims
+a pending job with a conditional UPDATE, so two workers never run the
+same job. Failed jobs are retried with exponential backoff until
+max_attempts, and an idempotency key keeps a single active job per key.
+Workers refresh the lock of the job they run (heartbeat); a running job
+without heartbeat for JOBS_STALE_AFTER is requeued, or failed once it has
+used all its attempts.
+
+Handlers are plain functions registered with @job_handler('kind') and
+receive the job payload as keyword arguments.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def job_handler(kind):
+    """Register a function as the handler of a job kind"""
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(kind, payload=None, key='', max_attempts=None):
+    """
+    Enqueue a job and return (job, created).
+    
+    If `key` is given and an active job with the same kind and key exists,
+    that job is returned instead of creating a new one.
+    """
+    if key:
+        existing = BackgroundJob.objects.filter(kind=kind, key=key, status__in=BackgroundJob.ACTIVE_STATUSES).first()
+        if existing:
+            return existing, False
+    
+    try:
+        with transaction.atomic():
+            job = BackgroundJob.objects.create(
+                kind=kind,
+                key=key,
+                payload=payload or {},
+                max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+            )
+    except IntegrityError:
+        # Enqueued concurrently by another request
+        return BackgroundJob.objects.get(kind=kind, key=key, status__in=BackgroundJob.ACTIVE_STATUSES), False
+    
+    if settings.JOBS_EAGER:
+        job = claim_job(job.id, 'eager')
+        if job:
+            run_job(job)
+    
+    return job, True
+
+
+def claim_job(job_id, worker_id):
+    """Atomically mark a pending job as running; returns it, or None if another worker took it"""
+    claimed = BackgroundJob.objects.filter(pk=job_id, status='pending').update(
+        status='running',
+        locked_by=worker_id,
+        locked_at=timezone.now(),
+        attempts=F('attempts') + 1,
+        updated_at=timezone.now(),
+    )
+    if not claimed:
+        return None
+    return BackgroundJob.objects.get(pk=job_id)
+
+
+def claim_next_job(worker_id, kinds=None):
+    """Claim the next due pending job, or return None"""
+    candidates = BackgroundJob.objects.filter(status='pending', run_after__lte=timezone.now())
+    if kinds:
+        candidates = candidates.filter(kind__in=kinds)
+    
+    for job_id in candidates.order_by('run_after', 'id').values_list('id', flat=True)[:10]:
+        job = claim_job(job_id, worker_id)
+        if job:
+            return job
+    
+    return None
+
+
+def run_job(job):
+    """Run a claimed job and record its outcome"""
+    handler = _handlers.get(job.kind)
+    now = timezone.now()
+    
+    try:
+        if handler is None:
+            raise LookupError(f'No hay handler registrado para "{job.kind}"')
+        result = handler(**job.payload)
+    except Exception:
+        logger.exception('Job %s (%s) failed on attempt %s', job.id, job.kind, job.attempts)
+        job.last_error = traceback.format_exc()
+        job.locked_by = ''
+        job.locked_at = None
+        if job.attempts < job.max_attempts:
+            job.status = 'pending'
+            job.run_after = now + timedelta(seconds=settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1))
+        else:
+            job.status = 'failed'
+            job.finished_at = now
+        job.save(update_fields=['status', 'last_error', 'locked_by', 'locked_at', 'run_after', 'finished_at', 'updated_at'])
+        return job
+    
+    job.status = 'succeeded'
+    job.result = result
+    job.last_error = None
+    job.finished_at = now
+    job.save(update_fields=['status', 'result', 'last_error', 'finished_at', 'updated_at'])
+    return job
+
+
+def heartbeat(job):
+    """Refresh the lock of a running job, so it is not taken for abandoned while it runs"""
+    return BackgroundJob.objects.filter(pk=job.id, status='running', locked_by=job.locked_by).update(
+        locked_at=timezone.now(),
+    )
+
+
+def requeue_stale_jobs(stale_after=None):
+    """
+    Handle running jobs whose worker died (no heartbeat for too long):
+    those with attempts left go back to the queue, the others fail for
+    good. Returns (requeued, failed).
+    """
+    stale_after = stale_after or settings.JOBS_STALE_AFTER
+    now = timezone.now()
+    stale = BackgroundJob.objects.filter(status='running', locked_at__lt=now - timedelta(seconds=stale_after))
+    
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed',
+        last_error=f'El worker dejó de responder durante más de {stale_after} segundos',
+        locked_by='',
+        locked_at=None,
+        finished_at=now,
+        updated_at=now,
+    )
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+        status='pending',
+        locked_by='',
+        locked_at=None,
+        run_after=now,
+        updated_at=now,
+    )
+    return requeued, failed
+
+
+def get_latest_job(kind, key):
+    """Most recent job of a kind and idempotency key"""
+    return BackgroundJob.objects.filter(kind=kind, key=key).order_by('-created_at', '-id').first()
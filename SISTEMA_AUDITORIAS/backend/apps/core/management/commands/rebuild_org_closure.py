@@ -0,0 +1,18 @@
+"""
+Management command to rebuild the organizational hierarchy closure table.
+Usage: python manage.py rebuild_org_closure [--organization ID ...]
+"""
+from django.core.management.base import BaseCommand
+from apps.core.hierarchy import rebuild_closure
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the closure table of the Company > Branch > Department > Team > SubTeam hierarchy'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--organization', type=int, action='append', dest='organizations', help='Only this organization (repeatable)')
+    
+    def handle(self, *args, **options):
+        total = rebuild_closure(options['organizations'])
+        
+        self.stdout.write(self.style.SUCCESS(f'Tabla de jerarquía reconstruida: {total} relaciones.'))
@@ -0,0 +1,44 @@
+"""
+Management command to mark the initial migrations of the project apps as
+applied on databases created with `migrate --run-syncdb`, whose tables
+exist without migration history. `migrate` can then apply the rest.
+Usage: python manage.py record_initial_migrations [--database ALIAS]
+"""
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+
+
+# (app, migration, a table it creates), in dependency order
+INITIAL_MIGRATIONS = [
+    ('authentication', '0001_initial', 'authentication_user'),
+    ('core', '0001_initial', 'core_company'),
+    ('audits', '0001_initial', 'audits_audit'),
+    ('audits', '0002_initial', 'audits_audit'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Record the initial migrations of the project apps as applied when their tables already exist'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias')
+    
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        tables = set(connection.introspection.table_names())
+        recorder = MigrationRecorder(connection)
+        recorder.ensure_schema()
+        applied = recorder.applied_migrations()
+        
+        recorded = []
+        for app, name, table in INITIAL_MIGRATIONS:
+            if (app, name) in applied or table not in tables:
+                continue
+            recorder.record_applied(app, name)
+            recorded.append(f'{app}.{name}')
+        
+        if recorded:
+            self.stdout.write(self.style.SUCCESS(f'Migraciones iniciales registradas: {", ".join(recorded)}.'))
+        else:
+            self.stdout.write('No hay migraciones iniciales por registrar.')
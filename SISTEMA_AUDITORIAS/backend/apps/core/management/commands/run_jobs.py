@@ -0,0 +1,112 @@
+"""
+Management command to run background job workers.
+Usage: python manage.py run_jobs [--concurrency N] [--kind KIND ...] [--burst] [--stale-check-interval SECONDS]
+
+While a job runs its lock is refreshed every JOBS_HEARTBEAT_INTERVAL seconds,
+so long jobs are never requeued by the stale check of another worker.
+"""
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connection
+
+from apps.core.jobs import claim_next_job, heartbeat, run_job, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run workers of the database-backed job queue'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=1, help='Number of worker threads')
+        parser.add_argument('--kind', action='append', dest='kinds', help='Only run jobs of this kind (repeatable)')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--burst', action='store_true', help='Exit when the queue is empty')
+        parser.add_argument(
+            '--stale-check-interval', type=float, default=None,
+            help='Seconds between checks for jobs abandoned by dead workers (default: JOBS_STALE_AFTER / 2)',
+        )
+    
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        self.stop = threading.Event()
+        
+        stale_check_interval = options['stale_check_interval'] or settings.JOBS_STALE_AFTER / 2
+        self.requeue_stale()
+        
+        self.stdout.write(f'Iniciando {concurrency} worker(s)...')
+        threads = [
+            threading.Thread(target=self.work, args=(f'{socket.gethostname()}:{os.getpid()}:{i}', options), daemon=True)
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        
+        try:
+            # Workers of other hosts may die at any time, not only before this one starts
+            next_stale_check = time.monotonic() + stale_check_interval
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=1)
+                if time.monotonic() >= next_stale_check:
+                    self.requeue_stale()
+                    next_stale_check = time.monotonic() + stale_check_interval
+        except KeyboardInterrupt:
+            self.stdout.write('Deteniendo workers...')
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+        
+        connection.close()
+        self.stdout.write(self.style.SUCCESS('Workers detenidos.'))
+    
+    def requeue_stale(self):
+        close_old_connections()
+        requeued, failed = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f'{requeued} tareas bloqueadas devueltas a la cola.')
+        if failed:
+            self.stdout.write(f'{failed} tareas bloqueadas marcadas como fallidas (sin intentos restantes).')
+    
+    def work(self, worker_id, options):
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                job = claim_next_job(worker_id, options['kinds'])
+                
+                if job is None:
+                    if options['burst']:
+                        return
+                    self.stop.wait(options['poll_interval'])
+                    continue
+                
+                started = time.monotonic()
+                job = self.run_with_heartbeat(job)
+                self.stdout.write(f'[{worker_id}] {job.kind} #{job.id}: {job.status} ({time.monotonic() - started:.2f}s)')
+        finally:
+            connection.close()
+    
+    def run_with_heartbeat(self, job):
+        """Run a job while another thread keeps its lock fresh"""
+        done = threading.Event()
+        beat = threading.Thread(target=self.beat, args=(job, done), daemon=True)
+        beat.start()
+        try:
+            return run_job(job)
+        finally:
+            done.set()
+            beat.join()
+    
+    def beat(self, job, done):
+        try:
+            while not done.wait(settings.JOBS_HEARTBEAT_INTERVAL):
+                try:
+                    heartbeat(job)
+                except DatabaseError as error:
+                    # A missed beat is harmless as long as the next one arrives before JOBS_STALE_AFTER
+                    self.stderr.write(f'[{job.locked_by}] {job.kind} #{job.id}: latido fallido ({error})')
+        finally:
+            connection.close()
@@ -0,0 +1,23 @@
+"""
+Middleware of core app.
+"""
+from django.utils.functional import SimpleLazyObject
+
+from .context import get_tenant_context
+
+
+class TenantMiddleware:
+    """
+    Expose the tenant context of the user as `request.tenant`.
+    
+    Resolved lazily, on first use inside the view: by then the API has
+    authenticated the user (DRF sets the user on the underlying request),
+    whatever the authentication class.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        request.tenant = SimpleLazyObject(lambda: get_tenant_context(request.user))
+        return self.get_response(request)
@@ -0,0 +1,106 @@
+# Generated by Django 5.0.1 on 2026-10-18 07:20
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=100, verbose_name='Tipo')),
+                ('key', models.CharField(blank=True, default='', max_length=255, verbose_name='Clave de idempotencia')),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En Ejecución'), ('succeeded', 'Completado'), ('failed', 'Fallido')], default='pending', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('max_attempts', models.IntegerField(default=3)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_by', models.CharField(blank=True, default='', max_length=100)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Tarea en Segundo Plano',
+                'verbose_name_plural': 'Tareas en Segundo Plano',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OrgUnitClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ancestor_type', models.CharField(choices=[('organization', 'Organización'), ('company', 'Empresa'), ('branch', 'Sucursal'), ('department', 'Departamento'), ('team', 'Equipo'), ('subteam', 'Sub-equipo')], max_length=20)),
+                ('ancestor_id', models.BigIntegerField()),
+                ('descendant_type', models.CharField(choices=[('organization', 'Organización'), ('company', 'Empresa'), ('branch', 'Sucursal'), ('department', 'Departamento'), ('team', 'Equipo'), ('subteam', 'Sub-equipo')], max_length=20)),
+                ('descendant_id', models.BigIntegerField()),
+                ('depth', models.PositiveSmallIntegerField(default=0)),
+                ('descendant_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'Relación Jerárquica',
+                'verbose_name_plural': 'Relaciones Jerárquicas',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='branch',
+            index=models.Index(fields=['name', 'id'], name='core_branch_name_2d3b2d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['name', 'id'], name='core_compan_name_3edb26_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='department',
+            index=models.Index(fields=['name', 'id'], name='core_depart_name_bea96a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invitation',
+            index=models.Index(fields=['organization', '-created_at', '-id'], name='core_invita_organiz_afaa0a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subteam',
+            index=models.Index(fields=['name', 'id'], name='core_subtea_name_5af868_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(fields=['name', 'id'], name='core_team_name_0efc0d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userassignment',
+            index=models.Index(fields=['organization', '-created_at', '-id'], name='core_useras_organiz_f06437_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='backgroundjob',
+            index=models.Index(fields=['status', 'run_after'], name='core_backgr_status_24aba0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='backgroundjob',
+            index=models.Index(fields=['kind', 'key'], name='core_backgr_kind_d41260_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='backgroundjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running']), models.Q(('key', ''), _negated=True)), fields=('kind', 'key'), name='unique_active_job_key'),
+        ),
+        migrations.AddIndex(
+            model_name='orgunitclosure',
+            index=models.Index(fields=['descendant_type', 'descendant_id', 'depth'], name='core_orguni_descend_231bd2_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='orgunitclosure',
+            constraint=models.UniqueConstraint(fields=('ancestor_type', 'ancestor_id', 'descendant_type', 'descendant_id'), name='unique_org_unit_closure'),
+        ),
+    ]
@@ -1,10 +1,13 @@
 """
 Models for core app.
 Organizational hierarchy: Company, Branch, Department, Team, SubTeam
+Hierarchy closure table
 User assignments and invitations
+Background jobs queue
 """
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from apps.authentication.models import Organization
 import uuid
 
@@ -28,6 +31,9 @@ class Company(models.Model):
         verbose_name = 'Empresa'
         verbose_name_plural = 'Empresas'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.code} - {self.name}"
@@ -52,6 +58,9 @@ class Branch(models.Model):
         verbose_name = 'Sucursal'
         verbose_name_plural = 'Sucursales'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.code} - {self.name}"
@@ -73,6 +82,9 @@ class Department(models.Model):
         verbose_name = 'Departamento'
         verbose_name_plural = 'Departamentos'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.code} - {self.name}"
@@ -94,6 +106,9 @@ class Team(models.Model):
         verbose_name = 'Equipo'
         verbose_name_plural = 'Equipos'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.code} - {self.name}"
@@ -115,11 +130,57 @@ class SubTeam(models.Model):
         verbose_name = 'Sub-equipo'
         verbose_name_plural = 'Sub-equipos'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.code} - {self.name}"
 
 
+class OrgUnitClosure(models.Model):
+    """
+    Closure table of the organizational hierarchy.
+    
+    One row per (ancestor, descendant) pair of units, each unit included as
+    its own ancestor at depth 0 and the organization as the root ancestor.
+    Kept in sync by signals (see signals.py), so any subtree is a single
+    indexed lookup on (ancestor, descendant_type).
+    """
+    
+    UNIT_TYPE_CHOICES = [
+        ('organization', 'Organización'),
+        ('company', 'Empresa'),
+        ('branch', 'Sucursal'),
+        ('department', 'Departamento'),
+        ('team', 'Equipo'),
+        ('subteam', 'Sub-equipo'),
+    ]
+    
+    ancestor_type = models.CharField(max_length=20, choices=UNIT_TYPE_CHOICES)
+    ancestor_id = models.BigIntegerField()
+    descendant_type = models.CharField(max_length=20, choices=UNIT_TYPE_CHOICES)
+    descendant_id = models.BigIntegerField()
+    depth = models.PositiveSmallIntegerField(default=0)
+    descendant_active = models.BooleanField(default=True)  # The descendant and every unit above it are active
+    
+    class Meta:
+        verbose_name = 'Relación Jerárquica'
+        verbose_name_plural = 'Relaciones Jerárquicas'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ancestor_type', 'ancestor_id', 'descendant_type', 'descendant_id'],
+                name='unique_org_unit_closure',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['descendant_type', 'descendant_id', 'depth']),
+        ]
+    
+    def __str__(self):
+        return f"{self.ancestor_type}:{self.ancestor_id} -> {self.descendant_type}:{self.descendant_id} ({self.depth})"
+
+
 class UserAssignment(models.Model):
     """User assignment to a specific level in the hierarchy"""
     
@@ -145,6 +206,9 @@ class UserAssignment(models.Model):
     class Meta:
         verbose_name = 'Asignación de Usuario'
         verbose_name_plural = 'Asignaciones de Usuarios'
+        indexes = [
+            models.Index(fields=['organization', '-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.role} en {self.get_level_name()}"
@@ -202,6 +266,9 @@ class Invitation(models.Model):
         verbose_name = 'Invitación'
         verbose_name_plural = 'Invitaciones'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['organization', '-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"Invitación a {self.to_email} - {self.status}"
@@ -219,3 +286,54 @@ class Invitation(models.Model):
         elif self.company:
             return f"Empresa: {self.company.name}"
         return "Organización"
+
+
+class BackgroundJob(models.Model):
+    """Job of the local database-backed job queue (run by `manage.py run_jobs`)"""
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('running', 'En Ejecución'),
+        ('succeeded', 'Completado'),
+        ('failed', 'Fallido'),
+    ]
+    
+    ACTIVE_STATUSES = ['pending', 'running']
+    
+    kind = models.CharField(max_length=100, verbose_name='Tipo')
+    key = models.CharField(max_length=255, blank=True, default='', verbose_name='Clave de idempotencia')
+    payload = models.JSONField(default=dict, blank=True)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, null=True)
+    result = models.JSONField(blank=True, null=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Tarea en Segundo Plano'
+        verbose_name_plural = 'Tareas en Segundo Plano'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+            models.Index(fields=['kind', 'key']),
+        ]
+        constraints = [
+            # Only one active job per idempotency key
+            models.UniqueConstraint(
+                fields=['kind', 'key'],
+                condition=models.Q(status__in=['pending', 'running']) & ~models.Q(key=''),
+                name='unique_active_job_key',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} [{self.key or self.id}] - {self.status}"
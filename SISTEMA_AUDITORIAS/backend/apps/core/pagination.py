@@ -0,0 +1,156 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Pages are read with a WHERE on the sort key of the last row seen instead
+of an OFFSET, so every page costs the same on an index matching the
+ordering, however deep the client goes. Cursors are opaque base64 tokens
+holding that sort key and the direction.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque-cursor keyset pagination.
+    
+    The ordering comes from the view `pagination_ordering` (default
+    newest first) and must be unique, so it always ends with the id.
+    The total count can be disabled globally (PAGINATION_INCLUDE_COUNT)
+    or per request with `?count=false`.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Cursor inválido'
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = tuple(getattr(view, 'pagination_ordering', self.ordering))
+        
+        model = queryset.model
+        cursor = self.decode_cursor(request, model)
+        reverse = bool(cursor and cursor['reverse'])
+        
+        self.count = queryset.count() if self.include_count(request) else None
+        
+        # Walking backwards reads the previous page in reverse order
+        ordering = [_invert(field) for field in self.ordering] if reverse else list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if cursor:
+            queryset = queryset.filter(_after(ordering, cursor['key']))
+        
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+        
+        if reverse:
+            self.has_next, self.has_previous = cursor is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        
+        self.page = rows
+        return rows
+    
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['results'] = data
+        return Response(payload)
+    
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE
+        value = request.query_params.get(self.page_size_query_param)
+        if value:
+            try:
+                page_size = int(value)
+            except ValueError:
+                pass
+        return max(1, min(page_size, settings.PAGINATION_MAX_PAGE_SIZE))
+    
+    def include_count(self, request):
+        value = request.query_params.get(self.count_query_param)
+        if value is None:
+            return settings.PAGINATION_INCLUDE_COUNT
+        return value.lower() not in ('0', 'false', 'no')
+    
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.page[-1], False))
+    
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Walked past the end: the first page is the way back
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.page[0], True))
+    
+    # ============ Cursors ============
+    
+    def encode_cursor(self, row, reverse):
+        key = [_to_json(getattr(row, field.lstrip('-'))) for field in self.ordering]
+        token = json.dumps({'k': key, 'r': int(reverse)}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(token.encode()).decode().rstrip('=')
+    
+    def decode_cursor(self, request, model):
+        """{'key': [...], 'reverse': bool} from the request cursor, or None"""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        
+        try:
+            data = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+            key = data['k']
+            if len(key) != len(self.ordering):
+                raise ValueError
+            fields = [model._meta.get_field(field.lstrip('-')) for field in self.ordering]
+            key = [field.to_python(value) for field, value in zip(fields, key)]
+        except (binascii.Error, ValueError, TypeError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        
+        return {'key': key, 'reverse': bool(data.get('r'))}
+
+
+def _invert(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
+
+
+def _after(ordering, key):
+    """Q for the rows strictly after `key` in `ordering` (lexicographic, per-field direction)"""
+    names = [field.lstrip('-') for field in ordering]
+    condition = Q()
+    for i, field in enumerate(ordering):
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= Q(**{names[j]: key[j] for j in range(i)}, **{f'{names[i]}__{lookup}': key[i]})
+    return condition
+
+
+def _to_json(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
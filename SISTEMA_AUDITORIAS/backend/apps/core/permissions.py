@@ -18,8 +18,7 @@ class IsOwnerOrManager(permissions.BasePermission):
             return True
         
         # Check if user is a manager
-        assignment = request.user.assignments.filter(is_active=True, role='manager').first()
-        return assignment is not None
+        return request.tenant.is_manager
 
 
 class CanManageLevel(permissions.BasePermission):
@@ -35,7 +34,7 @@ class CanManageLevel(permissions.BasePermission):
             return True
         
         # Get user's assignment
-        assignment = user.assignments.filter(is_active=True).first()
+        assignment = request.tenant.assignment
         if not assignment:
             return False
         
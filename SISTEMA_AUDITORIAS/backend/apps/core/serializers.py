@@ -3,11 +3,49 @@ Serializers for core app.
 """
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import Company, Branch, Department, Team, SubTeam, UserAssignment, Invitation
+from .models import Company, Branch, Department, Team, SubTeam, UserAssignment, Invitation, BackgroundJob
+from .hierarchy import subtree_ids
 
 User = get_user_model()
 
 
+# ============ Field Selection ============
+
+def query_list(request, name):
+    """Set of the comma-separated values of a query parameter"""
+    if request is None:
+        return set()
+    value = request.query_params.get(name, '')
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+class ExpandableFieldsMixin:
+    """
+    Sparse fieldsets and opt-in nested data for a serializer.
+    
+    Fields listed in `expandable_fields` are only serialized when named in
+    `?expand=`; `?fields=` keeps only the given fields (expanded ones
+    included). Both can be given as `fields=` / `expand=` arguments
+    instead of the request query parameters.
+    """
+    expandable_fields = ()
+    
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        expand = set(expand) if expand is not None else query_list(request, 'expand')
+        fields = set(fields) if fields is not None else query_list(request, 'fields')
+        
+        for name in self.expandable_fields:
+            if name not in expand:
+                self.fields.pop(name, None)
+        
+        if fields:
+            for name in list(self.fields):
+                if name not in fields and name not in expand:
+                    self.fields.pop(name)
+
+
 # ============ Hierarchy Serializers ============
 
 class SubTeamSerializer(serializers.ModelSerializer):
@@ -84,10 +122,15 @@ class CompanyListSerializer(serializers.ModelSerializer):
         model = Company
         fields = ['id', 'name', 'code', 'description', 'address', 'phone', 'email', 'is_active', 'created_at', 'branches_count', 'audits_count']
     
+    # Counts are annotated by CompanyViewSet for lists
     def get_branches_count(self, obj):
+        if hasattr(obj, 'branches_count'):
+            return obj.branches_count
         return obj.branches.filter(is_active=True).count()
     
     def get_audits_count(self, obj):
+        if hasattr(obj, 'audits_count'):
+            return obj.audits_count
         return obj.audits.count()
 
 
@@ -101,6 +144,8 @@ class BranchListSerializer(serializers.ModelSerializer):
         fields = ['id', 'company', 'company_name', 'name', 'code', 'description', 'address', 'is_active', 'created_at', 'departments_count']
     
     def get_departments_count(self, obj):
+        if hasattr(obj, 'departments_count'):
+            return obj.departments_count
         return obj.departments.filter(is_active=True).count()
 
 
@@ -115,6 +160,8 @@ class DepartmentListSerializer(serializers.ModelSerializer):
         fields = ['id', 'branch', 'branch_name', 'company_name', 'name', 'code', 'description', 'is_active', 'created_at', 'teams_count']
     
     def get_teams_count(self, obj):
+        if hasattr(obj, 'teams_count'):
+            return obj.teams_count
         return obj.teams.filter(is_active=True).count()
 
 
@@ -128,6 +175,8 @@ class TeamListSerializer(serializers.ModelSerializer):
         fields = ['id', 'department', 'department_name', 'name', 'code', 'description', 'is_active', 'created_at', 'subteams_count']
     
     def get_subteams_count(self, obj):
+        if hasattr(obj, 'subteams_count'):
+            return obj.subteams_count
         return obj.subteams.filter(is_active=True).count()
 
 
@@ -206,68 +255,73 @@ class AcceptInvitationSerializer(serializers.Serializer):
     password = serializers.CharField(min_length=6, write_only=True)
 
 
+# ============ Background Job Serializers ============
+
+class BackgroundJobSerializer(serializers.ModelSerializer):
+    """Serializer for BackgroundJob status"""
+    
+    class Meta:
+        model = BackgroundJob
+        fields = ['id', 'kind', 'status', 'attempts', 'max_attempts', 'run_after', 'last_error', 'result', 'created_at', 'finished_at']
+        read_only_fields = fields
+
+
 # ============ Hierarchy Tree Serializer ============
 
 class HierarchyTreeSerializer(serializers.Serializer):
-    """Serializer for full hierarchy tree"""
+    """
+    Serializer for full hierarchy tree.
+    
+    Built from one flat query per level, assembled in memory: children of
+    inactive units are left out, like their parents. Each unit carries the
+    score of its subtree from the audits scorecards (None without audits).
+    """
     
     def to_representation(self, organization):
-        companies = Company.objects.filter(organization=organization, is_active=True)
+        # Imported here: the audits app builds on core
+        from apps.audits.scorecards import unit_scores
+        scores = unit_scores(organization.id)
         
         tree = {
             'organization': {
                 'id': organization.id,
                 'name': organization.name,
                 'description': organization.description,
+                'score': scores.get(('organization', organization.id)),
             },
             'companies': []
         }
         
-        for company in companies:
-            company_data = {
-                'id': company.id,
-                'name': company.name,
-                'code': company.code,
-                'branches': []
-            }
+        # (model, key of its children, FK to its parent); children lists are indexed by parent id
+        levels = [
+            (Company, 'branches', None),
+            (Branch, 'departments', 'company_id'),
+            (Department, 'teams', 'branch_id'),
+            (Team, 'subteams', 'department_id'),
+            (SubTeam, None, 'team_id'),
+        ]
+        parents = None
+        
+        for model, children_key, parent_field in levels:
+            level = model._meta.model_name
+            fields = ['id', 'name', 'code'] + ([parent_field] if parent_field else [])
+            rows = model.objects.filter(
+                id__in=subtree_ids('organization', organization.id, level),
+                is_active=True,
+            ).values(*fields)
             
-            for branch in company.branches.filter(is_active=True):
-                branch_data = {
-                    'id': branch.id,
-                    'name': branch.name,
-                    'code': branch.code,
-                    'departments': []
-                }
-                
-                for dept in branch.departments.filter(is_active=True):
-                    dept_data = {
-                        'id': dept.id,
-                        'name': dept.name,
-                        'code': dept.code,
-                        'teams': []
-                    }
-                    
-                    for team in dept.teams.filter(is_active=True):
-                        team_data = {
-                            'id': team.id,
-                            'name': team.name,
-                            'code': team.code,
-                            'subteams': []
-                        }
-                        
-                        for subteam in team.subteams.filter(is_active=True):
-                            team_data['subteams'].append({
-                                'id': subteam.id,
-                                'name': subteam.name,
-                                'code': subteam.code,
-                            })
-                        
-                        dept_data['teams'].append(team_data)
-                    
-                    branch_data['departments'].append(dept_data)
+            nodes = {}
+            for row in rows:
+                siblings = tree['companies'] if parent_field is None else parents.get(row[parent_field])
+                if siblings is None:
+                    # Parent inactive: hidden with its whole subtree
+                    continue
                 
-                company_data['branches'].append(branch_data)
+                node = {'id': row['id'], 'name': row['name'], 'code': row['code'], 'score': scores.get((level, row['id']))}
+                if children_key:
+                    node[children_key] = nodes[row['id']] = []
+                siblings.append(node)
             
-            tree['companies'].append(company_data)
+            parents = nodes
         
         return tree
@@ -0,0 +1,51 @@
+"""
+Signal handlers for core app.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.authentication.models import Organization
+
+from .models import Company, Branch, Department, Team, SubTeam, UserAssignment
+from .hierarchy import TREE_CACHE, sync_unit, remove_unit, organization_of
+from .cache import bump_cache_version
+from .context import invalidate_tenant_context
+
+
+def unit_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync_unit(instance)
+        bump_cache_version(TREE_CACHE, organization_of(instance))
+
+
+def unit_deleted(sender, instance, **kwargs):
+    # Read the organization before the closure rows of the unit are gone
+    organization_id = organization_of(instance)
+    remove_unit(instance)
+    bump_cache_version(TREE_CACHE, organization_id)
+
+
+# Keep the hierarchy closure table and the cached tree in sync with every unit level
+for model in [Company, Branch, Department, Team, SubTeam]:
+    post_save.connect(unit_saved, sender=model, dispatch_uid=f'closure_save_{model.__name__}')
+    post_delete.connect(unit_deleted, sender=model, dispatch_uid=f'closure_delete_{model.__name__}')
+
+
+# Cached tenant contexts depend on the user, their assignments and their organization
+@receiver([post_save, post_delete], sender=get_user_model())
+def user_changed(sender, instance, **kwargs):
+    invalidate_tenant_context(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=UserAssignment)
+def assignment_changed(sender, instance, **kwargs):
+    invalidate_tenant_context(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Organization)
+def organization_changed(sender, instance, **kwargs):
+    bump_cache_version(TREE_CACHE, instance.pk)
+    invalidate_tenant_context(instance.owner_id)
+    for user_id in UserAssignment.objects.filter(organization=instance).values_list('user_id', flat=True).distinct():
+        invalidate_tenant_context(user_id)
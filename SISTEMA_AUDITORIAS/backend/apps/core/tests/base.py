@@ -0,0 +1,31 @@
+"""
+Shared fixtures of the test suites (python manage.py test).
+"""
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.authentication.models import User, Organization
+from apps.core.models import Company, Branch, Department
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class OrganizationTestCase(TestCase):
+    """
+    TestCase with an organization (owner, company, branch, department) and
+    an API client logged in as its owner. The cache lives in memory and is
+    emptied before each test, ids of rolled back rows are reused.
+    """
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner@test.com', 'test123', full_name='Owner', user_type='owner')
+        cls.organization = Organization.objects.create(name='Org', owner=cls.owner)
+        cls.company = Company.objects.create(organization=cls.organization, name='Company', code='C-1', created_by=cls.owner)
+        cls.branch = Branch.objects.create(company=cls.company, name='Branch', code='B-1', created_by=cls.owner)
+        cls.department = Department.objects.create(branch=cls.branch, name='Department', code='D-1', created_by=cls.owner)
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
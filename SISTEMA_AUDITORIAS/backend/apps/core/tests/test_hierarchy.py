@@ -0,0 +1,71 @@
+"""
+Tests of the hierarchy closure table.
+"""
+from apps.core.hierarchy import rebuild_closure, count_descendants, subtree_ids
+from apps.core.models import Branch, Department, Team, SubTeam, Company, OrgUnitClosure
+
+from .base import OrganizationTestCase
+
+
+class ClosureTableTests(OrganizationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Company > Branch > Department > 2 teams > 1 subteam each, and a second company
+        self.teams = [
+            Team.objects.create(department=self.department, name=f'Team {i}', code=f'T-{i}', created_by=self.owner)
+            for i in range(2)
+        ]
+        self.subteams = [
+            SubTeam.objects.create(team=team, name=f'SubTeam {team.code}', code=f'S-{team.code}', created_by=self.owner)
+            for team in self.teams
+        ]
+        self.other_company = Company.objects.create(organization=self.organization, name='Other', code='C-2', created_by=self.owner)
+        self.other_branch = Branch.objects.create(company=self.other_company, name='Other branch', code='B-2', created_by=self.owner)
+    
+    def assertMatchesRebuild(self):
+        """The rows kept in sync by the signals are those a full rebuild writes"""
+        def rows():
+            return set(OrgUnitClosure.objects.values_list(
+                'ancestor_type', 'ancestor_id', 'descendant_type', 'descendant_id', 'depth', 'descendant_active',
+            ))
+        
+        synced = rows()
+        rebuild_closure()
+        self.assertEqual(synced, rows())
+    
+    def test_synced_rows_match_rebuild(self):
+        self.assertMatchesRebuild()
+        
+        # Move the department, with its teams and subteams, under another branch
+        self.department.branch = self.other_branch
+        self.department.save()
+        self.assertMatchesRebuild()
+        self.assertEqual(count_descendants('company', self.other_company.id)['subteam'], 2)
+        self.assertEqual(count_descendants('company', self.company.id)['subteam'], 0)
+        
+        # Deactivate the branch above it, then one team, then bring the branch back
+        self.other_branch.is_active = False
+        self.other_branch.save()
+        self.assertMatchesRebuild()
+        self.assertFalse(any(count_descendants('company', self.other_company.id).values()))
+        
+        self.teams[0].is_active = False
+        self.teams[0].save()
+        self.other_branch.is_active = True
+        self.other_branch.save()
+        self.assertMatchesRebuild()
+        self.assertEqual(
+            set(subtree_ids('company', self.other_company.id, 'subteam', active_only=True).values_list('descendant_id', flat=True)),
+            {self.subteams[1].id},
+        )
+        
+        # Move the inactive team under a new department of the first branch, then delete a team
+        new_department = Department.objects.create(branch=self.branch, name='New', code='D-2', created_by=self.owner)
+        self.teams[0].department = new_department
+        self.teams[0].save()
+        self.assertMatchesRebuild()
+        
+        self.teams[1].delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(count_descendants('organization', self.organization.id, active_only=False)['subteam'], 1)
@@ -0,0 +1,94 @@
+"""
+Tests of the database-backed job queue.
+"""
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.core.jobs import job_handler, enqueue, claim_job, claim_next_job, run_job, heartbeat, requeue_stale_jobs
+from apps.core.models import BackgroundJob
+
+
+@job_handler('tests.echo')
+def echo(value):
+    return {'value': value}
+
+
+@job_handler('tests.fail')
+def fail():
+    raise RuntimeError('Fallo de prueba')
+
+
+@override_settings(JOBS_EAGER=False, JOBS_MAX_ATTEMPTS=3, JOBS_RETRY_DELAY=30, JOBS_STALE_AFTER=600)
+class JobQueueTests(TestCase):
+
+    def test_enqueue_returns_active_job_of_same_key(self):
+        job, created = enqueue('tests.echo', {'value': 1}, key='same')
+        again, created_again = enqueue('tests.echo', {'value': 2}, key='same')
+        
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again.id, job.id)
+        self.assertEqual(again.payload, {'value': 1})
+        
+        # Once finished, the key is free for a new job
+        run_job(claim_job(job.id, 'worker'))
+        new, created_new = enqueue('tests.echo', {'value': 3}, key='same')
+        self.assertTrue(created_new)
+        self.assertNotEqual(new.id, job.id)
+    
+    def test_failed_job_is_retried_with_backoff_until_max_attempts(self):
+        job, _ = enqueue('tests.fail')
+        
+        for attempt, delay in [(1, 30), (2, 60)]:
+            before = timezone.now()
+            with self.assertLogs('apps.core.jobs', 'ERROR'):
+                job = run_job(claim_job(job.id, 'worker'))
+            
+            self.assertEqual(job.status, 'pending')
+            self.assertEqual(job.attempts, attempt)
+            self.assertIn('Fallo de prueba', job.last_error)
+            self.assertGreaterEqual(job.run_after, before + timedelta(seconds=delay))
+            self.assertLess(job.run_after, before + timedelta(seconds=delay + 5))
+            # Not due until the backoff has passed
+            self.assertIsNone(claim_next_job('worker', ['tests.fail']))
+        
+        with self.assertLogs('apps.core.jobs', 'ERROR'):
+            run_job(claim_job(job.id, 'worker'))
+        
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.attempts, 3)
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(claim_job(job.id, 'worker'))
+    
+    def test_only_one_claim_of_a_job_wins(self):
+        job, _ = enqueue('tests.echo', {'value': 1})
+        
+        first = claim_job(job.id, 'worker-1')
+        second = claim_job(job.id, 'worker-2')
+        
+        self.assertIsNotNone(first)
+        self.assertIsNone(second)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by, job.attempts), ('running', 'worker-1', 1))
+    
+    def test_stale_jobs_are_requeued_or_failed_by_attempts(self):
+        retried, _ = enqueue('tests.echo', {'value': 1})
+        exhausted, _ = enqueue('tests.echo', {'value': 2}, max_attempts=1)
+        alive, _ = enqueue('tests.echo', {'value': 3})
+        for job in [retried, exhausted, alive]:
+            claim_job(job.id, 'worker')
+        
+        BackgroundJob.objects.update(locked_at=timezone.now() - timedelta(seconds=601))
+        # The worker of this one is still running it
+        heartbeat(BackgroundJob.objects.get(pk=alive.id))
+        
+        self.assertEqual(requeue_stale_jobs(), (1, 1))
+        
+        statuses = dict(BackgroundJob.objects.values_list('id', 'status'))
+        self.assertEqual(statuses, {retried.id: 'pending', exhausted.id: 'failed', alive.id: 'running'})
+        exhausted.refresh_from_db()
+        self.assertIsNotNone(exhausted.finished_at)
+        self.assertTrue(exhausted.last_error)
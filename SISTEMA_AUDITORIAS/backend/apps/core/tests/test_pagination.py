@@ -0,0 +1,84 @@
+"""
+Tests of the keyset pagination of list endpoints.
+"""
+import base64
+import json
+from datetime import timedelta
+
+from django.test import TestCase, RequestFactory, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+
+from apps.core.models import BackgroundJob
+from apps.core.pagination import KeysetPagination
+
+
+def cursor(key, reverse=False):
+    token = json.dumps({'k': key, 'r': int(reverse)})
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip('=')
+
+
+@override_settings(PAGINATION_MAX_PAGE_SIZE=4, PAGINATION_INCLUDE_COUNT=True)
+class KeysetPaginationTests(TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        # Newest first, with 5 jobs sharing their created_at: only the id tells them apart
+        now = timezone.now()
+        for position in range(7):
+            job = BackgroundJob.objects.create(kind='tests.page')
+            created_at = now if position >= 2 else now - timedelta(hours=position + 1)
+            BackgroundJob.objects.filter(pk=job.pk).update(created_at=created_at)
+        cls.expected = list(BackgroundJob.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+    
+    def setUp(self):
+        self.factory = RequestFactory()
+    
+    def paginate(self, url):
+        paginator = KeysetPagination()
+        rows = paginator.paginate_queryset(BackgroundJob.objects.all(), Request(self.factory.get(url)))
+        return paginator.get_paginated_response([row.id for row in rows]).data
+    
+    def test_cursors_walk_every_row_once_across_created_at_ties(self):
+        pages = []
+        url = '/api/jobs/?page_size=2'
+        while url:
+            page = self.paginate(url)
+            pages.append(page)
+            url = page['next']
+        
+        self.assertEqual([row for page in pages for row in page['results']], self.expected)
+        self.assertEqual([len(page['results']) for page in pages], [2, 2, 2, 1])
+        self.assertIsNone(pages[0]['previous'])
+        
+        # And back from the last page, through the same pages
+        url = pages[-1]['previous']
+        for page in reversed(pages[:-1]):
+            back = self.paginate(url)
+            self.assertEqual(back['results'], page['results'])
+            url = back['previous']
+        self.assertIsNone(url)
+    
+    def test_page_size_is_clamped(self):
+        self.assertEqual(len(self.paginate('/api/jobs/?page_size=1000')['results']), 4)
+        self.assertEqual(len(self.paginate('/api/jobs/?page_size=0')['results']), 1)
+        # Not a number: the default page size, clamped too
+        self.assertEqual(len(self.paginate('/api/jobs/?page_size=abc')['results']), 4)
+    
+    def test_count_can_be_skipped_per_request(self):
+        self.assertEqual(self.paginate('/api/jobs/')['count'], 7)
+        self.assertNotIn('count', self.paginate('/api/jobs/?count=false'))
+        self.assertEqual(self.paginate('/api/jobs/?count=true')['count'], 7)
+    
+    def test_malformed_cursors_are_rejected(self):
+        for token in [
+            'not-base64!',
+            base64.urlsafe_b64encode(b'not json').decode(),
+            cursor([1]),  # Key shorter than the ordering
+            cursor(['yesterday', 1]),  # Not a datetime
+            cursor([timezone.now().isoformat(), 'abc']),  # Not an id
+            base64.urlsafe_b64encode(b'{"r": 0}').decode(),  # No key
+        ]:
+            with self.subTest(token=token), self.assertRaises(NotFound):
+                self.paginate(f'/api/jobs/?cursor={token}')
@@ -7,10 +7,14 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db.models import Q, Count
 from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
 from datetime import timedelta
+import hashlib
 
 from .models import Company, Branch, Department, Team, SubTeam, UserAssignment, Invitation
 from .serializers import (
@@ -24,40 +28,48 @@ from .serializers import (
     HierarchyTreeSerializer,
 )
 from .permissions import IsOwnerOrManager, CanManageLevel
+from .hierarchy import TREE_CACHE, subtree_ids, count_descendants
+from .cache import versioned_key
 
 User = get_user_model()
 
 
-def get_user_organization(user):
-    """Get organization for a user"""
-    if user.user_type == 'owner' and hasattr(user, 'organization'):
-        return user.organization
-    
-    assignment = user.assignments.filter(is_active=True).first()
-    if assignment:
-        return assignment.organization
-    
-    return None
-
-
 # ============ Hierarchy Views ============
 
 class HierarchyTreeView(APIView):
-    """Get full hierarchy tree"""
+    """
+    Get full hierarchy tree.
+    
+    Cached per organization under the hierarchy version (bumped by unit
+    signals) and served with an ETag of that version, so unchanged trees
+    are answered with 304 without touching the cache entry.
+    """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        organization = get_user_organization(request.user)
+        organization = request.tenant.organization
         if not organization:
             return Response({'error': 'No tienes una organización'}, status=status.HTTP_404_NOT_FOUND)
         
-        serializer = HierarchyTreeSerializer()
-        return Response(serializer.to_representation(organization))
+        cache_key = versioned_key(TREE_CACHE, organization.id)
+        etag = quote_etag(hashlib.md5(cache_key.encode()).hexdigest())
+        
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        
+        tree = cache.get(cache_key)
+        if tree is None:
+            serializer = HierarchyTreeSerializer()
+            tree = serializer.to_representation(organization)
+            cache.set(cache_key, tree, settings.HIERARCHY_CACHE_TIMEOUT)
+        
+        return Response(tree, headers={'ETag': etag})
 
 
 class CompanyViewSet(viewsets.ModelViewSet):
     """ViewSet for Company CRUD"""
     permission_classes = [IsAuthenticated]
+    pagination_ordering = ('name', 'id')
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -66,7 +78,7 @@ class CompanyViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
-        organization = get_user_organization(user)
+        organization = self.request.tenant.organization
         
         if not organization:
             return Company.objects.none()
@@ -75,14 +87,24 @@ class CompanyViewSet(viewsets.ModelViewSet):
         
         # Filter for non-owners based on assignment
         if user.user_type != 'owner':
-            assignment = user.assignments.filter(is_active=True).first()
-            if assignment and assignment.company:
-                queryset = queryset.filter(id=assignment.company.id)
+            assignment = self.request.tenant.assignment
+            if assignment and assignment.company_id:
+                queryset = queryset.filter(id=assignment.company_id)
+        
+        queryset = queryset.filter(is_active=True)
+        
+        if self.action == 'list':
+            # Counts read by CompanyListSerializer (distinct: two joins are counted at once).
+            # Aggregating queries drop Meta.ordering, so the name order is explicit.
+            queryset = queryset.annotate(
+                branches_count=Count('branches', filter=Q(branches__is_active=True), distinct=True),
+                audits_count=Count('audits', distinct=True),
+            ).order_by('name')
         
-        return queryset.filter(is_active=True)
+        return queryset
     
     def perform_create(self, serializer):
-        organization = get_user_organization(self.request.user)
+        organization = self.request.tenant.organization
         serializer.save(organization=organization, created_by=self.request.user)
     
     @action(detail=True, methods=['get'])
@@ -90,10 +112,12 @@ class CompanyViewSet(viewsets.ModelViewSet):
         """Get company statistics"""
         company = self.get_object()
         
+        units_count = count_descendants('company', company.id)
+        
         stats = {
-            'branches_count': company.branches.filter(is_active=True).count(),
-            'departments_count': Department.objects.filter(branch__company=company, is_active=True).count(),
-            'teams_count': Team.objects.filter(department__branch__company=company, is_active=True).count(),
+            'branches_count': units_count['branch'],
+            'departments_count': units_count['department'],
+            'teams_count': units_count['team'],
             'audits_count': company.audits.count(),
             'completed_audits': company.audits.filter(status='completed').count(),
         }
@@ -104,6 +128,7 @@ class CompanyViewSet(viewsets.ModelViewSet):
 class BranchViewSet(viewsets.ModelViewSet):
     """ViewSet for Branch CRUD"""
     permission_classes = [IsAuthenticated]
+    pagination_ordering = ('name', 'id')
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -112,12 +137,12 @@ class BranchViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
-        organization = get_user_organization(user)
+        organization = self.request.tenant.organization
         
         if not organization:
             return Branch.objects.none()
         
-        queryset = Branch.objects.filter(company__organization=organization, is_active=True)
+        queryset = Branch.objects.filter(id__in=subtree_ids('organization', organization.id, 'branch'), is_active=True)
         
         # Filter by company if provided
         company_id = self.request.query_params.get('company')
@@ -126,12 +151,17 @@ class BranchViewSet(viewsets.ModelViewSet):
         
         # Filter for non-owners
         if user.user_type != 'owner':
-            assignment = user.assignments.filter(is_active=True).first()
+            assignment = self.request.tenant.assignment
             if assignment:
-                if assignment.company:
-                    queryset = queryset.filter(company=assignment.company)
-                elif assignment.branch:
-                    queryset = queryset.filter(id=assignment.branch.id)
+                if assignment.company_id:
+                    queryset = queryset.filter(company_id=assignment.company_id)
+                elif assignment.branch_id:
+                    queryset = queryset.filter(id=assignment.branch_id)
+        
+        if self.action == 'list':
+            queryset = queryset.select_related('company').annotate(
+                departments_count=Count('departments', filter=Q(departments__is_active=True)),
+            ).order_by('name')
         
         return queryset
     
@@ -142,6 +172,7 @@ class BranchViewSet(viewsets.ModelViewSet):
 class DepartmentViewSet(viewsets.ModelViewSet):
     """ViewSet for Department CRUD"""
     permission_classes = [IsAuthenticated]
+    pagination_ordering = ('name', 'id')
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -149,13 +180,12 @@ class DepartmentViewSet(viewsets.ModelViewSet):
         return DepartmentSerializer
     
     def get_queryset(self):
-        user = self.request.user
-        organization = get_user_organization(user)
+        organization = self.request.tenant.organization
         
         if not organization:
             return Department.objects.none()
         
-        queryset = Department.objects.filter(branch__company__organization=organization, is_active=True)
+        queryset = Department.objects.filter(id__in=subtree_ids('organization', organization.id, 'department'), is_active=True)
         
         # Filters
         branch_id = self.request.query_params.get('branch')
@@ -164,7 +194,12 @@ class DepartmentViewSet(viewsets.ModelViewSet):
         
         company_id = self.request.query_params.get('company')
         if company_id:
-            queryset = queryset.filter(branch__company_id=company_id)
+            queryset = queryset.filter(id__in=subtree_ids('company', company_id, 'department'))
+        
+        if self.action == 'list':
+            queryset = queryset.select_related('branch__company').annotate(
+                teams_count=Count('teams', filter=Q(teams__is_active=True)),
+            ).order_by('name')
         
         return queryset
     
@@ -175,6 +210,7 @@ class DepartmentViewSet(viewsets.ModelViewSet):
 class TeamViewSet(viewsets.ModelViewSet):
     """ViewSet for Team CRUD"""
     permission_classes = [IsAuthenticated]
+    pagination_ordering = ('name', 'id')
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -182,19 +218,23 @@ class TeamViewSet(viewsets.ModelViewSet):
         return TeamSerializer
     
     def get_queryset(self):
-        user = self.request.user
-        organization = get_user_organization(user)
+        organization = self.request.tenant.organization
         
         if not organization:
             return Team.objects.none()
         
-        queryset = Team.objects.filter(department__branch__company__organization=organization, is_active=True)
+        queryset = Team.objects.filter(id__in=subtree_ids('organization', organization.id, 'team'), is_active=True)
         
         # Filters
         department_id = self.request.query_params.get('department')
         if department_id:
             queryset = queryset.filter(department_id=department_id)
         
+        if self.action == 'list':
+            queryset = queryset.select_related('department').annotate(
+                subteams_count=Count('subteams', filter=Q(subteams__is_active=True)),
+            ).order_by('name')
+        
         return queryset
     
     def perform_create(self, serializer):
@@ -204,6 +244,7 @@ class TeamViewSet(viewsets.ModelViewSet):
 class SubTeamViewSet(viewsets.ModelViewSet):
     """ViewSet for SubTeam CRUD"""
     permission_classes = [IsAuthenticated]
+    pagination_ordering = ('name', 'id')
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -211,19 +252,21 @@ class SubTeamViewSet(viewsets.ModelViewSet):
         return SubTeamSerializer
     
     def get_queryset(self):
-        user = self.request.user
-        organization = get_user_organization(user)
+        organization = self.request.tenant.organization
         
         if not organization:
             return SubTeam.objects.none()
         
-        queryset = SubTeam.objects.filter(team__department__branch__company__organization=organization, is_active=True)
+        queryset = SubTeam.objects.filter(id__in=subtree_ids('organization', organization.id, 'subteam'), is_active=True)
         
         # Filters
         team_id = self.request.query_params.get('team')
         if team_id:
             queryset = queryset.filter(team_id=team_id)
         
+        if self.action == 'list':
+            queryset = queryset.select_related('team')
+        
         return queryset
     
     def perform_create(self, serializer):
@@ -238,8 +281,7 @@ class UserListView(generics.ListAPIView):
     serializer_class = UserAssignmentSerializer
     
     def get_queryset(self):
-        user = self.request.user
-        organization = get_user_organization(user)
+        organization = self.request.tenant.organization
         
         if not organization:
             return UserAssignment.objects.none()
@@ -253,8 +295,7 @@ class InvitationViewSet(viewsets.ModelViewSet):
     serializer_class = InvitationSerializer
     
     def get_queryset(self):
-        user = self.request.user
-        organization = get_user_organization(user)
+        organization = self.request.tenant.organization
         
         if not organization:
             return Invitation.objects.none()
@@ -266,7 +307,7 @@ class InvitationViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         
         data = serializer.validated_data
-        organization = get_user_organization(request.user)
+        organization = request.tenant.organization
         
         if not organization:
             return Response({'error': 'No tienes una organización'}, status=status.HTTP_400_BAD_REQUEST)
@@ -430,18 +471,19 @@ class OrganizationStatsView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        user = request.user
-        organization = get_user_organization(user)
+        organization = request.tenant.organization
         
         if not organization:
             return Response({'error': 'No tienes una organización'}, status=status.HTTP_404_NOT_FOUND)
         
+        units_count = count_descendants('organization', organization.id)
+        
         stats = {
-            'companies_count': Company.objects.filter(organization=organization, is_active=True).count(),
-            'branches_count': Branch.objects.filter(company__organization=organization, is_active=True).count(),
-            'departments_count': Department.objects.filter(branch__company__organization=organization, is_active=True).count(),
-            'teams_count': Team.objects.filter(department__branch__company__organization=organization, is_active=True).count(),
-            'subteams_count': SubTeam.objects.filter(team__department__branch__company__organization=organization, is_active=True).count(),
+            'companies_count': units_count['company'],
+            'branches_count': units_count['branch'],
+            'departments_count': units_count['department'],
+            'teams_count': units_count['team'],
+            'subteams_count': units_count['subteam'],
             'users_count': UserAssignment.objects.filter(organization=organization, is_active=True).count() + 1,  # +1 for owner
             'pending_invitations': Invitation.objects.filter(organization=organization, status='pending').count(),
         }
@@ -33,6 +33,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.core.middleware.TenantMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -64,6 +65,13 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache',
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -100,8 +108,14 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_PAGINATION_CLASS': 'apps.core.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
 }
 
+# Keyset pagination (apps/core/pagination.py)
+PAGINATION_MAX_PAGE_SIZE = 500  # Upper bound of ?page_size=
+PAGINATION_INCLUDE_COUNT = True  # Total count in list responses; ?count=false skips it per request
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=24),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
@@ -111,3 +125,23 @@ SIMPLE_JWT = {
 
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+
+# Background jobs (python manage.py run_jobs)
+JOBS_EAGER = False  # Run jobs inside the request that enqueues them (no worker needed)
+JOBS_MAX_ATTEMPTS = 3
+JOBS_RETRY_DELAY = 30  # Seconds, doubled on each retry
+JOBS_STALE_AFTER = 600  # Seconds without a heartbeat before a running job is considered abandoned
+JOBS_HEARTBEAT_INTERVAL = 60  # Seconds between heartbeats of a running job, well under JOBS_STALE_AFTER
+
+STATISTICS_CACHE_TIMEOUT = 300
+HIERARCHY_CACHE_TIMEOUT = 3600
+TENANT_CONTEXT_CACHE_TIMEOUT = 300  # Seconds; 0 resolves the tenant context from the database on every request
+
+COMPARISON_MAX_AUDITS = 500
+
+# Streaming CSV/XLSX exports (apps/audits/exports.py)
+EXPORT_CHUNK_SIZE = 2000  # Rows fetched per database round trip
+
+# Per-unit scorecards (apps/audits/scorecards.py): how subtree scores weight
+# their parts, 'audits' (by number of audits) or 'equal' (each child unit alike)
+SCORECARD_WEIGHTING = 'audits'
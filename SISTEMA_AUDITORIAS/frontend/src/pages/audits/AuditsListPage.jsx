@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Plus, Search } from 'lucide-react';
 import { Card, CardBody } from '../../components/common/Card';
@@ -6,35 +6,59 @@ import Loading from '../../components/common/Loading';
 import AuditCard from '../../components/audits/AuditCard';
 import { auditService } from '../../services/auditService';
 
+// Milliseconds after the last keystroke before searching
+const SEARCH_DELAY = 300;
+
 const AuditsListPage = () => {
   const navigate = useNavigate();
   const [audits, setAudits] = useState([]);
+  const [next, setNext] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [filter, setFilter] = useState('all');
   const [search, setSearch] = useState('');
+  // Responses of a previous filter or search are dropped
+  const request = useRef(0);
 
   useEffect(() => {
-    fetchAudits();
-  }, []);
+    const timer = setTimeout(fetchAudits, search ? SEARCH_DELAY : 0);
+    return () => clearTimeout(timer);
+  }, [filter, search]);
 
   const fetchAudits = async () => {
+    const current = ++request.current;
+    const filters = {};
+    if (filter !== 'all') filters.status = filter;
+    if (search) filters.search = search;
+
     try {
-      const response = await auditService.getAudits();
-      const data = response.data || response || [];
-      setAudits(Array.isArray(data) ? data : []);
+      const response = await auditService.getAuditsPage(filters);
+      if (current !== request.current) return;
+      setAudits(response.data.results || []);
+      setNext(response.data.next);
     } catch (error) {
       console.error('Error fetching audits:', error);
       setAudits([]);
+      setNext(null);
     } finally {
       setLoading(false);
     }
   };
 
-  const filteredAudits = (audits || []).filter(audit => {
-    const matchesFilter = filter === 'all' || audit.status === filter;
-    const matchesSearch = (audit.name || '').toLowerCase().includes(search.toLowerCase());
-    return matchesFilter && matchesSearch;
-  });
+  const loadMore = async () => {
+    const current = request.current;
+    setLoadingMore(true);
+    try {
+      const response = await auditService.getNextPage(next);
+      if (current !== request.current) return;
+      setAudits((previous) => previous.concat(response.data.results || []));
+      setNext(response.data.next);
+    } catch (error) {
+      console.error('Error fetching audits:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   if (loading) return <Loading />;
 
@@ -86,7 +110,7 @@ const AuditsListPage = () => {
             </div>
           </div>
 
-          {filteredAudits.length === 0 ? (
+          {audits.length === 0 ? (
             <div className="text-center py-12">
               <p className="text-gray-400">No hay auditorias</p>
               <button
@@ -97,11 +121,24 @@ const AuditsListPage = () => {
               </button>
             </div>
           ) : (
-            <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-4">
-              {filteredAudits.map((audit) => (
-                <AuditCard key={audit.id} audit={audit} />
-              ))}
-            </div>
+            <>
+              <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-4">
+                {audits.map((audit) => (
+                  <AuditCard key={audit.id} audit={audit} />
+                ))}
+              </div>
+              {next && (
+                <div className="flex justify-center mt-6">
+                  <button
+                    onClick={loadMore}
+                    disabled={loadingMore}
+                    className="px-4 py-2 bg-gray-700 text-gray-300 rounded-lg hover:bg-gray-600 disabled:opacity-50"
+                  >
+                    {loadingMore ? 'Cargando...' : 'Cargar más'}
+                  </button>
+                </div>
+              )}
+            </>
           )}
         </CardBody>
       </Card>
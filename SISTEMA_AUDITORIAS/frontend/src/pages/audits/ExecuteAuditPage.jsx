@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { ArrowLeft, ArrowRight, CheckCircle } from 'lucide-react';
 import { Card, CardHeader, CardBody } from '../../components/common/Card';
@@ -7,6 +7,11 @@ import Loading from '../../components/common/Loading';
 import QuestionCard from '../../components/audits/QuestionCard';
 import auditService from '../../services/auditService';
 
+const COMPLETION_POLL_INTERVAL = 1500;
+const ACTIVE_JOB_STATUSES = ['pending', 'running'];
+
+const wait = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
 const ExecuteAuditPage = () => {
   const { id } = useParams();
   const navigate = useNavigate();
@@ -17,11 +22,18 @@ const ExecuteAuditPage = () => {
   const [answers, setAnswers] = useState({});
   const [loading, setLoading] = useState(true);
   const [saving, setSaving] = useState(false);
+  const [completionJob, setCompletionJob] = useState(null);
+  const mounted = useRef(true);
 
   useEffect(() => {
     fetchAuditData();
   }, [id]);
 
+  useEffect(() => {
+    mounted.current = true;
+    return () => { mounted.current = false; };
+  }, []);
+
   const fetchAuditData = async () => {
     try {
       const auditResponse = await auditService.getAudit(id);
@@ -80,16 +92,44 @@ const ExecuteAuditPage = () => {
     }
   };
 
+  // Scoring, recommendations and statistics run in a background job: wait for it before showing the results
+  const waitForCompletion = async (job) => {
+    while (job && ACTIVE_JOB_STATUSES.includes(job.status)) {
+      setCompletionJob(job);
+      await wait(COMPLETION_POLL_INTERVAL);
+      if (!mounted.current) return;
+      const response = await auditService.getCompletion(id);
+      job = response.data;
+    }
+    setCompletionJob(job);
+    if (job && job.status === 'succeeded') {
+      navigate('/audits/' + id);
+    }
+  };
+
   const handleComplete = async () => {
     setSaving(true);
     try {
-      await auditService.completeAudit(id);
-      navigate('/audits/' + id);
+      const response = await auditService.completeAudit(id);
+      await waitForCompletion(response.data.completion_job);
     } catch (error) {
       console.error('Error completing audit:', error);
       alert('Error al completar la auditoria');
     } finally {
-      setSaving(false);
+      if (mounted.current) setSaving(false);
+    }
+  };
+
+  const handleRetryCompletion = async () => {
+    setSaving(true);
+    try {
+      const response = await auditService.retryCompletion(id);
+      await waitForCompletion(response.data);
+    } catch (error) {
+      console.error('Error retrying audit completion:', error);
+      alert('Error al reintentar el cierre de la auditoria');
+    } finally {
+      if (mounted.current) setSaving(false);
     }
   };
 
@@ -104,7 +144,9 @@ const ExecuteAuditPage = () => {
   const totalAnswered = Object.keys(answers).length;
   const totalQuestions = questions.length;
   const progress = totalQuestions > 0 ? (totalAnswered / totalQuestions) * 100 : 0;
-  const canComplete = totalAnswered === totalQuestions;
+  const canComplete = totalAnswered === totalQuestions && !completionJob;
+  const completing = completionJob && ACTIVE_JOB_STATUSES.includes(completionJob.status);
+  const completionFailed = completionJob && completionJob.status === 'failed';
 
   return (
     <div className="space-y-6">
@@ -130,10 +172,25 @@ const ExecuteAuditPage = () => {
           }
         >
           <CheckCircle className="w-4 h-4 mr-2" />
-          {saving ? 'Guardando...' : 'Completar Auditoria'}
+          {completing ? 'Procesando resultados...' : saving ? 'Guardando...' : 'Completar Auditoria'}
         </button>
       </div>
 
+      {completing && (
+        <div className="bg-gray-800 rounded-lg p-4 text-gray-300">
+          Auditoria completada. Calculando puntajes y recomendaciones...
+        </div>
+      )}
+
+      {completionFailed && (
+        <div className="border-2 border-red-500/50 bg-red-500/5 rounded-lg p-4 flex items-center justify-between">
+          <span className="text-red-400">No se pudo procesar el cierre de la auditoria.</span>
+          <Button variant="danger" onClick={handleRetryCompletion} loading={saving}>
+            Reintentar
+          </Button>
+        </div>
+      )}
+
       <div className="bg-gray-800 rounded-lg p-4">
         <div className="flex justify-between text-sm mb-2">
           <span className="text-gray-400">Progreso General</span>
@@ -24,26 +24,43 @@ var ComparisonsPage = function() {
   var showResults = showResultsState[0];
   var setShowResults = showResultsState[1];
 
+  var nextState = useState(null);
+  var next = nextState[0];
+  var setNext = nextState[1];
+
+  var loadingMoreState = useState(false);
+  var loadingMore = loadingMoreState[0];
+  var setLoadingMore = loadingMoreState[1];
+
   useEffect(function() {
     fetchCompletedAudits();
   }, []);
 
   var fetchCompletedAudits = async function() {
     try {
-      var response = await auditService.getAudits({ status: 'completed' });
-      var data = response.data || response || [];
-      if (Array.isArray(data)) {
-        setAudits(data);
-      } else {
-        setAudits([]);
-      }
+      var response = await auditService.getAuditsPage({ status: 'completed' });
+      setAudits(response.data.results || []);
+      setNext(response.data.next);
     } catch (error) {
       console.error('Error fetching audits:', error);
       setAudits([]);
+      setNext(null);
     }
     setLoading(false);
   };
 
+  var loadMoreAudits = async function() {
+    setLoadingMore(true);
+    try {
+      var response = await auditService.getNextPage(next);
+      setAudits(function(prev) { return prev.concat(response.data.results || []); });
+      setNext(response.data.next);
+    } catch (error) {
+      console.error('Error fetching audits:', error);
+    }
+    setLoadingMore(false);
+  };
+
   var toggleAuditSelection = function(auditId) {
     setSelectedAudits(function(prev) {
       if (prev.includes(auditId)) {
@@ -173,6 +190,13 @@ var ComparisonsPage = function() {
                 );
               })
             ),
+            next && React.createElement('div', { className: 'flex justify-center mb-4' },
+              React.createElement('button', {
+                onClick: loadMoreAudits,
+                disabled: loadingMore,
+                className: 'px-4 py-2 rounded-lg bg-gray-700 text-gray-300 hover:bg-gray-600 disabled:opacity-50'
+              }, loadingMore ? 'Cargando...' : 'Cargar más')
+            ),
             React.createElement('div', { className: 'flex justify-between items-center' },
               React.createElement('p', { className: 'text-sm text-gray-400' },
                 selectedAudits.length + ' de 5 seleccionadas'
@@ -20,6 +20,7 @@ const TreeNode = ({ item, level = 0, type }) => {
         <div className={`p-1.5 rounded ${colors[type]}`}><Icon size={16} /></div>
         <span className="font-medium text-gray-900">{item.name}</span>
         <span className="text-xs text-gray-400">({item.code})</span>
+        {item.score && <span className="text-xs text-gray-500" title={`${item.score.audits_count} auditorías`}>{item.score.average_score.toFixed(1)}%</span>}
         {hasChildren && <span className="ml-auto text-xs text-gray-400">{children.length}</span>}
       </div>
       {expanded && hasChildren && children.map((child) => <TreeNode key={child.id} item={child} level={level + 1} type={childType} />)}
@@ -51,4 +51,27 @@ api.interceptors.response.use(
   }
 );
 
+// Largest page the API serves (PAGINATION_MAX_PAGE_SIZE), fewer round trips when reading whole lists
+const LIST_PAGE_SIZE = 500;
+
+// List endpoints are paginated ({ next, previous, count, results }): follow `next` and
+// resolve to the first axios response with every row of the list as its data
+export const getAllResults = async (url, config = {}) => {
+  const params = { page_size: LIST_PAGE_SIZE, count: false, ...config.params };
+  const response = await api.get(url, { ...config, params });
+  if (!response.data || !Array.isArray(response.data.results)) {
+    return response;
+  }
+  
+  const rows = [...response.data.results];
+  let next = response.data.next;
+  while (next) {
+    // `next` already carries the query params and the cursor
+    const page = await api.get(next);
+    rows.push(...page.data.results);
+    next = page.data.next;
+  }
+  return { ...response, data: rows };
+};
+
 export default api;
@@ -1,16 +1,25 @@
-import api from './api';
+import api, { getAllResults } from './api';
+
+// Audits per page of the list screens
+const AUDITS_PAGE_SIZE = 24;
 
 export const auditService = {
   getTemplates: function() {
-    return api.get('/templates/');
+    return getAllResults('/templates/');
   },
   
   getTemplate: function(id) {
     return api.get('/templates/' + id + '/');
   },
   
-  getAudits: function(filters) {
-    return api.get('/audits/', { params: filters });
+  // One page of audits, newest first ({ next, results }); getNextPage(next) reads the following one
+  getAuditsPage: function(filters) {
+    return api.get('/audits/', { params: { page_size: AUDITS_PAGE_SIZE, count: false, ...filters } });
+  },
+  
+  getNextPage: function(next) {
+    // `next` already carries the filters and the cursor
+    return api.get(next);
   },
   
   getAudit: function(id) {
@@ -29,6 +38,14 @@ export const auditService = {
     return api.post('/audits/' + id + '/complete/');
   },
   
+  getCompletion: function(id) {
+    return api.get('/audits/' + id + '/completion/');
+  },
+  
+  retryCompletion: function(id) {
+    return api.post('/audits/' + id + '/completion/retry/');
+  },
+  
   getQuestions: function(auditId) {
     return api.get('/audits/' + auditId + '/questions/');
   },
@@ -62,7 +79,7 @@ export const auditService = {
   },
   
   getRecommendations: function(auditId) {
-    return api.get('/recommendations/', { params: { audit: auditId } });
+    return getAllResults('/recommendations/', { params: { audit: auditId } });
   }
 };
 
@@ -1,8 +1,8 @@
-import api from './api';
+import api, { getAllResults } from './api';
 
 export const companyService = {
   getCompanies: function() {
-    return api.get('/companies/');
+    return getAllResults('/companies/');
   },
   
   getCompany: function(id) {
@@ -1,4 +1,4 @@
-import api from './api';
+import api, { getAllResults } from './api';
 
 export const hierarchyService = {
   // Tree
@@ -9,7 +9,7 @@ export const hierarchyService = {
   
   // Companies
   async getCompanies() {
-    const response = await api.get('/companies/');
+    const response = await getAllResults('/companies/');
     return response.data;
   },
   
@@ -36,7 +36,7 @@ export const hierarchyService = {
   // Branches
   async getBranches(companyId = null) {
     const params = companyId ? `?company=${companyId}` : '';
-    const response = await api.get(`/branches/${params}`);
+    const response = await getAllResults(`/branches/${params}`);
     return response.data;
   },
   
@@ -53,7 +53,7 @@ export const hierarchyService = {
   // Departments
   async getDepartments(branchId = null) {
     const params = branchId ? `?branch=${branchId}` : '';
-    const response = await api.get(`/departments/${params}`);
+    const response = await getAllResults(`/departments/${params}`);
     return response.data;
   },
   
@@ -70,7 +70,7 @@ export const hierarchyService = {
   // Teams
   async getTeams(departmentId = null) {
     const params = departmentId ? `?department=${departmentId}` : '';
-    const response = await api.get(`/teams/${params}`);
+    const response = await getAllResults(`/teams/${params}`);
     return response.data;
   },
   
@@ -82,7 +82,7 @@ export const hierarchyService = {
   // SubTeams
   async getSubTeams(teamId = null) {
     const params = teamId ? `?team=${teamId}` : '';
-    const response = await api.get(`/subteams/${params}`);
+    const response = await getAllResults(`/subteams/${params}`);
     return response.data;
   },
   
@@ -1,15 +1,15 @@
-import api from './api';
+import api, { getAllResults } from './api';
 
 export const userService = {
   // Users
   async getUsers() {
-    const response = await api.get('/users/');
+    const response = await getAllResults('/users/');
     return response.data;
   },
   
   // Invitations
   async getInvitations() {
-    const response = await api.get('/invitations/');
+    const response = await getAllResults('/invitations/');
     return response.data;
   },
   
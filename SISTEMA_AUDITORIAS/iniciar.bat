@@ -11,6 +11,10 @@ echo.
 echo Iniciando Backend (Django)...
 start "Backend - Django" cmd /k "cd backend && python manage.py runserver"
 
+:: Iniciar Worker de tareas en nueva ventana
+echo Iniciando Worker de tareas (cierre de auditorias)...
+start "Worker - Tareas" cmd /k "cd backend && python manage.py run_jobs --concurrency 2"
+
 :: Esperar un poco
 timeout /t 3 /nobreak > nul
 
@@ -28,7 +32,7 @@ echo Frontend: http://localhost:3000
 echo.
 echo El navegador se abrira automaticamente en unos segundos...
 echo.
-echo Para detener: cierra las ventanas de Backend y Frontend
+echo Para detener: cierra las ventanas de Backend, Worker y Frontend
 echo ================================================================
 echo.
 
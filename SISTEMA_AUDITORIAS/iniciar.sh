@@ -11,6 +11,7 @@ cleanup() {
     echo ""
     echo "Deteniendo servidores..."
     kill $BACKEND_PID 2>/dev/null
+    kill $WORKER_PID 2>/dev/null
     kill $FRONTEND_PID 2>/dev/null
     exit 0
 }
@@ -21,6 +22,9 @@ echo "Iniciando Backend (Django)..."
 cd backend
 python3 manage.py runserver &
 BACKEND_PID=$!
+echo "Iniciando Worker de tareas (cierre de auditorias)..."
+python3 manage.py run_jobs --concurrency 2 &
+WORKER_PID=$!
 cd ..
 
 # Esperar un poco
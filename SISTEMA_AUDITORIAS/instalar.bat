@@ -60,7 +60,7 @@ cd ..
 echo.
 echo [5/6] Aplicando migraciones de base de datos...
 cd backend
-python manage.py migrate --run-syncdb
+python manage.py record_initial_migrations && python manage.py migrate
 if %errorlevel% neq 0 (
     echo [ERROR] Error en migraciones
     pause
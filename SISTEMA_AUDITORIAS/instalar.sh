@@ -51,7 +51,7 @@ cd ..
 echo ""
 echo "[5/6] Aplicando migraciones de base de datos..."
 cd backend
-python3 manage.py migrate --run-syncdb
+python3 manage.py record_initial_migrations && python3 manage.py migrate
 if [ $? -ne 0 ]; then
     echo "❌ Error en migraciones"
     exit 1